@@ -58,6 +58,13 @@ solc-select use 0.8.26
 # Fuzzing setup
 # =========================
 
+# the shards of sharded mazes (see --shard-size) are deployed at consecutive
+# addresses from 0x5a000000 on, where the Maze contract expects them
+DEPLOY_CONTRACTS=""
+for SHARD in $(grep -o "^contract MazeShard[0-9]*" $SOURCE | sed "s/contract MazeShard//"); do
+    DEPLOY_CONTRACTS+="[\"$(printf "0x%x" $((0x5a000000 + SHARD)))\", \"MazeShard$SHARD\"], "
+done
+
 # taken from daedaluzz
 cat > echidna-config.yaml <<_EOT_
 testMode: "property"
@@ -71,6 +78,7 @@ shrinkLimit: 5000
 format: text
 codeSize: 0xc00000
 seed: $SEED
+deployContracts: [${DEPLOY_CONTRACTS%, }]
 solcArgs: "--evm-version paris --optimize --optimize-runs 99999"
 _EOT_
 
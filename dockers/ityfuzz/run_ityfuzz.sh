@@ -49,6 +49,14 @@ touch $LOGFILE
 # Compilation
 # =========================
 
+# ityfuzz deploys every contract at an address of its own choice, hence the shards of
+# sharded mazes (see --shard-size) cannot be placed where the Maze contract expects them
+if grep -q "^contract MazeShard" $SOURCE; then
+    echo "=> sharded mazes are not supported by ityfuzz" >> $LOGFILE
+    echo "failure" > $FAILFILE
+    exit 1
+fi
+
 # set and install specific solidity version
 solc-select install 0.8.26
 solc-select use 0.8.26
@@ -57,6 +57,13 @@ solc-select use 0.8.26
 # Fuzzing setup
 # =========================
 
+# the shards of sharded mazes (see --shard-size) are deployed at consecutive
+# addresses from 0x5a000000 on, where the Maze contract expects them
+PREDEPLOYED_CONTRACTS=""
+for SHARD in $(grep -o "^contract MazeShard[0-9]*" $SOURCE | sed "s/contract MazeShard//"); do
+    PREDEPLOYED_CONTRACTS+="\"MazeShard$SHARD\": \"$(printf "0x%x" $((0x5a000000 + SHARD)))\", "
+done
+
 cat > medusa.json <<_EOT_
 {
 	"fuzzing": {
@@ -70,6 +77,7 @@ cat > medusa.json <<_EOT_
 		"targetContracts": [ "Maze" ],
 		"targetContractsBalances": [],
 		"constructorArgs": {},
+		"predeployedContracts": { ${PREDEPLOYED_CONTRACTS%, } },
 		"deployerAddress": "0x30000",
 		"senderAddresses": [
 			"0x10000",
@@ -1,21 +1,32 @@
-import smt2_parser as smt2_parser
+import re
+import cve_cache
+from stage_timer import stage
+
+# only a few local variables can be accessed on the stack of the EVM, the temporaries of a cell
+# beyond this amount are substituted into the conditions again
+MAX_TEMPORARIES = 8
+
+def inline_temporaries(constraints, temporaries):
+    """Replaces the "temporaries" inside of the "constraints" by their expressions."""
+
+    # temporaries are only used after their declaration, hence later ones are substituted first
+    for solidity_type, name, expression in reversed(temporaries):
+        pattern = re.compile(rf"\b{name}\b")
+        constraints = [ pattern.sub(lambda _: expression, constraint) for constraint in constraints ]
+    return constraints
 
 class Generator:
     def __init__(self, size, edges, sln, equality, smt_file):
         self.size = size
         self.edges = edges
         self.sln = sln
-        self.constraints, self.vars_all, self.assignments = smt2_parser.parse(smt_file)
-        self.groups, self.vars = smt2_parser.independent_formulas(self.constraints, self.vars_all)
-        self.insert = list()
+        with stage("smt_parse"):
+            self.constraints, self.vars_all, self.assignments, self.groups, self.vars, self.temporaries = cve_cache.parse(smt_file)
         self.cached_guard_solution : dict[int, dict[int, str]] = dict()
-        for idx in range(self.size):
-            self.insert.append(0)
-        while sum(self.insert) < len(self.groups):
-            for func in self.sln:
-                self.insert[func] += 1
-                if sum(self.insert) >= len(self.groups):
-                    break
+        # distribute the groups along the solution path, starting over at its beginning
+        self.insert = [0] * self.size
+        for inserted in range(len(self.groups)):
+            self.insert[self.sln[inserted % len(self.sln)]] += 1
 
     def get_logic_sol(self):
         logic_sol = dict()
@@ -26,25 +37,33 @@ class Generator:
             ## input parameters for the current function
             func_inputs = []
             ## additional needed input parameters for the current function
-            buggy_constraints = ""
+            buggy_constraints = []
             if self.insert[idx] != 0:
-                copy_idx, tab_cnt = 0, 0
-                constraints, vars = set(), set()
+                tab_cnt = 0
+                constraints, vars, temporaries = set(), set(), list()
                 for cnt in range(self.insert[idx]):
-                    constraints = constraints.union(self.groups[group_idx + cnt])
-                    vars = vars.union(self.vars[group_idx + cnt])
+                    constraints.update(self.groups[group_idx + cnt])
+                    vars.update(self.vars[group_idx + cnt])
+                    temporaries.extend(self.temporaries[group_idx + cnt])
                 for var in sorted(vars):
                     func_inputs.append("int8 {}".format(var))
-                buggy_constraints += "\t\tint32 flag = 0;\n"
-                for constraint in sorted(constraints):
-                    buggy_constraints += "\t"*tab_cnt + "\t\tif{}{{\n".format(constraint)
+                buggy_constraints.append("\t\tint32 flag = 0;\n")
+                # shared subterms of the conditions are computed once in front of them
+                constraints = sorted(constraints)
+                if len(temporaries) > MAX_TEMPORARIES:
+                    constraints = inline_temporaries(constraints, temporaries[MAX_TEMPORARIES:])
+                    temporaries = temporaries[:MAX_TEMPORARIES]
+                for solidity_type, name, expression in temporaries:
+                    buggy_constraints.append("\t\t{} {} = {};\n".format(solidity_type, name, expression))
+                for constraint in constraints:
+                    buggy_constraints.append("\t"*tab_cnt + "\t\tif{}{{\n".format(constraint))
                     tab_cnt += 1
-                buggy_constraints += "\t"*tab_cnt + "\tflag = 1;\n"
+                buggy_constraints.append("\t"*tab_cnt + "\tflag = 1;\n")
                 for k in range(len(constraints)-1, -1, -1):
-                    buggy_constraints += "\t"*k + "\t\t}\n"
+                    buggy_constraints.append("\t"*k + "\t\t}\n")
                 group_idx += self.insert[idx]
             logic_sol["func_inputs"].append(func_inputs)
-            logic_sol["buggy_constraints"].append(buggy_constraints)
+            logic_sol["buggy_constraints"].append("".join(buggy_constraints))
         return logic_sol
 
     def get_guard(self):
@@ -64,6 +83,8 @@ class Generator:
             , ["[ -44 ]", "[ 41 ]", "[ 42 ]"]
             , ["[ -65 ]", "[ -1 ]", "[ 63 ]", "[ 64 ]"]
             ]
+        # cell following each cell of the solution, the last visit of a cell counts
+        successors = dict(zip(self.sln, self.sln[1:] + ['bug']))
         for idx in range(self.size):
             self.cached_guard_solution[idx] = dict() # start a new solution
             numb_edges = len(self.edges[idx])
@@ -75,14 +96,9 @@ class Generator:
                     self.cached_guard_solution[idx][self.edges[idx][i]] = solution_values[numb_edges][i]
 
             else:
-                next, bug_edge, m = 0, 0, 0
+                bug_edge, m = 0, 0
                 conds = []
-                for i in range(len(self.sln)):
-                    if self.sln[i] == idx:
-                        if i == len(self.sln) - 1:
-                            next = 'bug'
-                        else:
-                            next = self.sln[i+1]
+                next = successors.get(idx, 0)
                 for n in range(numb_edges):
                     if self.edges[idx][n] == next:
                         bug_edge = n
@@ -92,7 +108,6 @@ class Generator:
                     else:
                         conds.append(conds_default[numb_edges-1][m] + " && flag == 0")
                         m += 1
-                group_idx += 1
                 guard.append(conds)
 
                 # this is some special handling using the CVE formulas!
@@ -105,9 +120,15 @@ class Generator:
                 smt_symbol, array_assignment = list(self.assignments.items())[0]
                 default_value, special_values = array_assignment
 
-                # TODO: FIXME: HACK: "100" is a strange limitation / magic constant but it
-                #                    is also used in the parse file so we reuse it here.
-                final_array_value = [ special_values.get(i, default_value) for i in range(100) ]
+                # the array only needs to hold the largest index read by the conditions of the cell,
+                # which is also the length required by the cell (see array_to_code.get_args_to_fuzz)
+                vars = set()
+                for cnt in range(self.insert[idx]):
+                    vars.update(self.vars[group_idx + cnt])
+                group_idx += self.insert[idx]
+                # variables are elements of the input array, i.e. of the form "inp[<index>]"
+                array_size = max((int(var[len("inp["):-1]) + 1 for var in vars), default=1)
+                final_array_value = [ special_values.get(i, default_value) for i in range(array_size) ]
                 for i in range(numb_edges):
                     self.cached_guard_solution[idx][self.edges[idx][i]] = str(final_array_value)
 
@@ -1,4 +1,5 @@
 import sys
+from collections import deque
 import numpy as np
 import matplotlib.pyplot as plt
 from mazelib import Maze
@@ -7,7 +8,10 @@ from mazelib.generate.Kruskal import Kruskal
 from mazelib.generate.Prims import Prims
 from mazelib.generate.Wilsons import Wilsons
 from mazelib.generate.Sidewinder import Sidewinder
-from mazelib.solve.ShortestPath import ShortestPath
+from array_generators import ArrayBacktracking, ArrayKruskal, ArrayPrims, ArrayWilsons, ArraySidewinder
+from bfs_solver import BFSShortestPath
+from stage_timer import stage, count
+import maze_format
 
 def generate_maze(algorithm, width, height, seed, maze_exit):
     if seed == "NONE":
@@ -26,16 +30,29 @@ def generate_maze(algorithm, width, height, seed, maze_exit):
         m.generator = Wilsons(height, width)
     elif algorithm == "Sidewinder":
         m.generator = Sidewinder(height, width)
+    elif algorithm == "ArrayBacktracking":
+        m.generator = ArrayBacktracking(height, width)
+    elif algorithm == "ArrayKruskal":
+        m.generator = ArrayKruskal(height, width)
+    elif algorithm == "ArrayPrims":
+        m.generator = ArrayPrims(height, width)
+    elif algorithm == "ArrayWilsons":
+        m.generator = ArrayWilsons(height, width)
+    elif algorithm == "ArraySidewinder":
+        m.generator = ArraySidewinder(height, width)
     else:
         print("No such algorithm supported")
         exit(1)
 
-    m.solver = ShortestPath()
+    m.solver = BFSShortestPath()
 
     # default solution length = r*(M + N) where r=1.5 with 0.05 padding
     length_min = int(1.45*(2*width+2*height+2))
     length_max = int(1.55*(2*width+2*height+2))
 
+    if maze_exit == "targeted":
+        return generate_targeted_maze(m, width, height, length_min, length_max)
+
     # default exit site
     height_bug = height*2
     width_bug = width*2 - 1
@@ -43,55 +60,117 @@ def generate_maze(algorithm, width, height, seed, maze_exit):
     # make a maze with a solution length within min-max range
     sol_len = 0
     while sol_len < length_min or sol_len > length_max:
-        m.generate()
-        m.start = (0, 1)
-        m.grid[0][1] = 0
-        if maze_exit == "random":
-            height_bug = np.random.randint(2, height)*2 - 1
-            width_bug = np.random.randint(2, width)*2 - 1
-        m.end = (height_bug, width_bug)
-        m.grid[height_bug][width_bug] = 0
-        m.solve()
+        count("maze_attempts")
+        with stage("maze_generation"):
+            m.generate()
+            m.start = (0, 1)
+            m.grid[0][1] = 0
+            if maze_exit == "random":
+                height_bug = np.random.randint(2, height)*2 - 1
+                width_bug = np.random.randint(2, width)*2 - 1
+            m.end = (height_bug, width_bug)
+            m.grid[height_bug][width_bug] = 0
+        with stage("maze_solve"):
+            m.solve()
         sol_len = len(m.solutions[0])
     return m
 
-# print grid to a file
+# distance (in cells) of every cell to the start cell and the cell it is reached from
+def cell_distances(grid, start):
+    rows, cols = grid.shape
+    free = (np.asarray(grid) == 0).tolist()
+    distances = [ [-1] * cols for _ in range(rows) ]
+    parents = [ [None] * cols for _ in range(rows) ]
+    distances[start[0]][start[1]] = 0
+    queue = deque([start])
+    while queue:
+        i, j = queue.popleft()
+        distance = distances[i][j] + 1
+        for di, dj in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            ni, nj = i + 2*di, j + 2*dj
+            if 0 < ni < rows and 0 < nj < cols \
+                    and free[i + di][j + dj] and distances[ni][nj] < 0:
+                distances[ni][nj] = distance
+                parents[ni][nj] = (i, j)
+                queue.append((ni, nj))
+    return np.array(distances), parents
+
+# solution path from the start cell to "end" including the passages between the cells
+def solution_path(parents, end):
+    path = [end]
+    while parents[path[-1][0]][path[-1][1]] is not None:
+        parent = parents[path[-1][0]][path[-1][1]]
+        path.append(((parent[0] + path[-1][0]) // 2, (parent[1] + path[-1][1]) // 2))
+        path.append(parent)
+    return path[::-1]
+
+# instead of regenerating the maze until the default exit has a solution length within
+# the min-max range, the exit is picked among all cells with such a solution length.
+# since all generated mazes are perfect, a single BFS yields the solution of every cell.
+def generate_targeted_maze(m, width, height, length_min, length_max):
+    candidates = []
+    while len(candidates) == 0:
+        count("maze_attempts")
+        with stage("maze_generation"):
+            m.generate()
+            m.start = (0, 1)
+            m.grid[0][1] = 0
+        with stage("maze_solve"):
+            distances, parents = cell_distances(m.grid, (1, 1))
+            # the solution of a cell contains the cells and the passages between them
+            lengths = np.where(distances >= 0, 2*distances + 1, -1)
+            candidates = np.argwhere((lengths >= length_min) & (lengths <= length_max))
+
+    # keep the default exit site if it has a valid solution length
+    default_exit = (height*2 - 1, width*2 - 1)
+    if length_min <= lengths[default_exit] <= length_max:
+        exit_cell = default_exit
+        m.end = (height*2, width*2 - 1)
+        m.grid[height*2][width*2 - 1] = 0
+    else:
+        exit_cell = tuple(int(x) for x in candidates[np.random.randint(len(candidates))])
+        m.end = exit_cell
+    m.solutions = [solution_path(parents, exit_cell)]
+    return m
+
+# cell numbers of the cells on the solution path, skipping the passages between them
+def solution_cells(maze, width):
+    return [ int((i-1)/2)*width + int((j-1)/2) for i, j in maze.solutions[0][::2] ]
+
+# write grid and solution to the binary maze file read by array_to_code.py
+def store_maze_data(maze, label, width, height):
+    maze_format.store_maze_data(maze.grid, solution_cells(maze, width), label, width, height)
+
+# write grid to a text file, one row of '0' and '1' characters per line
 def store_maze(maze, label):
-    np.set_printoptions(threshold=sys.maxsize, linewidth=310)
-    with open(label + ".txt", 'w') as f:
-        print(maze.grid, file = f)
+    rows = np.asarray(maze.grid, dtype=np.uint8) + ord('0')
+    newlines = np.full((rows.shape[0], 1), ord('\n'), dtype=np.uint8)
+    with open(label + ".txt", 'wb') as f:
+        f.write(np.hstack([rows, newlines]).tobytes())
 
-# print solution path to a file
+# print solution path to a text file
 def store_solution(maze, label, width, height):
-    f = open(label + "_solution.txt", 'w')
-    xy_to_num = dict()
-    lis = list(range(width*height))
-    for i in range(width*height):
-        xy_to_num[(i // width, i % width)] = lis[i]
-    for idx in range(len(maze.solutions[0])):
-        if idx % 2 == 0:
-            i = maze.solutions[0][idx][0]
-            j = maze.solutions[0][idx][1]
-            x = int((i-1)/2)
-            y = int((j-1)/2)
-            print(xy_to_num[(x, y)], file = f)
-    f.close()
+    with open(label + "_solution.txt", 'w') as f:
+        f.writelines(f"{cell}\n" for cell in solution_cells(maze, width))
 
 # generate a simple image of the maze
-def show_png(maze, label):
+def show_png(maze, label, width, height):
     plt.figure(figsize=(width/10, height/10))
     plt.imshow(maze.grid, cmap=plt.cm.binary, interpolation='nearest')
     plt.xticks([]), plt.yticks([])
     plt.subplots_adjust(top = 1, bottom = 0, right = 1, left = 0, hspace = 0, wspace = 0)
     plt.margins(0,0)
     plt.savefig(label)
+    plt.close()
 
-def main(algorithm, width, height, seed, maze_exit, index):
+def main(algorithm, width, height, seed, maze_exit, index, text_export):
     maze = generate_maze(algorithm, width, height, seed, maze_exit)
     label = algorithm + "_" + str(width) + "x" + str(height) + "_" + str(seed) + "_" + index
-    store_maze(maze, label)
-    store_solution(maze, label, width, height)
-    show_png(maze, label)
+    store_maze_data(maze, label, width, height)
+    if text_export:
+        store_maze(maze, label)
+        store_solution(maze, label, width, height)
+    show_png(maze, label, width, height)
 
 if __name__ == '__main__':
     algorithm = sys.argv[1]
@@ -99,4 +178,6 @@ if __name__ == '__main__':
     seed = sys.argv[4]
     maze_exit = sys.argv[5]
     index = sys.argv[6]
-    main(algorithm, width, height, seed, maze_exit, index)
+    # the txt and sln files are optional human-readable exports of the maze file
+    text_export = len(sys.argv) < 8 or sys.argv[7] != "no-text-export"
+    main(algorithm, width, height, seed, maze_exit, index, text_export)
@@ -0,0 +1,182 @@
+import numpy as np
+from mazelib.generate.MazeGenAlgo import MazeGenAlgo
+
+# amount of random numbers drawn at once by the random walks
+RANDOM_BATCH = 4096
+
+class ArrayMazeGenAlgo(MazeGenAlgo):
+    """Base class of the array based maze generators.
+
+    In contrast to mazelib's generators, which carve the maze inside of the grid, the
+    cells are numbered row by row and the algorithms work on flat arrays of these cell
+    numbers. The passages between the cells are collected as pairs of cells and the
+    grid is only created at the end. All random numbers are drawn from the global numpy
+    random state, which is seeded by mazelib's Maze.
+    """
+
+    def __init__(self, h, w):
+        super().__init__(h, w)
+        cells = np.arange(h * w)
+        rows, cols = cells // w, cells % w
+        # neighbors of every cell (north, south, west, east), -1 if there is none
+        self.neighbors = np.stack(
+            [ np.where(rows > 0, cells - w, -1)
+            , np.where(rows < h - 1, cells + w, -1)
+            , np.where(cols > 0, cells - 1, -1)
+            , np.where(cols < w - 1, cells + 1, -1)
+            ], axis=1)
+        self.adjacent = [ [ n for n in ns if n >= 0 ] for ns in self.neighbors.tolist() ]
+
+    def _grid(self, first, second):
+        """Returns the grid of a maze with a passage between each pair of cells."""
+        grid = np.ones((self.H, self.W), dtype=np.int8)
+        grid[1:-1:2, 1:-1:2] = 0
+        first, second = np.asarray(first, dtype=int), np.asarray(second, dtype=int)
+        grid[first // self.w + second // self.w + 1, first % self.w + second % self.w + 1] = 0
+        return grid
+
+class ArrayBacktracking(ArrayMazeGenAlgo):
+    """Randomized depth-first search with an explicit stack of cells."""
+
+    def generate(self):
+        adjacent = self.adjacent
+        visited = [False] * (self.h * self.w)
+        # every visited cell but the first consumes exactly one random number
+        draws = np.random.random(self.h * self.w).tolist()
+
+        start = np.random.randint(self.h * self.w)
+        visited[start] = True
+        stack = [start]
+        first, second = [], []
+        while stack:
+            cell = stack[-1]
+            options = [ n for n in adjacent[cell] if not visited[n] ]
+            if not options:
+                stack.pop()
+                continue
+            nxt = options[int(draws[len(first)] * len(options))]
+            visited[nxt] = True
+            first.append(cell)
+            second.append(nxt)
+            stack.append(nxt)
+        return self._grid(first, second)
+
+class ArrayKruskal(ArrayMazeGenAlgo):
+    """Randomized Kruskal with a union-find array over the cells."""
+
+    def generate(self):
+        cells = np.arange(self.h * self.w).reshape(self.h, self.w)
+        # all walls between vertically and horizontally adjacent cells in random order
+        first = np.concatenate([cells[:-1, :].ravel(), cells[:, :-1].ravel()])
+        second = np.concatenate([cells[1:, :].ravel(), cells[:, 1:].ravel()])
+        order = np.random.permutation(len(first))
+
+        parent = list(range(self.h * self.w))
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        passages = []
+        for edge, a, b in zip(order.tolist(), first[order].tolist(), second[order].tolist()):
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[root_a] = root_b
+                passages.append(edge)
+                if len(passages) == self.h * self.w - 1:
+                    break
+        return self._grid(first[passages], second[passages])
+
+class ArrayPrims(ArrayMazeGenAlgo):
+    """Randomized Prim with a frontier array of the unvisited neighbors of the maze."""
+
+    def generate(self):
+        adjacent = self.adjacent
+        visited = [False] * (self.h * self.w)
+        in_frontier = [False] * (self.h * self.w)
+        # every visited cell but the first consumes exactly two random numbers
+        draws = np.random.random(2 * self.h * self.w).tolist()
+
+        start = np.random.randint(self.h * self.w)
+        visited[start] = True
+        frontier = list(adjacent[start])
+        for cell in frontier:
+            in_frontier[cell] = True
+
+        first, second = [], []
+        while frontier:
+            # remove a random cell from the frontier by swapping it with the last one
+            index = int(draws[2 * len(first)] * len(frontier))
+            cell = frontier[index]
+            frontier[index] = frontier[-1]
+            frontier.pop()
+            visited[cell] = True
+
+            # connect it to a random visited neighbor
+            options = [ n for n in adjacent[cell] if visited[n] ]
+            first.append(options[int(draws[2 * len(first) + 1] * len(options))])
+            second.append(cell)
+
+            for n in adjacent[cell]:
+                if not visited[n] and not in_frontier[n]:
+                    in_frontier[n] = True
+                    frontier.append(n)
+        return self._grid(first, second)
+
+class ArrayWilsons(ArrayMazeGenAlgo):
+    """Wilson's algorithm with loop-erased random walks stored as successor array."""
+
+    def generate(self):
+        adjacent = self.adjacent
+        visited = [False] * (self.h * self.w)
+        successor = [-1] * (self.h * self.w)
+        draws, index = [], 0
+
+        visited[np.random.randint(self.h * self.w)] = True
+        first, second = [], []
+        for start in np.random.permutation(self.h * self.w).tolist():
+            # random walk until the maze is hit, revisiting a cell overwrites its successor
+            cell = start
+            while not visited[cell]:
+                if index == len(draws):
+                    draws, index = np.random.random(RANDOM_BATCH).tolist(), 0
+                options = adjacent[cell]
+                successor[cell] = options[int(draws[index] * len(options))]
+                index += 1
+                cell = successor[cell]
+
+            # add the loop-erased walk to the maze
+            cell = start
+            while not visited[cell]:
+                visited[cell] = True
+                first.append(cell)
+                second.append(successor[cell])
+                cell = successor[cell]
+        return self._grid(first, second)
+
+class ArraySidewinder(ArrayMazeGenAlgo):
+    """Sidewinder where the runs of all rows are determined at once."""
+
+    def __init__(self, h, w, skew=0.5):
+        super().__init__(h, w)
+        self.skew = skew
+
+    def generate(self):
+        grid = np.ones((self.H, self.W), dtype=np.int8)
+        grid[1:-1:2, 1:-1:2] = 0
+        # the first row is always empty, because you can't carve north
+        grid[1, 1:-1] = 0
+
+        # carve east within the remaining rows, a run ends at the east wall of each row
+        carve_east = np.random.random((self.h - 1, self.w)) > self.skew
+        carve_east[:, -1] = False
+        rows, cols = np.nonzero(carve_east)
+        grid[2 * rows + 3, 2 * cols + 2] = 0
+
+        # carve north from a random cell of each run
+        ends = np.flatnonzero(~carve_east.ravel())
+        starts = np.concatenate([[0], ends[:-1] + 1])
+        north = starts + (np.random.random(len(ends)) * (ends - starts + 1)).astype(int)
+        grid[2 * (north // self.w) + 2, 2 * (north % self.w) + 1] = 0
+        return grid
@@ -1,32 +1,35 @@
-import sys, os, shutil, re
+import sys, os, re
 import random
+from collections import deque
 import importlib
 from textwrap import dedent
-from collections import defaultdict
+import numpy as np
+from stage_timer import stage
+import maze_format
 
-def get_maze(maze_file):
-    """Parses a generated maze and returns it in a 2-dimensional matrix.
+def get_maze_data(maze_file):
+    """Loads a generated maze and its solution from the binary maze file.
+
+    The maze file (see maze_format.py) is memory-mapped, i.e. the returned grid is a
+    read-only view into the file, with 0 and 1 entries representing paths and walls in the
+    maze respectively. The solution is returned as list of cells like in 'get_solution'.
+    """
+
+    grid, sln = maze_format.load_maze_data(maze_file)
+    return grid, sln.tolist()
+
+def get_maze(maze_file, width, height):
+    """Parses the human-readable export of a generated maze and returns it in a 2-dimensional matrix.
 
     The maze is passed as a .txt file containing a matrix with '0' and '1' character entries,
-    representing paths and walls in the maze respectively.
+    representing paths and walls in the maze respectively. Any other characters, like the
+    brackets of previously printed NumPy arrays, are ignored.
     """
 
-    f = open(maze_file + ".txt", "r+")
-    txt = f.read().replace(' ', '').replace('[', '').replace(']', '')
-    f.seek(0)
-    f.write(txt)
-    f.truncate()
-    f.seek(0)
-    matrix = []
-    for i in range(height*2+1):
-        row = []
-        for j in range(width*2+2):
-            c = f.read(1)
-            if (c == '1' or c == '0'):
-                row.append(c)
-        matrix.append(row)
-    f.close()
-    return matrix
+    with open(maze_file + ".txt", "r") as f:
+        txt = re.sub("[^01]", "", f.read())
+    row_length = width*2 + 1
+    return [ [ int(c) for c in txt[i*row_length:(i+1)*row_length] ] for i in range(height*2+1) ]
 
 def get_solution(maze_file):
     """Parses a file containing solution for a given maze file.
@@ -68,70 +71,141 @@ def get_functions(width, height, maze_exit):
         xy_to_func[(height, width-1)] = 'bug'
     return xy_to_func
 
-# Label each node by depth first search
+# Directed graph of the maze cells in compressed sparse row (CSR) form
 class DirGraph:
-    def __init__(self):
-        self.graph = defaultdict(list)
+    def __init__(self, size):
+        self.size = size
+        # nodes that are not cells ('start' and 'bug') are numbered after the cells
+        self.names = []
+        # edges in the order in which they were added
+        self.sources = []
+        self.targets = []
+        self._csr = None
+        self._adjacency = None
+
+    def node_id(self, node):
+        """Returns the number of a node, cells are numbered by their integer.
+        """
+
+        if isinstance(node, int):
+            return node
+        if node not in self.names:
+            self.names.append(node)
+        return self.size + self.names.index(node)
+
+    def node_count(self):
+        return self.size + len(self.names)
 
     def add_edge(self, node, neighbour):
         """Adds an edge between node and neighbour to the graph.
         """
 
-        self.graph[node].append(neighbour)
+        self.sources.append(self.node_id(node))
+        self.targets.append(self.node_id(neighbour))
+        self._csr = self._adjacency = None
+
+    def add_edges(self, sources, targets):
+        """Adds an edge between each pair of node numbers (see "node_id") to the graph.
+        """
+
+        self.sources.extend(np.asarray(sources).tolist())
+        self.targets.extend(np.asarray(targets).tolist())
+        self._csr = self._adjacency = None
+
+    def csr(self):
+        """Returns the row pointers and column indices of the graph's adjacency matrix.
+
+        The neighbours of node i are indices[indptr[i]:indptr[i+1]] in the order in which
+        the edges were added.
+        """
+
+        if self._csr is None:
+            sources = np.asarray(self.sources, dtype=np.int64)
+            order = np.argsort(sources, kind="stable")
+            indptr = np.zeros(self.node_count() + 1, dtype=np.int64)
+            np.cumsum(np.bincount(sources, minlength=self.node_count()), out=indptr[1:])
+            self._csr = indptr, np.asarray(self.targets, dtype=np.int64)[order]
+        return self._csr
+
+    @property
+    def graph(self):
+        """Returns the list of neighbours of every node, nodes that are not cells are given by name.
+        """
 
+        if self._adjacency is None:
+            indptr, indices = self.csr()
+            names = list(range(self.size)) + self.names
+            targets = [ names[t] for t in indices.tolist() ]
+            bounds = indptr.tolist()
+            self._adjacency = [ targets[bounds[i]:bounds[i+1]] for i in range(self.node_count()) ]
+        return self._adjacency
 
     def count_edges(self):
         """Returns the total number of edges in the graph.
         """
 
-        count = 0
-        for idx in range(width*height):
-            count = count + len(self.graph[idx])
-        return count
+        return len(self.targets)
+
+    def backedges(self, labels):
+        """Returns the positions of the back edges inside of the CSR column indices.
+
+        Specifically these are the edges where the source node was discovered later than the sink node.
+        """
+
+        indptr, indices = self.csr()
+        sources = np.repeat(np.arange(self.node_count()), np.diff(indptr))
+        return np.flatnonzero(labels[sources] >= labels[indices])
 
     def count_backedges(self, labels):
         """Returns the number of total back edges in the graph
-
-        Specifically it counts the edges where the source node was discovered later than the sink node.
         """
 
-        count = 0
-        for idx in range(width*height):
-            for neighbour in self.graph[idx]:
-                if labels[idx] >= labels[neighbour]:
-                    count = count + 1
-        return count
+        return len(self.backedges(labels))
 
     def remove_backedges(self, labels, n, seed):
         """
         Removes exactly "n" backedges from the graph which are selected using the random "seed".
         """
 
+        backedges = self.backedges(labels)
         random.seed(seed)
-        while n > 0:
-            idx = random.randrange(0, width*height)
-            for neighbour in self.graph[idx]:
-                if labels[idx] >= labels[neighbour]:
-                    self.graph[idx].remove(neighbour)
-                    n = n -1
-
-    def df_search_helper(self, node, visited, labels):
-        visited.add(node)
-        labels[node] = len(visited)
-        for neighbour in self.graph[node]:
-            if neighbour not in visited:
-                self.df_search_helper(neighbour, visited, labels)
-        return labels
+        removed = random.sample(backedges.tolist(), n)
+
+        indptr, indices = self.csr()
+        keep = np.ones(len(indices), dtype=bool)
+        keep[removed] = False
+        sources = np.repeat(np.arange(self.node_count()), np.diff(indptr))
+        self.sources, self.targets = sources[keep].tolist(), indices[keep].tolist()
+        self._csr = self._adjacency = None
 
     def df_search(self, node):
-        """Returns a dictionary of nodes and their respective labels.
+        """Returns an array of the nodes' labels.
 
-        A node's label corresponds to when it was discovered during the dfs traversal.
+        A node's label corresponds to when it was discovered during the dfs traversal,
+        nodes which are not reachable have the label 0. The traversal uses an explicit
+        stack, i.e. it is not limited by the recursion limit for large mazes.
         """
 
-        visited = set()
-        labels = dict()
-        return self.df_search_helper(node, visited, labels)
+        indptr, indices = self.csr()
+        indptr, indices = indptr.tolist(), indices.tolist()
+        # position of the next edge to follow for every node
+        next_edge = indptr[:-1]
+        node = self.node_id(node)
+        labels = [0] * self.node_count()
+        labels[node] = discovered = 1
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if next_edge[current] == indptr[current + 1]:
+                stack.pop()
+                continue
+            neighbour = indices[next_edge[current]]
+            next_edge[current] += 1
+            if labels[neighbour] == 0:
+                discovered += 1
+                labels[neighbour] = discovered
+                stack.append(neighbour)
+        return np.array(labels)
 
 def generate_graph(width, height, maze_exit, maze_functions, matrix):
     """
@@ -143,22 +217,26 @@ def generate_graph(width, height, maze_exit, maze_functions, matrix):
     The graph nodes are indexed based on the "maze_functions" dictionary.
     """
 
-    graph = DirGraph()
-    functions = list(range(width*height))
-    for idx in range(width*height):
-        x, y = functions[idx] // width, functions[idx] % width
-        node = maze_functions[(x, y)]
-        if node == maze_exit and node != width*height - 1:
-            graph.add_edge(node, 'bug')
-        i, j = 2*x + 1, 2*y + 1
-        if matrix[i-1][j] == '0':
-            graph.add_edge(node, maze_functions[(x-1, y)])
-        if matrix[i][j-1] == '0':
-            graph.add_edge(node, maze_functions[(x, y-1)])
-        if matrix[i+1][j] == '0':
-            graph.add_edge(node, maze_functions[(x+1, y)])
-        if matrix[i][j+1] == '0':
-            graph.add_edge(node, maze_functions[(x, y+1)])
+    graph = DirGraph(width*height)
+    passages = np.asarray(matrix) == 0
+    # neighbours of every cell in the order of its edges: bug, north, west, south and east
+    neighbours = np.full((height, width, 5), -1, dtype=np.int64)
+    if maze_exit != width*height - 1:
+        neighbours[maze_exit // width, maze_exit % width, 0] = graph.node_id('bug')
+    for k, (dx, dy) in enumerate([(-1, 0), (0, -1), (1, 0), (0, 1)], start=1):
+        # passages from each cell (2x+1, 2y+1) in the direction (dx, dy)
+        x, y = np.nonzero(passages[1+dx:2*height+1+dx:2, 1+dy:2*width+1+dy:2])
+        nx, ny = x + dx, y + dy
+        inside = (nx >= 0) & (nx < height) & (ny >= 0) & (ny < width)
+        neighbours[x[inside], y[inside], k] = \
+            [ maze_functions[(i, j)] for i, j in zip(nx[inside].tolist(), ny[inside].tolist()) ]
+        # passages leaving the maze lead to the start or bug
+        for i, j in zip(nx[~inside].tolist(), ny[~inside].tolist()):
+            neighbours[i-dx, j-dy, k] = graph.node_id(maze_functions[(i, j)])
+
+    nodes = np.array([ maze_functions[(x, y)] for x in range(height) for y in range(width) ])
+    has_edge = neighbours.reshape(width*height, 5) >= 0
+    graph.add_edges(np.repeat(nodes, has_edge.sum(axis=1)), neighbours.reshape(width*height, 5)[has_edge])
     return graph
 
 def remove_cycle(graph, cycle, seed):
@@ -172,138 +250,451 @@ def remove_cycle(graph, cycle, seed):
     numb_to_remove = int(numb_backedges*proportion_rm)
     graph.remove_backedges(graph_labels, numb_to_remove, seed)
 
-def render_program_solidity(sol_file, foundry_file, transaction_file, maze, width, height, generator, sln, equality, smt_file):
+def render_program_solidity(sol_file, foundry_file, transaction_file, maze, width, height, generator, sln, equality, smt_file,
+        dispatch="linear", input_location="memory", emission="cells", shard_size=0):
     """Writes a solidity program to "sol_file" containing functions according to the passed "maze"
     where the conditionals in the functions are chosen based on the passed "generator"
 
+    The "dispatch" selects how the step function finds the function of the current cell, the
+    "input_location" where the cell functions read their input from, the "emission" if the
+    cells share their functions and the "shard_size" if the cells are distributed over several
+    contracts (see "render_contract").
     """
 
-    generator = generator.Generator(width*height, maze.graph, sln, equality, smt_file)
-    logic_sol = generator.get_logic_sol()
-    guard = generator.get_guard()
-    step_transaction_values = generator.get_solution_values()
+    with stage("guard_generation"):
+        generator = generator.Generator(width*height, maze.graph, sln, equality, smt_file)
+        logic_sol = generator.get_logic_sol()
+        guard = generator.get_guard()
+        step_transaction_values = generator.get_solution_values()
 
-    with open(transaction_file, 'w') as fp:
-        fp.write("\n".join(step_transaction_values))
-
-    f = open(sol_file, 'w')
-
-    f.writelines(["pragma solidity 0.8.26;\n", "contract Maze { \n"])
+    with stage("render_solidity"):
+        write_program_solidity(sol_file, foundry_file, transaction_file, maze, width, height,
+            logic_sol, guard, step_transaction_values, dispatch, input_location, emission, shard_size)
 
-    f.write("\tbool public bug = false;\n")
-    f.write("\tbool private stop = false;\n")
+# templates of the generated contract, the cell functions are filled in by "render_contract"
+SOLIDITY_PRAGMA = "pragma solidity 0.8.26;\n"
 
+CONTRACT_BEGIN = (
+    "contract Maze { \n"
+    "\tbool public bug = false;\n"
+    "\tbool private stop = false;\n"
     # states whether the function with the corresponding integer may be entered
     # -2 for start and -1 for bug
-    f.write("\tint64 next_cell = 0;\n")
+    "\tint64 next_cell = 0;\n")
+
+# the functions of the start and bug nodes, formatted with the data location of the input
+SPECIAL_FUNCTIONS = (
+    "\tfunction func_start(int8[] {location} inp) internal {{}}\n"
+    "\tfunction func_bug(int8[] {location} inp) internal {{\n\t\tbug = true;\n\t\treturn;\n\t}}\n")
+
+STEP_BEGIN = (
+    # outer function responsible for rerouting the caller to the currently visited cell
+    "\tfunction step(int8[] calldata inp) external {\n\n"
+    # only take a step if we can move (!stop) and no bug is found (!bug).
+    '\t\trequire(!stop && !bug, "unable to take any further steps");\n\n')
+
+# supported dispatches of the step function to the function of the current cell
+DISPATCH_MODES = ["linear", "binary"]
+
+# supported data locations of the input array of the cell functions, with "calldata" the
+# input of step is passed on without copying it into memory
+INPUT_LOCATIONS = ["memory", "calldata"]
+
+# supported emissions of the cells, either a function per cell or routines shared by all
+# cells with the same guards (see "render_shared_contract")
+EMISSION_MODES = ["cells", "shared"]
+
+# directions of the edges in the cell table of the shared emission, 0 marks an unused edge
+DIRECTIONS = ["none", "north", "west", "south", "east", "bug", "start"]
+
+# the step function of a shard calls the function of a cell and returns its transition
+SHARD_STEP_BEGIN = "\tfunction step(int8[] calldata inp, int64 cell) external pure returns (int64, bool) {\n"
+
+SHARD_STEP_END = "\t\treturn (cell, false);\n\t}\n}\n"
+
+# the shards are predeployed at consecutive addresses from this one on, such that the Maze contract
+# keeps a constructor without arguments, which all fuzzers can deploy. The runner scripts in
+# dockers and the reachability test (see olympia/utils/evm_executor.py) deploy the shards there.
+SHARD_ADDRESS_BASE = 0x5a000000
+
+FUNCTION_END = "\t\telse {\n\t\t\tstop = true;\n\t\t}"
+
+# the step functions of the shared and sharded emission look up the current cell in a table
+TABLE_STEP_BEGIN = (
+    "\t\tif (next_cell == -2) {\n\t\t\tfunc_start(inp);\n\t\t\treturn;\n\t\t}\n"
+    "\t\tif (next_cell == -1) {\n\t\t\tfunc_bug(inp);\n\t\t\treturn;\n\t\t}\n")
+
+# the step function of the shared emission looks up the routine and edges of the current cell,
+# the word of the cell table holding the cell is selected in between both parts
+SHARED_STEP_BEGIN = TABLE_STEP_BEGIN + "\t\tuint256 offset = uint256(int256(next_cell)) * 4;\n"
+
+SHARED_STEP_LOOKUP = (
+    "\t\tuint256 entry = uint256(word >> (8 * (28 - offset % 32))) & 0xffffffff;\n"
+    "\t\tuint256 routine = entry >> 16;\n"
+    "\t\tuint256 directions = entry & 0xffff;\n"
+    "\t\tuint256 edge = NO_EDGE;\n")
+
+SHARED_STEP_END = (
+    "\t\tif (edge == NO_EDGE) {{\n\t\t\treturn;\n\t\t}}\n"
+    "\t\tuint256 direction = (directions >> (3 * edge)) & 7;\n"
+    "\t\tif (direction == 1) {{\n\t\t\tnext_cell -= {width};\n\t\t}}\n"
+    "\t\telse if (direction == 2) {{\n\t\t\tnext_cell -= 1;\n\t\t}}\n"
+    "\t\telse if (direction == 3) {{\n\t\t\tnext_cell += {width};\n\t\t}}\n"
+    "\t\telse if (direction == 4) {{\n\t\t\tnext_cell += 1;\n\t\t}}\n"
+    "\t\telse if (direction == 5) {{\n\t\t\tnext_cell = -1;\n\t\t}}\n"
+    "\t\telse {{\n\t\t\tnext_cell = -2;\n\t\t}}\n"
+    "\t}}\n")
+
+SOLIDITY_END = "\tfunction echidna_noBug() external returns (bool) {return !bug;}\n}\n"
+
+FOUNDRY_END = dedent(
+    """\
+    }
+    import "forge-std/Test.sol";
+    contract TestMaze is Test {
+        Maze m;
+        function setUp() external {
+            m = new Maze();
+        }
+        function invariant_no_bug() external {
+            if (m.bug()) { fail(); }
+        }
+    }""")
+
+# the foundry test of a sharded contract deploys the shards from their artifacts at their
+# addresses, such that neither the test nor the Maze contract contain the creation code of the shards
+SHARDED_FOUNDRY_END = dedent(
+    """\
+    }}
+    import "forge-std/Test.sol";
+    contract TestMaze is Test {{
+        Maze m;
+        function setUp() external {{
+    {deployments}
+            m = new Maze();
+        }}
+        function invariant_no_bug() external {{
+            if (m.bug()) {{ fail(); }}
+        }}
+    }}""")
+
+def get_args_to_fuzz(func_inputs):
+    """Returns the minimal length of the input array of a cell, i.e. one more than the
+    largest input index used by the cell.
+    """
 
-    f.write("\tfunction func_start(int8[] memory inp) internal {}\n")
-    f.write("\tfunction func_bug(int8[] memory inp) internal {\n\t\tbug = true;\n\t\treturn;\n\t}\n")
+    args_to_fuzz = 1
+    for func_inp in func_inputs:
+        args_to_fuzz = max(args_to_fuzz, int(re.findall(r'\d+', func_inp)[-1]) + 1)
+    return args_to_fuzz
+
+def get_guard_condition(guard_cond):
+    # replace 1 and 0 as if conditions as they are not valid in solidity
+    if guard_cond == 1:
+        return "true"
+    elif guard_cond == 0:
+        return "false"
+    return guard_cond
+
+def render_cell_function(parts, idx, neighbours, func_inputs, buggy_constraints, guard, input_location="memory", shard=False):
+    """Appends the solidity function of a single cell to "parts", which checks the guard of
+    each outgoing edge and sets "next_cell" to the neighbour of the first satisfied guard.
+
+    Inside of a "shard", "next_cell" and "stop" are the return values of the function instead
+    of the state of the contract.
+    """
 
-    function_begin_format = """\tfunction func_{}(int8[] memory inp) internal {{\n\tunchecked{{\n\t\trequire(inp.length >= {});\n{}"""
+    args_to_fuzz = get_args_to_fuzz(func_inputs)
+    if shard:
+        parts.append(f"\tfunction func_{idx}(int8[] {input_location} inp) internal pure returns (int64 next_cell, bool stop) {{\n\t\tnext_cell = {idx};\n")
+    else:
+        parts.append(f"\tfunction func_{idx}(int8[] {input_location} inp) internal {{\n")
+    parts.append(f"\tunchecked{{\n\t\trequire(inp.length >= {args_to_fuzz});\n{buggy_constraints}")
+    keyword = "if"
+    for guard_cond, neighbour in zip(guard, neighbours):
+        guard_cond = get_guard_condition(guard_cond)
+        nb_int = neighbour if type(neighbour) == int else -1 if neighbour == "bug" else -2
+        parts.append(f"\t\t{keyword} ({guard_cond}) {{\n\t\t\tnext_cell = {nb_int};\n\t\t}}\n")
+        keyword = "else if"
+    if neighbours:
+        parts.append(FUNCTION_END) # add an else at the end of all possible paths
+    parts.append("\n\t}\n\t}\n")
+
+def render_linear_dispatch(parts, cells):
+    """Appends a chain of "if" statements to "parts", which compares "next_cell" to every cell in turn.
+    """
+
+    parts.append("\t\tif (next_cell == -2) {\n\t\t\tfunc_start(inp);\n\t\t\treturn;\n\t\t}\n")
+    parts.append("\t\tif (next_cell == -1) {\n\t\t\tfunc_bug(inp);\n\t\t\treturn;\n\t\t}\n")
+    parts.extend(f"\t\tif (next_cell == {idx}) {{\n\t\t\tfunc_{idx}(inp);\n\t\t\treturn;\n\t\t}}\n"
+        for idx in range(cells))
+
+def render_binary_dispatch(parts, cells):
+    """Appends a balanced binary search on "next_cell" to "parts", i.e. a step needs a logarithmic
+    instead of a linear amount of comparisons. Every leaf still checks "next_cell" for equality,
+    such that no function is called for values without a cell, like in the linear dispatch.
+    """
+
+    # the start and bug functions are represented by their "next_cell" values
+    names = ["start", "bug"] + list(range(cells))
+    render_binary_search(parts, "next_cell", list(range(-2, cells)), lambda value: f"func_{names[value + 2]}(inp);")
+
+def render_binary_search(parts, variable, values, statement, indent="\t\t"):
+    """Appends a balanced binary search for the value of "variable" among the sorted "values"
+    to "parts", where the leaf of each value executes the solidity "statement(value)".
+    """
+
+    if len(values) == 1:
+        parts.append(f"{indent}if ({variable} == {values[0]}) {{\n{indent}\t{statement(values[0])}\n{indent}}}\n")
+        return
+    mid = len(values) // 2
+    parts.append(f"{indent}if ({variable} < {values[mid]}) {{\n")
+    render_binary_search(parts, variable, values[:mid], statement, indent + "\t")
+    parts.append(f"{indent}}} else {{\n")
+    render_binary_search(parts, variable, values[mid:], statement, indent + "\t")
+    parts.append(f"{indent}}}\n")
+
+def render_table_constants(parts, name, table):
+    """Appends the bytes of "table" as "bytes32" constants "<name>_<index>" to "parts" and returns
+    the amount of constants. In contrast to a "bytes" constant, reading a constant does not copy
+    the whole table into memory on every lookup.
+    """
+
+    # the last word is padded with zeros
+    table = bytes(table) + bytes(-len(table) % 32)
+    words = [ table[start:start+32] for start in range(0, len(table), 32) ]
+    parts.extend(f"\tbytes32 constant {name}_{index} = 0x{word.hex()};\n" for index, word in enumerate(words))
+    return len(words)
+
+def render_table_lookup(parts, name, words, offset):
+    """Appends the lookup of the constant of the table "name" holding the byte at "offset" to
+    "parts", which is selected by a binary search over the "words" constants into "word".
+    """
 
-    function_format = """\t\t{} ({}) {{
-\t\t\tnext_cell = {};
-\t\t}}
-"""
+    parts.append(f"\t\tuint256 word_index = {offset} / 32;\n\t\tbytes32 word;\n")
+    render_binary_search(parts, "word_index", list(range(words)), lambda index: f"word = {name}_{index};")
 
-    else_stop = "\t\telse {\n\t\t\tstop = true;\n\t\t}"
+def get_edge_direction(idx, neighbour, width):
+    """Returns the index in "DIRECTIONS" of the edge from cell "idx" to "neighbour"."""
 
-    function_enter_condition_format = """\t\tif (next_cell == {}) {{\n\t\t\tfunc_{}(inp);\n\t\t\treturn;\n\t\t}}\n"""
-    function_enter_conditions = []
+    if neighbour == "bug":
+        return DIRECTIONS.index("bug")
+    if neighbour == "start":
+        return DIRECTIONS.index("start")
+    offsets = { -width: "north", -1: "west", width: "south", 1: "east" }
+    assert neighbour - idx in offsets, f"cell {neighbour} is not adjacent to cell {idx}"
+    return DIRECTIONS.index(offsets[neighbour - idx])
 
+def render_guard_routine(parts, routine, guard, buggy_constraints, args_to_fuzz, input_location):
+    """Appends a guard routine of the shared emission to "parts", which returns the index of
+    the first satisfied guard or "NO_EDGE". Like the cell functions, the routine stops the maze
+    if the cell has edges, but none of their guards is satisfied.
+    """
+
+    parts.append(f"\tfunction guard_{routine}(int8[] {input_location} inp) internal returns (uint256) {{\n\tunchecked{{\n\t\trequire(inp.length >= {args_to_fuzz});\n{buggy_constraints}")
+    keyword = "if"
+    for edge, guard_cond in enumerate(guard):
+        parts.append(f"\t\t{keyword} ({get_guard_condition(guard_cond)}) {{\n\t\t\treturn {edge};\n\t\t}}\n")
+        keyword = "else if"
+    if guard:
+        parts.append(FUNCTION_END)
+    parts.append("\n\t\treturn NO_EDGE;\n\t}\n\t}\n")
+
+def render_shared_contract(maze, width, height, logic_sol, guard, dispatch, input_location):
+    """Returns the contract body of the shared emission (see "render_contract").
+
+    Instead of a function per cell, a guard routine is emitted per distinct combination of
+    guards, constraints and input length, which the default and equality methods share among
+    most cells. A table of 4 bytes per cell stores the routine of the cell and the direction
+    of each edge (3 bits per edge, see "DIRECTIONS"). The table is split into "bytes32" constants
+    of 8 cells each, a step selects the word of its cell by a binary search and shifts out the
+    4 bytes of the cell, i.e. the table is never copied into memory.
+    """
+
+    func_inputs = logic_sol["func_inputs"] or [[]] * (width*height)
+    routines = dict()
+    table = bytearray()
+    for idx in range(width*height):
+        neighbours = maze.graph[idx]
+        assert len(neighbours) <= 4, f"unexpected number of edges: {len(neighbours)}"
+        # guards without a neighbour are never rendered (see "render_cell_function")
+        key = (tuple(map(get_guard_condition, guard[idx][:len(neighbours)])),
+            logic_sol["buggy_constraints"][idx], get_args_to_fuzz(func_inputs[idx]))
+        routine = routines.setdefault(key, len(routines))
+        directions = 0
+        for edge, neighbour in enumerate(neighbours):
+            directions |= get_edge_direction(idx, neighbour, width) << (3 * edge)
+        table += routine.to_bytes(2, "big") + directions.to_bytes(2, "big")
+
+    parts = [SOLIDITY_PRAGMA, CONTRACT_BEGIN, SPECIAL_FUNCTIONS.format(location=input_location)]
+    parts.append("\tuint256 constant NO_EDGE = 4;\n")
+    # an entry never spans two constants, since 4 divides 32
+    words = render_table_constants(parts, "CELLS", table)
+    for (routine_guard, buggy_constraints, args_to_fuzz), routine in routines.items():
+        render_guard_routine(parts, routine, routine_guard, buggy_constraints, args_to_fuzz, input_location)
+    parts.append(STEP_BEGIN)
+    parts.append(SHARED_STEP_BEGIN)
+    render_table_lookup(parts, "CELLS", words, "offset")
+    parts.append(SHARED_STEP_LOOKUP)
+    if dispatch == "binary":
+        render_binary_search(parts, "routine", list(range(len(routines))), lambda value: f"edge = guard_{value}(inp);")
+    else:
+        parts.extend(f"\t\t{'if' if routine == 0 else 'else if'} (routine == {routine}) {{\n\t\t\tedge = guard_{routine}(inp);\n\t\t}}\n"
+            for routine in range(len(routines)))
+    parts.append(SHARED_STEP_END.format(width=width))
+    return "".join(parts)
+
+def partition_cells(maze, cells, shard_size):
+    """Partitions the cells into regions of at most "shard_size" cells, such that neighbouring
+    cells tend to be in the same region. The cells are ordered by a breadth-first search from
+    the first cell, followed by the unreachable cells, and split into consecutive regions.
+    Returns the sorted cells of each region.
+    """
+
+    order, visited = [], [False] * cells
+    queue = deque([0])
+    visited[0] = True
+    while queue:
+        idx = queue.popleft()
+        order.append(idx)
+        for neighbour in maze.graph[idx]:
+            if type(neighbour) == int and not visited[neighbour]:
+                visited[neighbour] = True
+                queue.append(neighbour)
+    order.extend(idx for idx in range(cells) if not visited[idx])
+    return [ sorted(order[start:start+shard_size]) for start in range(0, cells, shard_size) ]
+
+def shard_address(shard):
+    """Returns the address of the shard "shard" (see "SHARD_ADDRESS_BASE")."""
+    return SHARD_ADDRESS_BASE + shard
+
+def render_sharded_contract(maze, width, height, logic_sol, guard, dispatch, input_location, shard_size):
+    """Returns the contract body of the sharded emission (see "render_contract").
+
+    The cell functions are distributed over "MazeShard" contracts of at most "shard_size" cells
+    (see "partition_cells"). The shards are stateless, their step function returns the next cell
+    and the stop flag of the current cell, while the Maze contract keeps the state and looks up
+    the shard of the current cell in a table of one byte per cell.
+
+    The shards are deployed on their own at fixed addresses (see "SHARD_ADDRESS_BASE"), such that
+    neither the creation code nor the code of any contract contains another contract, i.e. every
+    contract stays below the size and initcode limits on its own.
+    """
+
+    regions = partition_cells(maze, width*height, shard_size)
+    assert len(regions) <= 256, f"too many shards {len(regions)}, increase the shard size"
+    func_inputs = logic_sol["func_inputs"] or [[]] * (width*height)
+    table = bytearray(width*height)
+    parts = [SOLIDITY_PRAGMA]
+    for shard, region in enumerate(regions):
+        parts.append(f"contract MazeShard{shard} {{\n")
+        for idx in region:
+            table[idx] = shard
+            render_cell_function(parts, idx, maze.graph[idx], func_inputs[idx],
+                logic_sol["buggy_constraints"][idx], guard[idx], input_location, shard=True)
+        parts.append(SHARD_STEP_BEGIN)
+        if dispatch == "binary":
+            render_binary_search(parts, "cell", region, lambda idx: f"return func_{idx}(inp);")
+        else:
+            parts.extend(f"\t\tif (cell == {idx}) {{\n\t\t\treturn func_{idx}(inp);\n\t\t}}\n" for idx in region)
+        parts.append(SHARD_STEP_END)
+
+    parts.append(CONTRACT_BEGIN)
+    parts.append(SPECIAL_FUNCTIONS.format(location=input_location))
+    words = render_table_constants(parts, "SHARDS", table)
+    parts.extend(f"\tMazeShard{shard} constant shard_{shard} = MazeShard{shard}(address(uint160({shard_address(shard):#x})));\n"
+        for shard in range(len(regions)))
+    parts.append(STEP_BEGIN)
+    parts.append(TABLE_STEP_BEGIN)
+    parts.append("\t\tuint256 offset = uint256(int256(next_cell));\n")
+    render_table_lookup(parts, "SHARDS", words, "offset")
+    parts.append("\t\tuint256 shard = uint8(word[offset % 32]);\n")
+    statement = lambda shard: f"(next_cell, stop) = shard_{shard}.step(inp, next_cell);"
+    if dispatch == "binary":
+        render_binary_search(parts, "shard", list(range(len(regions))), statement)
+    else:
+        parts.extend(f"\t\t{'if' if shard == 0 else 'else if'} (shard == {shard}) {{\n\t\t\t{statement(shard)}\n\t\t}}\n"
+            for shard in range(len(regions)))
+    parts.append("\t}\n")
+    return "".join(parts)
+
+def render_contract(maze, width, height, logic_sol, guard, dispatch="linear", input_location="memory", emission="cells", shard_size=0):
+    """Returns the body of the Maze contract without its closing brace, which is shared
+    by the solidity program and its foundry version.
+
+    The step function calls the function of the current cell either by comparing "next_cell"
+    with every cell in turn ("linear") or by a binary search ("binary"). The cell functions
+    either receive a copy of the input in memory or read it from calldata ("input_location"),
+    both variants accept the same transactions. With the "shared" emission, cells with the same
+    guards share a routine instead of having their own function (see "render_shared_contract").
+    A positive "shard_size" distributes the cell functions over several contracts, which are
+    declared in front of the Maze contract and deployed on their own (see "render_sharded_contract").
+    """
+
+    assert dispatch in DISPATCH_MODES, f"unsupported dispatch {dispatch}"
+    assert input_location in INPUT_LOCATIONS, f"unsupported input location {input_location}"
+    assert emission in EMISSION_MODES, f"unsupported emission {emission}"
+    assert shard_size == 0 or emission == "cells", "only the cell emission can be sharded"
+    if emission == "shared":
+        return render_shared_contract(maze, width, height, logic_sol, guard, dispatch, input_location)
+    if shard_size > 0:
+        return render_sharded_contract(maze, width, height, logic_sol, guard, dispatch, input_location, shard_size)
+    parts = [SOLIDITY_PRAGMA, CONTRACT_BEGIN, SPECIAL_FUNCTIONS.format(location=input_location)]
+    func_inputs = logic_sol["func_inputs"] or [[]] * (width*height)
     # each index represents a tile in the maze
     for idx in range(width*height):
-        args_to_fuzz = 1
-        if logic_sol["func_inputs"]:
-            if logic_sol["func_inputs"][idx]:
-                print(logic_sol["func_inputs"][idx])
-                for func_inp in logic_sol["func_inputs"][idx]:
-                    args_to_fuzz = max(args_to_fuzz, int(re.findall(r'\d+', func_inp)[-1]) + 1)
-        buggies = logic_sol["buggy_constraints"][idx]
-        func_begin = function_begin_format.format(idx, args_to_fuzz, buggies)
-        function_enter_conditions.append(function_enter_condition_format.format(idx, idx))
-        f.write(func_begin)
-        valid_edges = len(maze.graph[idx])
-        if valid_edges != 0:
-            edge_counter = 0
-            for neighbour in maze.graph[idx]:
-                # replace 1 and 0 as if conditions as they are not valid in solidity
-                guard_cond = guard[idx][edge_counter]
-                if guard_cond == 1:
-                    guard_cond = "true"
-                elif guard_cond == 0:
-                    guard_cond = "false"
-
-                nb_int = neighbour if type(neighbour) == int else -1 if neighbour == "bug" else -2
-
-                if edge_counter == 0:
-                    f.write(function_format.format(
-                        'if', guard_cond, nb_int))
-                else:
-                    f.write(function_format.format(
-                        'else if', guard_cond, nb_int))
-                edge_counter += 1
-            f.write(else_stop) # add an else at the end of all possible paths
-        f.write("\n\t}\n\t}\n")
+        render_cell_function(parts, idx, maze.graph[idx], func_inputs[idx],
+            logic_sol["buggy_constraints"][idx], guard[idx], input_location)
+    parts.append(STEP_BEGIN)
+    if dispatch == "binary":
+        render_binary_dispatch(parts, width*height)
+    else:
+        render_linear_dispatch(parts, width*height)
+    # close step function brace
+    parts.append("\t}\n")
+    return "".join(parts)
 
-    # outer function responsible for rerouting the caller to the currently visited cell
-    f.writelines(["\tfunction step(int8[] calldata inp) external {\n\n"])
+def render_foundry_end(cells, shard_size):
+    """Returns the end of the foundry version of a contract, i.e. its test contract. With sharding,
+    the test deploys the shards from their artifacts at their addresses. The artifacts are looked
+    up by the contract name only, since the runner renames the file (see dockers/foundry).
+    """
 
-    # only take a step if we can move (!stop) and no bug is found (!bug).
-    f.write('\t\trequire(!stop && !bug, "unable to take any further steps");\n\n')
+    if shard_size == 0:
+        return FOUNDRY_END
+    # the cells are split into consecutive regions of "shard_size" cells (see "partition_cells")
+    shards = -(-cells // shard_size)
+    deployments = "\n".join(f"        deployCodeTo(\"MazeShard{shard}\", address(uint160({shard_address(shard):#x})));"
+        for shard in range(shards))
+    return SHARDED_FOUNDRY_END.format(deployments=deployments)
 
-    f.write("""\t\tif (next_cell == -2) {\n\t\t\tfunc_start(inp);\n\t\t\treturn;\n\t\t}\n""")
+def write_program_solidity(sol_file, foundry_file, transaction_file, maze, width, height, logic_sol, guard, step_transaction_values,
+        dispatch="linear", input_location="memory", emission="cells", shard_size=0):
+    """Writes the solidity program, its foundry version and the transactions to reach the bug
+    using the constraints and guards of a generator (see "render_program_solidity").
 
-    f.write("\t\tif (next_cell == -1) {\n\t\t\tfunc_bug(inp);\n\t\t\treturn;\n\t\t}\n")
+    The contract is rendered once in memory and each file is written with a single write.
+    """
 
-    for enter_cond in function_enter_conditions:
-        f.write(enter_cond)
-    # close step function brace
-    f.write("\t}\n")
-    f.close()
-    shutil.copyfile(sol_file, foundry_file)
-    with open(sol_file, "a") as f:
-        f.writelines(["\tfunction echidna_noBug() external returns (bool) {", "return !bug;","}\n", "}\n"])
-    with open(foundry_file, 'a') as f:
-        f.write(dedent(
-        """\
-        }
-        import "forge-std/Test.sol";
-        contract TestMaze is Test {
-            Maze m;
-            function setUp() external {
-                m = new Maze();
-            }
-            function invariant_no_bug() external {
-                if (m.bug()) { fail(); }
-            }
-        }"""))
-
-
-def main(maze_file, width, height, cycle, seed, generator, equality, smt_file, CVE_name):
-    matrix = get_maze(maze_file)
-    sln = get_solution(maze_file)
-    maze_exit = get_exit(sln)
-    maze_funcs = get_functions(width, height, maze_exit)
-    graph = generate_graph(width, height, maze_exit, maze_funcs, matrix)
-    remove_cycle(graph, cycle, seed)
-    transaction_file = maze_file + "_" + str(cycle) + "percent_" + CVE_name + "_transactions.txt"
-    sol_file = maze_file + "_" + str(cycle) + "percent_" + CVE_name + ".sol"
-    foundry_file =  maze_file + "_" + str(cycle) + "percent_" + CVE_name + ".foundry.sol"
-    render_program_solidity(sol_file, foundry_file, transaction_file, graph, width, height, generator, sln, equality, smt_file)
+    contract = render_contract(maze, width, height, logic_sol, guard, dispatch, input_location, emission, shard_size)
+    with open(sol_file, 'w') as f:
+        f.write(contract + SOLIDITY_END)
+    with open(foundry_file, 'w') as f:
+        f.write(contract + render_foundry_end(width*height, shard_size))
+    with open(transaction_file, 'w') as fp:
+        fp.write("\n".join(step_transaction_values))
+
+
+def get_generator(generator_file, smt_file=""):
+    """Imports the branch condition generator named by "generator_file".
+
+    Returns the generator module together with the equality percentage encoded in the
+    name of equality generators and the name suffix used for the generated program files.
+    """
 
-if __name__ == '__main__':
-    maze_file = sys.argv[1]
-    width, height = int(sys.argv[2]), int(sys.argv[3])
-    cycle = int(sys.argv[4])
-    seed = int(sys.argv[5])
-    generator_file = sys.argv[6]
     equality = 0
-    smt_file = ""
     CVE_name = generator_file
     if "CVE" in generator_file:
-        smt_file = sys.argv[7]
         CVE_name = os.path.basename(smt_file)
         CVE_name = os.path.splitext(CVE_name)[0] + "_gen"
     if "equality" in generator_file:
@@ -312,5 +703,37 @@ if __name__ == '__main__':
         generator_file = "equality_gen"
 
     generator = importlib.import_module(generator_file)
+    return generator, equality, CVE_name
+
+def main(maze_file, width, height, cycle, seed, generator, equality, smt_file, CVE_name, dispatch, input_location, emission, shard_size):
+    matrix, sln = get_maze_data(maze_file)
+    maze_exit = get_exit(sln)
+    maze_funcs = get_functions(width, height, maze_exit)
+    graph = generate_graph(width, height, maze_exit, maze_funcs, matrix)
+    remove_cycle(graph, cycle, seed)
+    transaction_file = maze_file + "_" + str(cycle) + "percent_" + CVE_name + "_transactions.txt"
+    sol_file = maze_file + "_" + str(cycle) + "percent_" + CVE_name + ".sol"
+    foundry_file =  maze_file + "_" + str(cycle) + "percent_" + CVE_name + ".foundry.sol"
+    render_program_solidity(sol_file, foundry_file, transaction_file, graph, width, height, generator, sln, equality, smt_file,
+        dispatch, input_location, emission, shard_size)
+
+if __name__ == '__main__':
+    # emission options are passed as "--name=value" after the positional arguments
+    args = [ arg for arg in sys.argv if not arg.startswith("--") ]
+    options = dict(arg[2:].split("=", 1) for arg in sys.argv if arg.startswith("--"))
+    maze_file = args[1]
+    width, height = int(args[2]), int(args[3])
+    cycle = int(args[4])
+    seed = int(args[5])
+    generator_file = args[6]
+    smt_file = ""
+    if "CVE" in generator_file:
+        smt_file = args[7]
+    dispatch = options.get("dispatch", "linear")
+    input_location = options.get("input-location", "memory")
+    emission = options.get("emission", "cells")
+    shard_size = int(options.get("shard-size", 0))
+
+    generator, equality, CVE_name = get_generator(generator_file, smt_file)
 
-    main(maze_file, width, height, cycle, seed, generator, equality, smt_file, CVE_name)
+    main(maze_file, width, height, cycle, seed, generator, equality, smt_file, CVE_name, dispatch, input_location, emission, shard_size)
@@ -0,0 +1,111 @@
+import numpy as np
+from mazelib.solve.ShortestPath import ShortestPath
+
+class BFSShortestPath(ShortestPath):
+    """Array based replacement of mazelib's ShortestPath solver.
+
+    ShortestPath extends every partial solution by one cell per round and copies a partial
+    solution whenever it branches, checking each neighbor against the whole partial solution.
+    This solver explores the maze in exactly the same order, including the shuffled neighbor
+    order, but only keeps the last two cells of a partial solution and a link to its parent.
+    Since the neighbors are shuffled with the global numpy random state, which is also used by
+    the maze generators, the random state after solving is the same as with ShortestPath,
+    i.e. regenerated mazes and thereby existing seeds reproduce exactly.
+
+    The generated mazes are perfect, such that a cell is never visited twice by a partial
+    solution. Mazes with a start or end inside of the maze are solved by ShortestPath.
+    """
+
+    def solve(self, grid, start, end):
+        if not (self._is_edge(grid, start) and self._is_edge(grid, end)):
+            return super().solve(grid, start, end)
+
+        # passable neighbors of every position for each direction (up, down, left, right)
+        free = grid == 0
+        up, down, left, right = [ np.zeros(grid.shape, dtype=bool) for _ in range(4) ]
+        up[2:, :] = free[1:-1, :] & free[:-2, :]
+        down[:-2, :] = free[1:-1, :] & free[2:, :]
+        left[:, 2:] = free[:, 1:-1] & free[:, :-2]
+        right[:, :-2] = free[:, 1:-1] & free[:, 2:]
+        up, down, left, right = up.tolist(), down.tolist(), left.tolist(), right.tolist()
+
+        def unblocked_neighbors(r, c):
+            ns = []
+            if up[r][c]:
+                ns.append((r - 2, c))
+            if down[r][c]:
+                ns.append((r + 2, c))
+            if left[r][c]:
+                ns.append((r, c - 2))
+            if right[r][c]:
+                ns.append((r, c + 2))
+            np.random.shuffle(ns)
+            return ns
+
+        # a partial solution is stored as (last cell, previous cell, path node), where a
+        # path node is a (cell, parent node) tuple
+        first = self._push_edge(grid, start)
+        root = (first, None)
+        start_posis = unblocked_neighbors(*first)
+        assert len(start_posis) > 0, "Input maze is invalid."
+        solutions = [ (sp, first, (sp, root)) for sp in start_posis ]
+
+        num_unfinished = len(solutions)
+        while num_unfinished > 0:
+            for s in range(len(solutions)):
+                if solutions[s] is None:
+                    continue
+                cell, previous, node = solutions[s]
+                if self._is_within_one(cell, end):
+                    return [self._path(node)]
+
+                ns = [ n for n in unblocked_neighbors(*cell) if n != previous ]
+                if len(ns) == 0:
+                    solutions[s] = None
+                    continue
+                for n in ns[1:]:
+                    solutions.append((n, cell, (n, node)))
+                solutions[s] = (ns[0], cell, (ns[0], node))
+
+            num_unfinished = sum(1 for solution in solutions if solution is not None)
+
+        return []
+
+    @staticmethod
+    def _path(node):
+        cells = []
+        while node:
+            cells.append(node[0])
+            node = node[1]
+        cells.reverse()
+
+        path = [cells[0]]
+        for cell in cells[1:]:
+            path.append(((path[-1][0] + cell[0]) // 2, (path[-1][1] + cell[1]) // 2))
+            path.append(cell)
+        return path
+
+    @staticmethod
+    def _is_edge(grid, cell):
+        r, c = cell
+        return r == 0 or r == grid.shape[0] - 1 or c == 0 or c == grid.shape[1] - 1
+
+    @staticmethod
+    def _push_edge(grid, cell):
+        r, c = cell
+        if r == 0:
+            return (1, c)
+        elif r == grid.shape[0] - 1:
+            return (r - 1, c)
+        elif c == 0:
+            return (r, 1)
+        else:
+            return (r, c - 1)
+
+    @staticmethod
+    def _is_within_one(cell, desire):
+        if cell[0] == desire[0]:
+            return abs(cell[1] - desire[1]) < 2
+        elif cell[1] == desire[1]:
+            return abs(cell[0] - desire[0]) < 2
+        return False
@@ -0,0 +1,175 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+from functools import lru_cache
+from stage_timer import count
+
+# the parser source is hashed by its path, the parser itself is only imported if a file is
+# actually parsed, since pysmt is slow to import
+PARSER_FILE = Path(__file__).parent / "smt2_parser.py"
+
+# the cache directory can be configured using an environment variable, an empty value disables the cache
+CACHE_DIR_ENV = "OLYMPIA_CVE_CACHE"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "olympia" / "cve"
+
+# version of the entry format, increased on every incompatible change
+CACHE_FORMAT_VERSION = 2
+
+# the CVE pack of a folder holds the parsed entries of all its SMT files (see scripts/build_cve_pack.py)
+PACK_FILE = "cve_pack.json"
+
+@lru_cache(maxsize=None)
+def parser_digest():
+    """Returns the hash of the parser source, such that entries of older parsers are never used."""
+
+    with open(PARSER_FILE, "rb") as fp:
+        return hashlib.sha256(fp.read()).hexdigest()
+
+def cache_key(smt_file):
+    """Returns the key of the parsed "smt_file", i.e. the hash of its content, the parser and the entry format."""
+
+    with open(smt_file, "rb") as fp:
+        content = hashlib.sha256(fp.read()).hexdigest()
+    return hashlib.sha256(f"{content}:{parser_digest()}:{CACHE_FORMAT_VERSION}".encode()).hexdigest()
+
+def parse_uncached(smt_file):
+    """Parses "smt_file" and splits its constraints into independent groups (see smt2_parser)."""
+
+    import smt2_parser
+    constraints, vars_all, assignments, temporaries, temporary_indices = smt2_parser.parse(str(smt_file))
+    groups, vars, temporaries = smt2_parser.independent_formulas(constraints, temporaries, temporary_indices)
+    return set(constraints), vars_all, assignments, groups, vars, temporaries
+
+def encode_entry(constraints, vars_all, assignments, groups, vars, temporaries):
+    return \
+        { "constraints" : sorted(constraints)
+        , "vars_all"    : sorted(vars_all)
+        # JSON only supports string keys, hence the array assignments are stored as pairs
+        , "assignments" : { symbol: [default, sorted(values.items())] for symbol, (default, values) in assignments.items() }
+        , "groups"      : [ sorted(group) for group in groups ]
+        , "vars"        : vars
+        , "temporaries" : temporaries
+        }
+
+def decode_entry(entry):
+    assignments = { symbol: (default, { index: value for index, value in values })
+        for symbol, (default, values) in entry["assignments"].items() }
+    groups = [ set(group) for group in entry["groups"] ]
+    return set(entry["constraints"]), set(entry["vars_all"]), assignments, groups, entry["vars"], entry["temporaries"]
+
+def parse(smt_file):
+    """Returns the constraints, variables, model assignments, independent groups, their variables
+    and their temporaries of "smt_file", loading them from the CVE pack of its folder or the on-disk cache
+    if it was parsed before.
+
+    Parsing a CVE file simplifies and solves its formula, which takes seconds, while the result
+    only depends on the file content and the parser. Hence, entries are named by the hash of both
+    (see "cache_key") and a changed parser never reuses older entries. The groups are cached in
+    the order of the first parse, which makes the group order of later instances reproducible.
+    """
+
+    packed = pack_entry(smt_file)
+    if packed:
+        count("cve_pack_hits")
+        return decode_entry(packed)
+    return parse_cached(smt_file)
+
+def parse_cached(smt_file):
+    """Same as "parse", but only uses the on-disk cache and ignores the CVE pack."""
+
+    directory = os.environ.get(CACHE_DIR_ENV, str(DEFAULT_CACHE_DIR))
+    if not directory:
+        return parse_uncached(smt_file)
+
+    entry_file = Path(directory) / f"{cache_key(smt_file)}.json"
+    try:
+        with open(entry_file, "r") as fp:
+            parsed = decode_entry(json.load(fp))
+        count("cve_cache_hits")
+        return parsed
+    except (OSError, ValueError, KeyError):
+        pass # missing or corrupted entries are parsed again
+
+    parsed = parse_uncached(smt_file)
+    # write to a temporary file first such that parallel readers never see partial entries
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    temporary = entry_file.with_suffix(f".{os.getpid()}.tmp")
+    with open(temporary, "w") as fp:
+        json.dump(encode_entry(*parsed), fp)
+    os.replace(temporary, entry_file)
+    count("cve_cache_misses")
+    return parsed
+
+# ====================================================
+# CVE Pack
+# ====================================================
+
+def folder_stamp(folder):
+    # adding, removing or disabling a file of the folder changes its modification time
+    return os.stat(folder).st_mtime_ns
+
+def pack_statistics(constraints, groups, temporaries):
+    """Returns the amount of conditions and groups of a formula together with the estimated
+    size in bytes of the Solidity code emitted for its conditions, i.e. the conditions with
+    their if statements and the declarations of the temporaries without indentation (see
+    CVE_gen.get_logic_sol).
+    """
+
+    declarations = [ declaration for group in temporaries for declaration in group ]
+    return \
+        { "condition_count" : len(constraints)
+        , "group_count"     : len(groups)
+        , "code_size"       : sum(len(constraint) + 10 for constraint in constraints)
+            + sum(len(solidity_type) + len(name) + len(expression) + 6 for solidity_type, name, expression in declarations)
+        }
+
+def write_pack(folder, smt_files, entries):
+    """Writes the CVE pack of "folder", which holds the cache "entries" of the "smt_files" in the
+    order of the folder listing, such that sampling from the pack picks the same files as
+    sampling from the listing. The pack is only valid as long as the folder is not modified.
+    """
+
+    pack_file = Path(folder) / PACK_FILE
+    # the pack file is created first, such that writing it does not modify the folder anymore
+    pack_file.touch()
+    pack = \
+        { "format"  : CACHE_FORMAT_VERSION
+        , "parser"  : parser_digest()
+        , "stamp"   : folder_stamp(folder)
+        , "files"   : [ Path(smt_file).name for smt_file in smt_files ]
+        , "entries" : entries
+        }
+    with open(pack_file, "w") as fp:
+        json.dump(pack, fp)
+
+@lru_cache(maxsize=None)
+def load_pack(folder):
+    """Returns the CVE pack of "folder" or None if it does not exist or is out of date."""
+
+    try:
+        with open(Path(folder) / PACK_FILE, "r") as fp:
+            pack = json.load(fp)
+    except (OSError, ValueError):
+        return None
+    if pack.get("format") != CACHE_FORMAT_VERSION or pack.get("parser") != parser_digest() \
+        or pack.get("stamp") != folder_stamp(folder):
+        return None
+    return pack
+
+def pack_files(folder):
+    """Returns the SMT files of "folder" from its CVE pack or None if there is no valid pack."""
+
+    pack = load_pack(str(Path(folder).resolve()))
+    return [ Path(folder) / name for name in pack["files"] ] if pack else None
+
+def pack_entry(smt_file):
+    """Returns the packed entry of "smt_file" or None if it is not part of a valid pack."""
+
+    smt_file = Path(smt_file).resolve()
+    pack = load_pack(str(smt_file.parent))
+    if not pack or smt_file.name not in pack["entries"]:
+        return None
+    entry = pack["entries"][smt_file.name]
+    # files changed in place do not modify their folder, hence the content is checked as well
+    return entry if entry["key"] == cache_key(smt_file) else None
@@ -0,0 +1,37 @@
+import numpy as np
+
+# version of the binary maze format, increased on every incompatible change
+MAZE_FORMAT_VERSION = 1
+
+def maze_dtype(width, height, solution_length):
+    """Returns the record type of a binary maze file.
+
+    A maze file is a .npy file holding a single record with the format version, the maze
+    dimensions, the solution as cell numbers (see array_gen.solution_cells) and the grid
+    with one byte per position. Since all sizes are part of the record type, the file can
+    be memory-mapped and the solution and grid are views into the mapped file.
+    """
+    return np.dtype(
+        [ ("version", "<u2")
+        , ("width", "<u4")
+        , ("height", "<u4")
+        , ("solution", "<u4", (solution_length,))
+        , ("grid", "u1", (2*height + 1, 2*width + 1))
+        ])
+
+def store_maze_data(grid, solution, label, width, height):
+    """Writes the grid and the solution cells of a maze to "label".npy."""
+    record = np.zeros(1, dtype=maze_dtype(width, height, len(solution)))
+    record["version"] = MAZE_FORMAT_VERSION
+    record["width"] = width
+    record["height"] = height
+    record["solution"] = solution
+    record["grid"] = grid
+    np.save(label + ".npy", record)
+
+def load_maze_data(label):
+    """Memory-maps "label".npy and returns the grid and solution cells of the maze."""
+    record = np.load(label + ".npy", mmap_mode="r")
+    version = int(record["version"][0])
+    assert version == MAZE_FORMAT_VERSION, f"unsupported maze format version {version}"
+    return record["grid"][0], record["solution"][0]
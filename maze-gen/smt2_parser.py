@@ -1,9 +1,9 @@
 from enum import StrEnum
-import sys, random
+import re, sys, random
+from collections import Counter
 from pysmt.operators import op_to_str
 from pysmt.fnode import FNode
 from pysmt.smtlib.parser import SmtLibParser
-from collections import defaultdict
 from pysmt.shortcuts import get_model, is_sat, Not, And, Or
 import pysmt as pysmt
 from pysmt.solvers.solver import Model
@@ -28,19 +28,19 @@ def cast_expr_helper(expr: str, node: FNode, signed: bool) -> str:
     width = node.bv_width()
     return f"{base}{width}({expr})"
 
-def ext_helper(node: FNode, is_sext: bool) -> tuple[str, bool]:
+def ext_helper(node: FNode, is_sext: bool, shared: "SharedTerms | None" = None) -> tuple[str, bool, set[int]]:
     (value, ) = node.args()
     target_width = node.bv_width()
-    (value_cons, value_signed) = convert(value)
+    (value_cons, value_signed, indices) = convert(value, shared)
     if not value_signed == is_sext:
         value_cons = cast_expr_helper(value_cons, value, is_sext)
     ext_base = "int" if is_sext else "uint"
-    return f"{ext_base}{target_width}({value_cons})", is_sext
+    return f"{ext_base}{target_width}({value_cons})", is_sext, indices
 
-def bin_op_same_sign_helper(op: str, bin_op_node: FNode, forced_sign: bool | None = None) -> tuple[str, bool]:
+def bin_op_same_sign_helper(op: str, bin_op_node: FNode, forced_sign: bool | None = None, shared: "SharedTerms | None" = None) -> tuple[str, bool, set[int]]:
     (l_node, r_node) = bin_op_node.args()
-    l_cons, l_sign = convert(l_node)
-    r_cons, r_sign = convert(r_node)
+    l_cons, l_sign, l_indices = convert(l_node, shared)
+    r_cons, r_sign, r_indices = convert(r_node, shared)
 
     if forced_sign == None:
         forced_sign = l_sign
@@ -49,7 +49,7 @@ def bin_op_same_sign_helper(op: str, bin_op_node: FNode, forced_sign: bool | Non
     if not (forced_sign == r_sign):
         r_cons = cast_expr_helper(r_cons, r_node, forced_sign)
 
-    return f"({l_cons} {op} {r_cons})", forced_sign
+    return f"({l_cons} {op} {r_cons})", forced_sign, l_indices | r_indices
 
 def deflatten(args, op):
     x = args[0]
@@ -58,13 +58,32 @@ def deflatten(args, op):
         x = op(x,y)
     return x
 
-def convert(node: FNode) -> tuple[str, bool]:
+def convert(node: FNode, shared: "SharedTerms | None" = None) -> tuple[str, bool, set[int]]:
 
     """
     Converts a SMT FNode into a solidity expression and tracks signed-ness, expression
     size and temporary variables used to reduce depth of a single expression.
+    Additionally, the indices of the input array read by the expression are returned.
     If a node is unknown, an error is thrown and the generation is exited.
 
+    Without "shared" the formula is converted as a tree, i.e. subterms that are shared
+    by several nodes (e.g. by "let" bindings) are converted and emitted at every use.
+    With "shared" every node is converted only once and shared subterms are replaced
+    by temporaries (see SharedTerms).
+    """
+
+    if shared is not None and node in shared.converted:
+        return shared.converted[node]
+    result = convert_node(node, shared)
+    if shared is not None:
+        result = shared.add(node, result)
+    return result
+
+def convert_node(node: FNode, shared: "SharedTerms | None" = None) -> tuple[str, bool, set[int]]:
+
+    """
+    Converts a single node into a solidity expression, its arguments are converted by "convert".
+
     TODO: FIXME:
         - is_bv_concat, currently it always returns 'model_version'
         - is_select,    currently this always assumes the one allowed array on the LHS
@@ -73,43 +92,44 @@ def convert(node: FNode) -> tuple[str, bool]:
 
     cons = None
     signed = False # always assume unsigned by default
+    indices = set() # indices of the input array read by the expression
     if node.is_iff():
             (l, r) = node.args()
             if l.is_false(): # TODO: FIXME: also check right-hand-side
-                (r_cons, _) = convert(r)
+                (r_cons, _, indices) = convert(r, shared)
                 cons = f"(!{r_cons})"
             else:
                 error(ErrorKind.UNSUPPORTED_TYPE, node.get_type())
     elif node.is_equals():
-        cons, _ = bin_op_same_sign_helper("==", node)
+        cons, _, indices = bin_op_same_sign_helper("==", node, shared=shared)
     elif node.is_bv_sle():
-        cons, _ = bin_op_same_sign_helper("<=", node, True)
+        cons, _, indices = bin_op_same_sign_helper("<=", node, True, shared)
     elif node.is_bv_ule():
-        cons, _ = bin_op_same_sign_helper("<=", node, False)
+        cons, _, indices = bin_op_same_sign_helper("<=", node, False, shared)
     elif node.is_bv_slt():
-        cons, _ = bin_op_same_sign_helper("<", node, True)
+        cons, _, indices = bin_op_same_sign_helper("<", node, True, shared)
     elif node.is_bv_ult():
-        cons, _ = bin_op_same_sign_helper("<", node, False)
+        cons, _, indices = bin_op_same_sign_helper("<", node, False, shared)
     elif node.is_bv_add():
-        cons, signed = bin_op_same_sign_helper("+", node)
+        cons, signed, indices = bin_op_same_sign_helper("+", node, shared=shared)
     elif node.is_bv_sub():
-        cons, signed = bin_op_same_sign_helper("-", node)
+        cons, signed, indices = bin_op_same_sign_helper("-", node, shared=shared)
     elif node.is_bv_mul():
-        cons, signed = bin_op_same_sign_helper("*", node)
+        cons, signed, indices = bin_op_same_sign_helper("*", node, shared=shared)
     elif node.is_bv_udiv():
-        cons, signed = bin_op_same_sign_helper("/", node, False)
+        cons, signed, indices = bin_op_same_sign_helper("/", node, False, shared)
     elif node.is_bv_sdiv():
-        cons, signed = bin_op_same_sign_helper("/", node, True)
+        cons, signed, indices = bin_op_same_sign_helper("/", node, True, shared)
     elif node.is_bv_urem():
-        cons, signed = bin_op_same_sign_helper("%", node, False)
+        cons, signed, indices = bin_op_same_sign_helper("%", node, False, shared)
     elif node.is_bv_srem():
-        cons, signed = bin_op_same_sign_helper("%", node, True)
+        cons, signed, indices = bin_op_same_sign_helper("%", node, True, shared)
     ## sext -> signed extension -> pads the number with leading ones (twos-complement)
     elif node.is_bv_sext():
-        cons, signed = ext_helper(node, True)
+        cons, signed, indices = ext_helper(node, True, shared)
     ## zext -> zero extension -> pads the number with leading zeros
     elif node.is_bv_zext():
-        cons, signed = ext_helper(node, False)
+        cons, signed, indices = ext_helper(node, False, shared)
     elif node.is_bv_concat():
         cons = "model_version" # TODO: HACK: legacy limitation from fuzzle 
         signed = False
@@ -119,7 +139,7 @@ def convert(node: FNode) -> tuple[str, bool]:
         ext_end = node.bv_extract_end()
         (l, ) = node.args()
         start_width = l.bv_width()
-        (l_cons, l_signed) = convert(l)
+        (l_cons, l_signed, indices) = convert(l, shared)
         if l_signed:
                 l_cons = cast_expr_helper(l_cons, l, False)
         target_size : int = (ext_end - ext_start + 1)
@@ -132,13 +152,13 @@ def convert(node: FNode) -> tuple[str, bool]:
             cons = f"uint{target_size}(({l_cons} << {shift_l}) >> {shift_r})"
     elif node.is_and():
         node = deflatten(node.args(),And)
-        cons, _ = bin_op_same_sign_helper("&&", node)
+        cons, _, indices = bin_op_same_sign_helper("&&", node, shared=shared)
     elif node.is_or():
         node = deflatten(node.args(),Or)
-        cons, _ = bin_op_same_sign_helper("||", node)
+        cons, _, indices = bin_op_same_sign_helper("||", node, shared=shared)
     elif node.is_not():
         (b,) = node.args()
-        (b_cons, _) = convert(b)
+        (b_cons, _, indices) = convert(b, shared)
         cons = f"(!{b_cons})"
     elif node.is_bool_constant():
         cons = "true" if node.is_bool_constant(True) else "false"
@@ -146,6 +166,7 @@ def convert(node: FNode) -> tuple[str, bool]:
         (l, r) = node.args()
         if l.is_symbol() and r.is_bv_constant():
             cons = f"inp[{r.constant_value()}]"
+            indices = { r.constant_value() }
             signed = True # set signed to true because the array is probably signed
         else:
             error(ErrorKind.UNSUPPORTED_TYPE, node.get_type())
@@ -157,7 +178,74 @@ def convert(node: FNode) -> tuple[str, bool]:
         error(ErrorKind.UNRECOGNIZED_TYPE, node.get_type())
 
     assert cons, f"unable to generate a solidity expression for {op_to_str(node.get_type())}"
-    return (cons, signed)
+    return (cons, signed, indices)
+
+# temporaries are named "tmp_<number>", the word boundaries keep "tmp_1" from matching "tmp_12"
+TEMPORARY_PATTERN = re.compile(r"\btmp_\d+\b")
+
+def subterms(node: FNode) -> set[FNode]:
+    """Returns all nodes of the formula "node", i.e. the nodes of its DAG."""
+
+    nodes, pending = set(), [node]
+    while pending:
+        current = pending.pop()
+        if current not in nodes:
+            nodes.add(current)
+            pending.extend(current.args())
+    return nodes
+
+class SharedTerms:
+    """
+    Memoises the conversion of the nodes of a set of clauses. Compound subterms referenced
+    more than once are converted into temporaries, which are declared as local variables in
+    front of the conditions of a cell and replace the subterm in every expression using it.
+
+    Only the clauses that are kept as conditions count as references, i.e. clauses containing
+    a concatenation are ignored (they are converted into the dropped 'model_version').
+    """
+
+    def __init__(self, clauses):
+        self.converted : dict[FNode, tuple[str, bool, set[int]]] = dict()
+        # declaration of each temporary as solidity type and expression, in the order of their creation
+        self.temporaries : dict[str, tuple[str, str]] = dict()
+        # indices of the array elements read by each temporary
+        self.indices : dict[str, set[int]] = dict()
+        self.references = Counter()
+        visited = set()
+        for clause in clauses:
+            nodes = subterms(clause)
+            if any(node.is_bv_concat() for node in nodes):
+                continue
+            self.references[clause] += 1
+            for node in nodes - visited:
+                self.references.update(node.args())
+            visited |= nodes
+
+    def is_temporary(self, node: FNode, cons: str, indices: set[int], name: str, solidity_type: str) -> bool:
+        references = self.references[node]
+        if references < 2 or node.is_select() or node.is_constant() or not indices:
+            return False
+        # the declarations are evaluated before any condition of the cell, hence subterms that
+        # may revert, i.e. divisions by zero, are left inside of their short-circuited condition
+        if " / " in cons or " % " in cons or "model_version" in cons:
+            return False
+        # short subterms are only replaced if the declaration shortens the emitted code
+        declaration = f"{solidity_type} {name} = {cons};"
+        return references * len(cons) > references * len(name) + len(declaration)
+
+    def add(self, node: FNode, result: tuple[str, bool, set[int]]) -> tuple[str, bool, set[int]]:
+        cons, signed, indices = result
+        name = f"tmp_{len(self.temporaries)}"
+        if node.get_type().is_bool_type():
+            solidity_type = "bool"
+        else:
+            solidity_type = f"{'int' if signed else 'uint'}{node.bv_width()}"
+        if self.is_temporary(node, cons, indices, name, solidity_type):
+            self.temporaries[name] = (solidity_type, cons)
+            self.indices[name] = indices
+            result = (name, signed, indices)
+        self.converted[node] = result
+        return result
 
 
 def conjunction_to_clauses(formula):
@@ -239,7 +327,9 @@ def parse_model_variables(model: Model, ignore_symbols: list[str] = []) -> dict[
 
     return result
 
-def parse(file_path):
+def parse_formula(file_path):
+    """Reads the SMT file, checks its declarations and returns its simplified formula."""
+
     parser = SmtLibParser()
     script = parser.get_script_fname(file_path)
 
@@ -265,6 +355,19 @@ def parse(file_path):
     # For safety we can check if we are sat, but this takes a lot of time so it is commented out.
     # Further down we do this anyways with a "get_model" call
     # assert(is_sat(formula, solver_name="z3") == True)
+    return formula
+
+def parse(file_path):
+    """
+    Returns the solidity conditions of the clauses of the SMT file, the used variables, the
+    parsed model of the formula and the temporaries of the shared subterms of the conditions
+    (see SharedTerms), i.e. a dictionary of their names to their solidity type and expression.
+    The conditions map to the indices of the array elements they read, including the ones read
+    through temporaries, and the indices of each temporary are returned last. Both are taken
+    from the conversion, hence they do not depend on the formatting of the expressions.
+    """
+
+    formula = parse_formula(file_path)
 
     # returns a set of formulas representing clauses, i.e. it creates a set
     # from sub-formulas that all have to be satisfied.
@@ -285,103 +388,133 @@ def parse(file_path):
     # overall used variable set
     variables = set()
 
-    # set of parsed conditions
-    parsed_cons = set()
+    # parsed conditions and the indices of the array elements read by each of them
+    parsed_cons = dict()
+
+    # the clauses are converted together, such that subterms shared among them are converted once
+    shared = SharedTerms(clauses)
 
     # iterate over the clauses
     for clause in clauses:
 
         # convert the current clause to a string containing the corresponding solidity condition
-        (cons_in_sol, _) = convert(clause)
+        (cons_in_sol, _, indices) = convert(clause, shared)
 
         if "model_version" in cons_in_sol:
             # again ignore all conditions with the 'model_version' variable
             continue
 
-        parsed_cons.add(cons_in_sol)
-
-        for declared in decl_arr:
-            # TODO: FIXME: remove hardcoded array limitation 100 elements.
-            for idx in range(0,100):
-                var_idx = "inp[" + str(idx) + "]"
-                # check wether the generated inp[*] value is inside the condition.
-                # TODO: FIXME: check without trailing " " or ")"
-                if var_idx + " " in cons_in_sol or var_idx + ")" in cons_in_sol:
-                    variables.add("inp[" + str(idx) + "]") # if it is inside put it to the variable list
-    return parsed_cons, variables, variable_model_map
-
-def extract_vars(cond, variables):
-    vars = set()
-    #print(f"variables: {variables}")
-    for var in variables:
-        if var + " " in cond or var + ")" in cond:
-            vars.add(var)
-    return vars
-
-class Graph:
-    def __init__(self):
-        self.graph = defaultdict(list)
-
-    def add_edge(self, node, neighbour):
-        self.graph[node].append(neighbour)
-
-    def get_edges(self, node):
-        return self.graph[node]
-
-    def separate_helper(self, node, visited, group):
-        if node not in visited:
-            group.add(node)
-            visited.add(node)
-        for neighbour in self.graph[node]:
-            if neighbour not in visited:
-                self.separate_helper(neighbour, visited, group)
-        return group
-
-    def separate(self):
-        visited = set()
-        groups = list()
-        for node in self.graph:
-            group = self.separate_helper(node, visited, set())
-            if len(group) > 0:
-                groups.append(group)
-        return groups
-
-def independent_formulas(conds, variables):
-    # create a new graph
-    formula = Graph()
-
-    # Iterate n x n over the conditions and check if the variable-set
-    # of the conditions intersect. If they do, create an edge between the
-    # two conditions.
-    for cond in conds:
-        vars = extract_vars(cond, variables)
-        for other in conds:
-            if len(vars.intersection(extract_vars(other, variables))) > 0:
-                # add an edge to the graph
-                formula.add_edge(cond, other)
-
-    # generate a list of all the connected groups
-    # of the condition graph
-    groups = formula.separate()
-    vars_by_groups = list()
-
-    # For each group gather the used variable and safe them in a separate list
-    for group in groups:
-        used_vars = set()
-        for cond in group:
-            used_vars = used_vars.union(extract_vars(cond, variables))
-        vars_by_groups.append(sorted(used_vars))
-
-    return groups, vars_by_groups
+        if TEMPORARY_PATTERN.fullmatch(cons_in_sol):
+            # the clause is also shared by other clauses, the if statement requires parentheses
+            cons_in_sol = f"({cons_in_sol})"
+
+        # the conversion returns the indices of all array elements read by the condition
+        parsed_cons.setdefault(cons_in_sol, set()).update(indices)
+        variables.update(f"inp[{idx}]" for idx in indices)
+    return parsed_cons, variables, variable_model_map, shared.temporaries, shared.indices
+
+def used_temporaries(expression, temporaries):
+    """Returns the names of the temporaries read by "expression", directly or through other
+    temporaries, in the order of their declaration.
+    """
+
+    used, pending = set(), TEMPORARY_PATTERN.findall(expression)
+    while pending:
+        name = pending.pop()
+        if name not in used:
+            used.add(name)
+            pending.extend(TEMPORARY_PATTERN.findall(temporaries[name][1]))
+    return [ name for name in temporaries if name in used ]
+
+class UnionFind:
+    """Disjoint sets over the indices 0 to size - 1 with path halving and union by size."""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, node):
+        while self.parent[node] != node:
+            self.parent[node] = self.parent[self.parent[node]]
+            node = self.parent[node]
+        return node
+
+    def union(self, node, other):
+        node, other = self.find(node), self.find(other)
+        if node != other:
+            if self.size[node] < self.size[other]:
+                node, other = other, node
+            self.parent[other] = node
+            self.size[node] += self.size[other]
+        return node
+
+def independent_formulas(conds, temporaries=None, temporary_indices=None):
+    """
+    Splits the conditions into groups that do not share any variable. Two conditions are in
+    the same group if they are connected by a chain of conditions with common variables, the
+    conditions without any variable are not part of any group.
+
+    The "conds" map each condition to the indices of the array elements it reads (see "parse")
+    and all variables of a condition are joined in a union-find over the variable indices, which
+    replaces the pairwise comparison of all conditions. The groups are ordered by their smallest
+    variable index.
+
+    A condition also reads the variables of the "temporaries" it uses (see SharedTerms), whose
+    indices are given by "temporary_indices", hence all conditions using a temporary end up in
+    the same group. Besides the groups and their variables, the declarations of the temporaries
+    of each group are returned, each as list of solidity type, name and expression in the order
+    of their declaration.
+    """
+
+    temporaries = temporaries or dict()
+    temporary_indices = temporary_indices or dict()
+
+    # variables are numbered in the order of their index into the input array
+    indices = sorted(set().union(*conds.values(), *temporary_indices.values()))
+    ordered_vars = [ f"inp[{index}]" for index in indices ]
+    var_ids = { index: idx for idx, index in enumerate(indices) }
+    var_sets = UnionFind(len(ordered_vars))
+
+    vars_by_cond, temporaries_by_cond = dict(), dict()
+    for cond, cond_indices in conds.items():
+        names = used_temporaries(cond, temporaries)
+        ids = [ var_ids[index] for index in cond_indices.union(*(temporary_indices[name] for name in names)) ]
+        if len(ids) > 0:
+            vars_by_cond[cond] = ids
+            temporaries_by_cond[cond] = names
+            for other in ids[1:]:
+                var_sets.union(ids[0], other)
+
+    # every root of the union-find represents a group, which gets the position of its smallest variable
+    group_ids = dict()
+    for idx in range(len(ordered_vars)):
+        group_ids.setdefault(var_sets.find(idx), len(group_ids))
+
+    groups = [ set() for _ in group_ids ]
+    used_vars = [ set() for _ in group_ids ]
+    used_temporaries_by_group = [ set() for _ in group_ids ]
+    for cond, ids in vars_by_cond.items():
+        group_id = group_ids[var_sets.find(ids[0])]
+        groups[group_id].add(cond)
+        used_vars[group_id].update(ordered_vars[idx] for idx in ids)
+        used_temporaries_by_group[group_id].update(temporaries_by_cond[cond])
+
+    # variables that do not occur in any condition form empty groups, which are dropped
+    vars_by_groups = [ sorted(vars) for vars in used_vars if len(vars) > 0 ]
+    temporaries_by_groups = [ [ [ temporaries[name][0], name, temporaries[name][1] ] for name in temporaries if name in names ]
+        for names, vars in zip(used_temporaries_by_group, used_vars) if len(vars) > 0 ]
+    groups = [ group for group in groups if len(group) > 0 ]
+    return groups, vars_by_groups, temporaries_by_groups
 
 def main(file_path):
-    conds, variables, assignments = parse(file_path)
-    for cond in conds:
-        vars = extract_vars(cond, variables)
+    conds, variables, assignments, temporaries, temporary_indices = parse(file_path)
+    for name, (solidity_type, expression) in temporaries.items():
+        print(f"{solidity_type} {name} = {expression};")
+    for cond, indices in conds.items():
         print(cond)
-        print(vars, "\n")
+        print({ f"inp[{index}]" for index in indices }, "\n")
     print("-"*100)
-    groups, vars_by_groups = independent_formulas(conds, variables)
+    groups, vars_by_groups, temporaries_by_groups = independent_formulas(conds, temporaries, temporary_indices)
     for idx in range(len(groups)):
         print(vars_by_groups[idx], "\n")
         print("*"*100)
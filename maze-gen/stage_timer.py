@@ -0,0 +1,55 @@
+import cProfile
+from time import perf_counter
+from contextlib import contextmanager
+
+class StageTimer:
+    """Accumulates the wall-clock time spent in named stages of the generation.
+
+    Stages can be nested, in which case the time of the inner stage is not counted
+    for the outer stage. If "profile" is set, a cProfile profile is recorded for
+    each stage in addition to the time. Besides the time, named counters (e.g. the
+    amount of generated mazes) can be recorded.
+    """
+
+    def __init__(self):
+        self.profile = False
+        self.reset()
+
+    def reset(self):
+        self.durations = dict()
+        self.profiles = dict()
+        self.counters = dict()
+        self._stack = []
+        self._started = 0.0
+
+    @contextmanager
+    def stage(self, name):
+        if self._stack:
+            self._stop(self._stack[-1])
+        self._stack.append(name)
+        self._start(name)
+        try:
+            yield
+        finally:
+            self._stop(name)
+            self._stack.pop()
+            if self._stack:
+                self._start(self._stack[-1])
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _start(self, name):
+        if self.profile:
+            self.profiles.setdefault(name, cProfile.Profile()).enable()
+        self._started = perf_counter()
+
+    def _stop(self, name):
+        self.durations[name] = self.durations.get(name, 0.0) + perf_counter() - self._started
+        if self.profile:
+            self.profiles[name].disable()
+
+# timer shared by all generation modules of a process
+timer = StageTimer()
+stage = timer.stage
+count = timer.count
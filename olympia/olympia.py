@@ -4,10 +4,16 @@ from subprocess import Popen, PIPE
 from random import Random
 from argparse import ArgumentParser, ArgumentTypeError
 from datetime import datetime
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
 import os
-from dataclasses import dataclass
+import sys
+import json
+import time
+import resource
+import traceback
+from dataclasses import dataclass, field
 
-from utils.reachability_test import run_test as run_reachability_test
 from utils.custom_logging import logger
 
 
@@ -18,26 +24,81 @@ from utils.custom_logging import logger
 OLYMPIA_DIR = Path(os.path.dirname(__file__))
 CVE_FOLDER = OLYMPIA_DIR / "../CVEs"
 GENERATION_SH = OLYMPIA_DIR / "../scripts/generate.sh"
+MAZEGEN_DIR = OLYMPIA_DIR / "../maze-gen"
+
+# folders created inside of the output directory (see generate.sh)
+GENERATION_FOLDERS = ["src", "bin", "png", "maze", "txt", "sln", "sol_tx"]
+
+# per instance timing records and profiles inside of the output directory
+TIMINGS_FILE = "timings.jsonl"
+PROFILE_FOLDER = "profile"
+
+# the maze-gen modules are imported from the maze-gen folder
+if str(MAZEGEN_DIR) not in sys.path:
+    sys.path.append(str(MAZEGEN_DIR))
+from stage_timer import timer, stage, count
+import cve_cache
 
 EQUALITY_METHOD_PERCENTAGE = [25, 50, 75, 100]
 CYCLE_PERCENTAGE = [0, 25, 50, 75, 100]
 
+# size limit of deployed contracts (EIP-170), the reachability test raises it but fuzzers do not.
+# It is compared to the creation bytecode, which is slightly larger than the deployed one.
+EVM_CODE_SIZE_LIMIT = 24576
+# size limit of creation bytecode (EIP-3860) from Shanghai on, which the reachability test raises as well
+EVM_INITCODE_SIZE_LIMIT = 49152
+
 # ====================================================
 # Generation Settings
 # ====================================================
 
 class MazeGenAlgorithmKind(StrEnum):
-    BACKTRACKING = "Backtracking"
-    KRUSKAL      = "Kruskal"
-    PRIMS        = "Prims"
-    WILSONS      = "Wilsons"
-    SIDEWINDER   = "Sidewinder"
+    BACKTRACKING       = "Backtracking"
+    KRUSKAL            = "Kruskal"
+    PRIMS              = "Prims"
+    WILSONS            = "Wilsons"
+    SIDEWINDER         = "Sidewinder"
+    ARRAY_BACKTRACKING = "ArrayBacktracking"
+    ARRAY_KRUSKAL      = "ArrayKruskal"
+    ARRAY_PRIMS        = "ArrayPrims"
+    ARRAY_WILSONS      = "ArrayWilsons"
+    ARRAY_SIDEWINDER   = "ArraySidewinder"
+
+# the array based algorithms (see maze-gen/array_generators.py) generate different
+# mazes for the same seed, hence only mazelib's algorithms are picked by default
+DEFAULT_ALGORITHMS = \
+    [ MazeGenAlgorithmKind.BACKTRACKING
+    , MazeGenAlgorithmKind.KRUSKAL
+    , MazeGenAlgorithmKind.PRIMS
+    , MazeGenAlgorithmKind.WILSONS
+    , MazeGenAlgorithmKind.SIDEWINDER
+    ]
 
 class MazeGenMethodKind(StrEnum):
     CVE      = "CVE"
     DEFAULT  = "default"
     EQUALITY = "equality"
 
+class MazeExitKind(StrEnum):
+    DEFAULT  = "default"
+    TARGETED = "targeted"
+
+class DispatchKind(StrEnum):
+    LINEAR = "linear"
+    BINARY = "binary"
+
+class InputLocationKind(StrEnum):
+    MEMORY   = "memory"
+    CALLDATA = "calldata"
+
+class EmissionKind(StrEnum):
+    CELLS  = "cells"
+    SHARED = "shared"
+
+class GenerationEngineKind(StrEnum):
+    IN_PROCESS = "in-process"
+    SHELL      = "shell"
+
 @dataclass
 class MazeGenerationMethod():
     kind                : MazeGenMethodKind
@@ -66,6 +127,42 @@ class MazeGenerationMethod():
                 assert self.equality_percentage, "equality method without equality percentage"
                 return f"equality{self.equality_percentage}_gen"
 
+@dataclass(frozen=True)
+class GenerationOptions():
+    """
+    Options of the generation that are the same for every instance of a benchmark, in contrast
+    to the settings picked at random. Besides the maze exit and the text export, they select
+    how the contract is emitted, which does not change the transactions it accepts.
+    """
+    maze_exit      : MazeExitKind = MazeExitKind.DEFAULT
+    text_export    : bool = True
+    dispatch       : DispatchKind = DispatchKind.LINEAR
+    input_location : InputLocationKind = InputLocationKind.MEMORY
+    emission       : EmissionKind = EmissionKind.CELLS
+    shard_size     : int = 0
+
+    @property
+    def generation_flags(self) -> list[str]:
+        # flags of the generation.sh, options with their default value are omitted
+        flags = ["-e", f"{self.maze_exit}"]
+        if not self.text_export:
+            flags.append("-x")
+        if self.dispatch != DispatchKind.LINEAR:
+            flags.extend(["-d", f"{self.dispatch}"])
+        if self.input_location != InputLocationKind.MEMORY:
+            flags.extend(["-l", f"{self.input_location}"])
+        if self.emission != EmissionKind.CELLS:
+            flags.extend(["-f", f"{self.emission}"])
+        if self.shard_size > 0:
+            flags.extend(["-k", f"{self.shard_size}"])
+        return flags
+
+    @staticmethod
+    def from_args(args) -> "GenerationOptions":
+        # arguments of the parsers extended by 'add_generation_options'
+        return GenerationOptions(args.maze_exit, not args.disable_text_export,
+            args.dispatch, args.input_location, args.emission, args.shard_size)
+
 @dataclass
 class GenerationSetting():
     algorithm  : MazeGenAlgorithmKind
@@ -74,6 +171,7 @@ class GenerationSetting():
     cycles     : int
     method     : MazeGenerationMethod
     output_dir : Path
+    options    : GenerationOptions = field(default_factory=GenerationOptions)
 
     @property
     def program_entry(self) -> str:
@@ -91,6 +189,16 @@ class GenerationSetting():
     def base_name(self) -> str:
         return self.program_entry.replace(",", "_")
 
+    @property
+    def maze_name(self) -> str:
+        # name of the maze files as generated by array_gen.py
+        return f"{self.algorithm}_{self.dimension}x{self.dimension}_{self.maze_seed}_1"
+
+    @property
+    def program_name(self) -> str:
+        # name of the program files as generated by array_to_code.py
+        return f"{self.maze_name}_{self.cycles}percent_{self.method.entry_name}"
+
 @dataclass
 class GenerationResult():
     setting    : GenerationSetting
@@ -104,13 +212,12 @@ class GenerationResult():
 # Generation Logic
 # ====================================================
 
-def exec_generation_sh(setting: GenerationSetting) -> GenerationResult:
+def generation_command(setting: GenerationSetting) -> list[str]:
     """
-    Executes the generation.sh inside of tht script folder with the generated
-    and provided settings. It returns a result object containing the status of
-    the execution together with the settings and the called command
+    Returns the generation.sh command for the provided settings. Independent of
+    the engine that is used, this command is stored inside of the reproducible
+    generation script of the output directory.
     """
-    # set the command and flags
     command = \
         [ str(Path(GENERATION_SH).absolute())
         , "-a", f"{setting.algorithm}"
@@ -121,11 +228,20 @@ def exec_generation_sh(setting: GenerationSetting) -> GenerationResult:
         , "-n", "1" # number hardcoded to 1
         , "-c", f"{setting.cycles}"
         , "-g", f"{setting.method.gen_filename}"
-        , "-e", "default"
-        ]
+        ] + setting.options.generation_flags
     if setting.method.kind == MazeGenMethodKind.CVE:
         assert setting.method.smt_file, "CVE method has no smt file"
         command.append(f"-s {setting.method.smt_file}")
+    return command
+
+def exec_generation_sh(setting: GenerationSetting) -> GenerationResult:
+    """
+    Executes the generation.sh inside of tht script folder with the generated
+    and provided settings. It returns a result object containing the status of
+    the execution together with the settings and the called command
+    """
+    # set the command and flags
+    command = generation_command(setting)
 
     # subprocess.run(single_line_command, shell=True, check=True)
     process = Popen(command, shell=False, stdout=PIPE, stderr=PIPE)
@@ -135,14 +251,93 @@ def exec_generation_sh(setting: GenerationSetting) -> GenerationResult:
 
     return GenerationResult(setting, command_str, stdout, stderr, returncode)
 
+def run_maze_gen(setting: GenerationSetting):
+    """
+    Runs the steps of the generation.sh script (array_gen.py followed by array_to_code.py)
+    inside of the current process. Instead of generating the files in the current working
+    directory and moving them, every file is directly written to its final location.
+    """
+    import array_gen
+    import array_to_code
+
+    output_dir = setting.output_dir
+    for folder in GENERATION_FOLDERS:
+        (output_dir / folder).mkdir(parents=True, exist_ok=True)
+
+    width = height = setting.dimension
+    options = setting.options
+    maze_data = str(output_dir / "maze" / setting.maze_name)
+    maze_txt = str(output_dir / "txt" / setting.maze_name)
+    maze_sln = str(output_dir / "sln" / setting.maze_name)
+    maze_png = str(output_dir / "png" / setting.maze_name)
+
+    # array_gen.py
+    maze = array_gen.generate_maze(setting.algorithm.value, width, height, setting.maze_seed, options.maze_exit.value)
+    with stage("maze_export"):
+        array_gen.store_maze_data(maze, maze_data, width, height)
+        if options.text_export:
+            array_gen.store_maze(maze, maze_txt)
+            array_gen.store_solution(maze, maze_sln, width, height)
+    with stage("png_render"):
+        array_gen.show_png(maze, maze_png, width, height)
+
+    # array_to_code.py
+    smt_file = str(setting.method.smt_file) if setting.method.smt_file else ""
+    generator, equality, _ = array_to_code.get_generator(setting.method.gen_filename, smt_file)
+    with stage("graph_generation"):
+        matrix, sln = array_to_code.get_maze_data(maze_data)
+        maze_exit = array_to_code.get_exit(sln)
+        maze_funcs = array_to_code.get_functions(width, height, maze_exit)
+        graph = array_to_code.generate_graph(width, height, maze_exit, maze_funcs, matrix)
+        array_to_code.remove_cycle(graph, setting.cycles, setting.maze_seed)
+
+    program = setting.program_name
+    sol_file = output_dir / "src" / f"{program}.sol"
+    foundry_file = output_dir / "src" / f"{program}.foundry.sol"
+    transaction_file = output_dir / "sol_tx" / f"{program}_transactions.txt"
+    array_to_code.render_program_solidity(sol_file, foundry_file, transaction_file,
+        graph, width, height, generator, sln, equality, smt_file, options.dispatch.value,
+        options.input_location.value, options.emission.value, options.shard_size)
+
+def exec_generation_in_process(setting: GenerationSetting) -> GenerationResult:
+    """
+    Generates the files of the generation.sh script without spawning any new process,
+    i.e. the expensive imports of the maze-gen modules are only paid once. The result
+    object is the same as for 'exec_generation_sh' and contains the captured output
+    and, in case of an error, the traceback as STDERR.
+    """
+    command_str = " ".join(generation_command(setting))
+    stdout, stderr = StringIO(), StringIO()
+    returncode = 0
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            run_maze_gen(setting)
+    except (Exception, SystemExit):
+        traceback.print_exc(file=stderr)
+        returncode = 1
+
+    return GenerationResult(setting, command_str, stdout.getvalue().encode(),
+        stderr.getvalue().encode(), returncode)
+
+def exec_generation(setting: GenerationSetting, engine: GenerationEngineKind) -> GenerationResult:
+    match engine:
+        case GenerationEngineKind.IN_PROCESS:
+            return exec_generation_in_process(setting)
+        case GenerationEngineKind.SHELL:
+            return exec_generation_sh(setting)
+
 def pick_random_smt_from_path(smt_dir: Path, rng: Random) -> Path:
     """
     Collects all SMT files inside of the provided directory and choses a
     random one using the provided random. This function fails if the passed
-    directory is empty or cannot be found.
+    directory is empty or cannot be found. If the directory contains an up to
+    date CVE pack (see scripts/build_cve_pack.py), the files are taken from
+    the pack instead of listing the directory.
     """ 
     assert smt_dir and smt_dir.is_dir, f"unable to locate SMT directory {smt_dir}"
-    smt_files = list(smt_dir.glob("*.smt2"))
+    smt_files = cve_cache.pack_files(smt_dir)
+    if smt_files is None:
+        smt_files = list(smt_dir.glob("*.smt2"))
     assert len(smt_files) > 0, f"no SMT files in folder {smt_dir}"
     return rng.choice(smt_files)
 
@@ -154,10 +349,12 @@ def random_generation_settings \
     , equalities: list[int]
     , cycles: list[int]
     , methods: list[MazeGenMethodKind]
+    , options: GenerationOptions = GenerationOptions()
     ) -> GenerationSetting:
     """
     Generates a generation setting object using the provided seed, dimension and output_dir.
-    The settings are picked at random using a new Random object seeded with the provided seed.
+    The settings are picked at random using a new Random object seeded with the provided seed,
+    the provided options are taken as they are.
     """
     rng = Random(seed) # get a local random
 
@@ -176,7 +373,7 @@ def random_generation_settings \
         case _:
             method = MazeGenerationMethod(method_kind)
 
-    return GenerationSetting(algorithm, dimension, maze_seed, cycle, method, output_dir)
+    return GenerationSetting(algorithm, dimension, maze_seed, cycle, method, output_dir, options)
 
 
 def check_generation_error(result: GenerationResult) -> bool:
@@ -215,7 +412,15 @@ def check_reachability_error(result: GenerationResult) -> bool:
     This is done by compiling the solidity contract and executing
     each step to reach the bug. If the compilation succeeded and the
     bug is reachable this function returns False, otherwise True.
+    The size of the compiled bytecode is recorded as 'bytecode_bytes'
+    counter of the timings, for sharded contracts it is the total of
+    the Maze contract and its shards. Every contract is checked against
+    the EVM contract size and initcode size limits on its own.
     """
+    # imported on demand since the EVM and compiler modules are slow to import
+    from utils.compiler_helper import compile_solidity_files
+    from utils.reachability_test import run_compiled_test
+
     alg, w, h, r, n, cyc, m = result.setting.program_entry.split(",")
 
     solidity_src = result.setting.output_dir / "src"
@@ -228,12 +433,79 @@ def check_reachability_error(result: GenerationResult) -> bool:
 
     assert solidity_path.is_file(), f"unable to locate file {solidity_path}"
 
-    if not run_reachability_test(solidity_path, solution_path):
+    # the batch compilation provides the shards of sharded contracts as dependencies
+    with stage("compile"):
+        compilation_result = compile_solidity_files([solidity_path])[solidity_path]
+    if compilation_result.success:
+        contracts = [compilation_result.bytecode] + compilation_result.dependencies
+        count("bytecode_bytes", sum(len(bytecode) // 2 for bytecode in contracts))
+        for bytecode in contracts:
+            for limit, description in [(EVM_CODE_SIZE_LIMIT, "contract size"), (EVM_INITCODE_SIZE_LIMIT, "initcode size")]:
+                if len(bytecode) // 2 > limit:
+                    logger.warning(f"{solidity_file} has a contract with {len(bytecode) // 2} bytes of bytecode, "
+                        f"which exceeds the EVM {description} limit of {limit} bytes")
+        with stage("reachability"):
+            reachable = run_compiled_test(compilation_result.abi, compilation_result.bytecode, solution_path,
+                dependencies=compilation_result.dependencies)
+    else:
+        for error in compilation_result.errors:
+            logger.error(error)
+        reachable = False
+
+    if not reachable:
         logger.error(f"Unable to compile solidity file {solidity_path}")
         return True # error
 
     return False # success
 
+def write_generation_info(setting: GenerationSetting, seed: int):
+    """
+    Appends the olympia and generation.sh command of an instance to the
+    reproducible_generation.sh and its entry to the programs.list of the
+    output directory in the settings.
+    """
+    output_dir = setting.output_dir
+    reproducible_sh = output_dir / "reproducible_generation.sh"
+    programs_list = output_dir / "programs.list"
+
+    with open(reproducible_sh, "a") as fh:
+        fh.write(f"# generation command: ./olympia --output {output_dir} --dimension {setting.dimension} --seed {seed}\n")
+        fh.write(" ".join(generation_command(setting)))
+        fh.write("\n")
+    with open(programs_list, "a") as fh:
+        fh.write(setting.program_entry)
+        fh.write("\n")
+
+def write_timing_info(setting: GenerationSetting, engine: GenerationEngineKind, total: float):
+    """
+    Appends the time spent in each generation stage of an instance, together with the
+    peak resident set size of the generating processes so far, as JSON line to the timings file
+    of the output directory. If profiling is enabled, the cProfile statistics of each
+    stage are stored inside of the profile folder.
+    """
+    output_dir = setting.output_dir
+    # the peak over the whole lifetime of the processes, not of this instance, i.e. with the
+    # in-process engine every instance also reports the peak of all instances generated before it
+    process_peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    record = \
+        { "program"             : setting.program_entry
+        , "engine"              : engine.value
+        , "total"               : total
+        , "stages"              : timer.durations
+        , "counters"            : timer.counters
+        , "process_peak_rss_kb" : process_peak_rss
+        }
+    with open(output_dir / TIMINGS_FILE, "a") as fh:
+        fh.write(json.dumps(record))
+        fh.write("\n")
+
+    if timer.profile:
+        profile_dir = output_dir / PROFILE_FOLDER
+        profile_dir.mkdir(exist_ok=True)
+        for stage_name, profile in timer.profiles.items():
+            profile.dump_stats(profile_dir / f"{setting.program_name}.{stage_name}.prof")
+
 def generate \
     ( seed: int
     , dimension: int
@@ -243,12 +515,19 @@ def generate \
     , cycles: list[int]
     , methods: list[MazeGenMethodKind]
     , disable_check: bool
+    , engine: GenerationEngineKind = GenerationEngineKind.IN_PROCESS
+    , profile: bool = False
+    , options: GenerationOptions = GenerationOptions()
     ) -> bool:
     """
     This function generates a single entry of a benchmark. The maze used for this
     instance will have the provided dimensions and other settings are picked at random.
     Additionally, if the `disable_check` is False, the generated contract is tested for
-    compilation errors and if the bug is reachable.
+    compilation errors and if the bug is reachable. The `engine` selects if the files
+    are generated inside of this process or by calling the generation.sh script.
+    The time of each stage is recorded and if `profile` is set, each stage is profiled.
+    The `options` are used for every instance (see `GenerationOptions` and the help of
+    the corresponding command line arguments in `add_generation_options`).
     """
     assert dimension >= 5, "unable to deal with dimension of <5"
     assert CVE_FOLDER and CVE_FOLDER.is_dir, f"unable to find CVE folder {CVE_FOLDER}"
@@ -258,15 +537,16 @@ def generate \
         os.mkdir(output_dir)
     output_dir = output_dir.absolute()
 
-    # debug and reproducibility
-    reproducible_sh = output_dir / "reproducible_generation.sh"
-    programs_list = output_dir / "programs.list"
     success = True # default is true
+    timer.reset()
+    timer.profile = profile
+    start = time.perf_counter()
 
     # generate setting and files
     gen_setting = random_generation_settings(seed, dimension, output_dir,
-        algorithms, equalities, cycles, methods)
-    generation_result = exec_generation_sh(gen_setting)
+        algorithms, equalities, cycles, methods, options)
+    with stage("generation"):
+        generation_result = exec_generation(gen_setting, engine)
 
     # check for problems and reachability
     if check_generation_error(generation_result):
@@ -275,13 +555,9 @@ def generate \
         if check_reachability_error(generation_result):
             success = False
 
-    # finalize by writing the generation info
-    with open(reproducible_sh, "a") as fh:
-        fh.write(f"# generation command: ./olympia --output {output_dir} --dimension {dimension} --seed {seed}\n")
-        fh.write(f"{generation_result.command}\n")
-    with open(programs_list, "a") as fh:
-        fh.write(gen_setting.program_entry)
-        fh.write("\n")
+    # finalize by writing the generation and timing info
+    write_generation_info(gen_setting, seed)
+    write_timing_info(gen_setting, engine, time.perf_counter() - start)
 
     return success
 
@@ -302,6 +578,52 @@ def dimension_value(x) -> int:
         raise ArgumentTypeError("dimensions must be greater than 5")
     return x
 
+def shard_size_value(x) -> int:
+    x = int(x)
+    if x < 0:
+        raise ArgumentTypeError("shard size must not be negative")
+    return x
+
+def add_generation_options(parser: ArgumentParser):
+    """
+    Adds the arguments of the 'GenerationOptions' to the parser, see 'GenerationOptions.from_args'.
+    """
+    parser.add_argument("--maze-exit"
+        , help="regenerate mazes until the default exit has the target solution length or pick an exit with the target solution length"
+        , type=MazeExitKind
+        , choices=list(MazeExitKind)
+        , default=MazeExitKind.DEFAULT
+        )
+    parser.add_argument("--disable-text-export"
+        , help="only store the binary maze files in OUTPUT_DIR/maze and skip the human-readable txt and sln files"
+        , action='store_true'
+        , default=False
+        )
+    parser.add_argument("--dispatch"
+        , help="compare the current cell with every cell in turn or use a binary search inside of the step function"
+        , type=DispatchKind
+        , choices=list(DispatchKind)
+        , default=DispatchKind.LINEAR
+        )
+    parser.add_argument("--input-location"
+        , help="copy the step input into memory or let the cell functions read it from calldata"
+        , type=InputLocationKind
+        , choices=list(InputLocationKind)
+        , default=InputLocationKind.MEMORY
+        )
+    parser.add_argument("--emission"
+        , help="emit a function per cell or share routines among the cells with the same guards"
+        , type=EmissionKind
+        , choices=list(EmissionKind)
+        , default=EmissionKind.CELLS
+        )
+    parser.add_argument("--shard-size"
+        , metavar="CELLS"
+        , help="distribute the cell functions over several contracts of at most CELLS cells (0 disables sharding)"
+        , type=shard_size_value
+        , default=0
+        )
+
 def get_arg_parser() -> ArgumentParser:
     parser = ArgumentParser(
         prog="Olympia",
@@ -331,7 +653,7 @@ def get_arg_parser() -> ArgumentParser:
         , nargs="+"
         , type=MazeGenAlgorithmKind
         , choices=list(MazeGenAlgorithmKind)
-        , default=list(MazeGenAlgorithmKind)
+        , default=DEFAULT_ALGORITHMS
         )
     parser.add_argument("-e", "--equality"
         , help="list of equality percentages"
@@ -357,6 +679,18 @@ def get_arg_parser() -> ArgumentParser:
         , action='store_true'
         , default=False
         )
+    parser.add_argument("--engine"
+        , help="generate the files inside of the olympia process or by calling scripts/generate.sh"
+        , type=GenerationEngineKind
+        , choices=list(GenerationEngineKind)
+        , default=GenerationEngineKind.IN_PROCESS
+        )
+    parser.add_argument("--profile"
+        , help=f"stores cProfile statistics of each generation stage inside of OUTPUT_DIR/{PROFILE_FOLDER}"
+        , action='store_true'
+        , default=False
+        )
+    add_generation_options(parser)
     return parser
 
 if __name__ == "__main__":
@@ -374,8 +708,11 @@ if __name__ == "__main__":
     cycles = args.cycle
     methods = args.method
     disable_check = args.disable_reachability_check
+    engine = args.engine
+    profile = args.profile
+    options = GenerationOptions.from_args(args)
 
     success = generate(seed, dimension, output_dir, algorithms,
-        equalities, cycles, methods, disable_check)
+        equalities, cycles, methods, disable_check, engine, profile, options)
     
     exit(0 if success else 1)
\ No newline at end of file
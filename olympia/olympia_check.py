@@ -0,0 +1,144 @@
+from pathlib import Path
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+
+from utils.compiler_helper import compile_solidity_sources, CompilationResult, DEFAULT_BATCH_SIZE
+from utils.reachability_test import run_compiled_test, get_benchmark_instances, ExecutionBackendKind
+from utils.custom_logging import logger
+
+REPORT_FILE = "reachability_report.json"
+
+# ====================================================
+# Reachability Check Logic
+# ====================================================
+
+def check_instances(instances: list[tuple[Path, Path]], backend: ExecutionBackendKind) -> list[dict]:
+    """
+    Worker function of the reachability check. The contracts of all instances are compiled
+    in a single batch and executed on the EVM of the worker process, i.e. the compiler and EVM
+    stay warm for all instances of the worker. Returns a report entry for each instance.
+
+    Failures are recorded in the entry of the affected instance, e.g. a missing contract file
+    of an instance that failed during generation, and never abort the check of the other instances.
+    """
+    entries, sources = [], dict()
+    for contract_file, solution_file in instances:
+        entry = { "contract": contract_file.as_posix(), "solution": solution_file.as_posix()
+                , "success": False, "error": None }
+        try:
+            with open(contract_file, "r") as fp:
+                content = fp.read()
+            if content:
+                sources[contract_file.as_posix()] = content
+            else:
+                entry["error"] = f"unable to read content of file {contract_file}"
+        except OSError as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+        entries.append(entry)
+
+    try:
+        compilation_results = compile_solidity_sources(sources)
+    except Exception as e:
+        # e.g. a missing compiler, which fails the instances of this worker only
+        compilation_results = { name: CompilationResult(errors=[f"{type(e).__name__}: {e}"]) for name in sources }
+
+    for entry, (contract_file, solution_file) in zip(entries, instances):
+        if entry["error"]:
+            continue
+        compilation_result = compilation_results[contract_file.as_posix()]
+        if not compilation_result.success:
+            entry["error"] = "\n".join(compilation_result.errors)
+        else:
+            try:
+                entry["success"] = run_compiled_test(compilation_result.abi,
+                    compilation_result.bytecode, solution_file, backend, compilation_result.dependencies)
+                if not entry["success"]:
+                    entry["error"] = "bug not reached"
+            except Exception as e:
+                entry["error"] = f"{type(e).__name__}: {e}"
+    return entries
+
+def check(benchmark_dir: Path, report_file: Path, jobs: int, backend: ExecutionBackendKind) -> bool:
+    """
+    Checks all instances of the programs.list inside of the benchmark folder for compilation
+    errors and if the bug is reachable. The instances are split into chunks which are checked by
+    a pool of 'jobs' processes. The results are written as JSON report to the 'report_file'.
+    """
+    instances = get_benchmark_instances(benchmark_dir)
+    assert instances, f"no instances found in {benchmark_dir / 'programs.list'}"
+
+    # every job gets at least one chunk, but chunks are not larger than a compilation batch
+    chunk_size = max(1, min(DEFAULT_BATCH_SIZE, -(-len(instances) // jobs)))
+    chunks = [ instances[start:start+chunk_size] for start in range(0, len(instances), chunk_size) ]
+
+    entries = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for chunk_entries in executor.map(check_instances, chunks, [backend] * len(chunks)):
+            entries.extend(chunk_entries)
+            logger.info(f"Checked: {len(entries)}/{len(instances)}")
+
+    passed = sum(1 for entry in entries if entry["success"])
+    report = \
+        { "benchmark" : benchmark_dir.absolute().as_posix()
+        , "total"     : len(entries)
+        , "passed"    : passed
+        , "failed"    : len(entries) - passed
+        , "instances" : entries
+        }
+    with open(report_file, "w") as fh:
+        json.dump(report, fh, indent=2)
+
+    for entry in entries:
+        if not entry["success"]:
+            logger.error(f"{entry['contract']}: {entry['error']}")
+    logger.info(f"{passed}/{len(entries)} instances passed, report written to {report_file}")
+    return passed == len(entries)
+
+# ====================================================
+# Implementation of Command line Client
+# ====================================================
+
+def get_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="Olympia Check",
+        description="Checks the contracts of a generated benchmark folder for \
+                     compilation errors and if their bug is reachable")
+
+    parser.add_argument("-i", "--input"
+        , metavar="BENCHMARK_DIR"
+        , type=Path
+        , help="path to the generated benchmark folder"
+        , required=True
+        )
+    parser.add_argument("-r", "--report"
+        , metavar="REPORT_FILE"
+        , type=Path
+        , help=f"path to the JSON report (default: BENCHMARK_DIR/{REPORT_FILE})"
+        )
+    parser.add_argument("-j", "--jobs"
+        , metavar="JOBS"
+        , type=int
+        , help="amount of parallel worker processes"
+        , default=os.cpu_count()
+        )
+    parser.add_argument("--backend"
+        , help="execution backend used to replay the transactions"
+        , type=ExecutionBackendKind
+        , choices=list(ExecutionBackendKind)
+        , default=ExecutionBackendKind.PY_EVM
+        )
+    return parser
+
+if __name__ == "__main__":
+    parser = get_arg_parser()
+    args = parser.parse_args()
+    benchmark_dir = args.input
+    report_file = args.report if args.report else benchmark_dir / REPORT_FILE
+    jobs = args.jobs
+    backend = args.backend
+
+    success = check(benchmark_dir, report_file, jobs, backend)
+
+    exit(0 if success else 1)
@@ -2,6 +2,10 @@ from pathlib import Path
 from random import Random
 from argparse import ArgumentParser
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from tempfile import mkdtemp
+import os
+import shutil
 
 import olympia
 from utils.custom_logging import logger
@@ -20,13 +24,22 @@ def generate \
     , cycles: list[int]
     , methods: list[olympia.MazeGenMethodKind]
     , disable_compile_check: bool
+    , engine: olympia.GenerationEngineKind = olympia.GenerationEngineKind.IN_PROCESS
+    , jobs: int = 1
+    , profile: bool = False
+    , options: olympia.GenerationOptions = olympia.GenerationOptions()
     ) -> bool:
     """
     Wrapper for the olympia benchmark instance generation. This wrapper takes a list of dimensions
     and how many instances each if these dimensions should have. Then it calls olympia this many times
     for each dimension to generate the instances. The whole generation is deterministic and based on the
-    provided seed.
+    provided seed. If more than one job is requested, the instances are generated in parallel (see
+    'generate_parallel').
     """
+    if jobs > 1:
+        return generate_parallel(seed, dimensions, instances, output_dir, algorithms,
+            equalities, cycles, methods, disable_compile_check, engine, jobs, profile, options)
+
     rng = Random(seed)
     dimensions_size = len(dimensions)
     dimensions_count = 1
@@ -40,13 +53,114 @@ def generate \
             methods_str = " ".join(map(str, methods))
             logger.debug(f"./olympia.py -s {instance_seed} -d {dimension} -o {output_dir} -a {algorithms_str} -c {cycles_str} -m {methods_str} -e {equalities_str}")
             success = olympia.generate(instance_seed, dimension, output_dir,
-                algorithms, equalities, cycles, methods, disable_compile_check)
+                algorithms, equalities, cycles, methods, disable_compile_check, engine, profile, options)
             logger.info(f"Dimensions: {dimensions_count}/{dimensions_size}  Instance: {instance+1}/{instances}")
             if not success:
                 logger.warning("Wrapper stopped due to error(s)...")
                 return False # exit failure
     return True # exit success
 
+def generate_instance \
+    ( instance_seed: int
+    , dimension: int
+    , scratch_dir: Path
+    , algorithms: list[olympia.MazeGenAlgorithmKind]
+    , equalities: list[int]
+    , cycles: list[int]
+    , methods: list[olympia.MazeGenMethodKind]
+    , disable_compile_check: bool
+    , engine: olympia.GenerationEngineKind
+    , profile: bool
+    , options: olympia.GenerationOptions
+    ) -> bool:
+    """
+    Worker function of the parallel generation. The instance is generated inside of its own
+    scratch directory, which is also used as working directory since the generate.sh
+    script creates its intermediate files inside of the current working directory.
+    """
+    os.chdir(scratch_dir)
+    return olympia.generate(instance_seed, dimension, scratch_dir,
+        algorithms, equalities, cycles, methods, disable_compile_check, engine, profile, options)
+
+def merge_scratch_dir(scratch_dir: Path, output_dir: Path):
+    """
+    Moves the generated files of a scratch directory into the output directory and removes
+    the scratch directory. The generation info is not moved since it contains the path of
+    the scratch directory and is written again for the output directory. The timing records
+    are appended to the ones of the output directory.
+    """
+    for file in sorted(scratch_dir.rglob("*")):
+        target = output_dir / file.relative_to(scratch_dir)
+        if file.is_dir():
+            target.mkdir(exist_ok=True)
+        elif file.parent == scratch_dir and file.name == olympia.TIMINGS_FILE:
+            with open(file, "r") as src, open(target, "a") as dst:
+                dst.write(src.read())
+        elif file.parent != scratch_dir or \
+            file.name not in ["programs.list", "reproducible_generation.sh"]:
+            os.replace(file, target)
+    shutil.rmtree(scratch_dir)
+
+def generate_parallel \
+    ( seed: int
+    , dimensions: list[int]
+    , instances: int
+    , output_dir: Path
+    , algorithms: list[olympia.MazeGenAlgorithmKind]
+    , equalities: list[int]
+    , cycles: list[int]
+    , methods: list[olympia.MazeGenMethodKind]
+    , disable_compile_check: bool
+    , engine: olympia.GenerationEngineKind
+    , jobs: int
+    , profile: bool
+    , options: olympia.GenerationOptions
+    ) -> bool:
+    """
+    Parallel version of the wrapper generation. All instance seeds are drawn up front, in the
+    same order as the sequential generation, and the instances are generated by a pool of
+    'jobs' processes, each inside of an isolated scratch directory. The results are merged
+    in order such that the programs.list and reproducible_generation.sh are the same as for
+    a sequential run. Like the sequential generation, no instance after the first failing
+    one is kept.
+    """
+    rng = Random(seed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_dir = output_dir.absolute()
+
+    tasks = []
+    for dimension in dimensions:
+        for instance in range(instances):
+            tasks.append((rng.randint(100000, 999999), dimension))
+
+    futures = []
+    success = True
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for instance_seed, dimension in tasks:
+                scratch_dir = Path(mkdtemp(prefix=".scratch_", dir=output_dir))
+                future = executor.submit(generate_instance, instance_seed, dimension, scratch_dir,
+                    algorithms, equalities, cycles, methods, disable_compile_check, engine, profile, options)
+                futures.append((future, scratch_dir))
+
+            for count, ((instance_seed, dimension), (future, scratch_dir)) in enumerate(zip(tasks, futures), start=1):
+                success = future.result()
+                merge_scratch_dir(scratch_dir, output_dir)
+                setting = olympia.random_generation_settings(instance_seed, dimension, output_dir,
+                    algorithms, equalities, cycles, methods, options)
+                olympia.write_generation_info(setting, instance_seed)
+                logger.info(f"Instance: {count}/{len(tasks)}")
+                if not success:
+                    logger.warning("Wrapper stopped due to error(s)...")
+                    executor.shutdown(cancel_futures=True)
+                    break
+    finally:
+        # discard the scratch directories of instances that were not merged
+        for _, scratch_dir in futures:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    return success
+
 # ====================================================
 # Implementation of Command line Client
 # ====================================================
@@ -86,7 +200,7 @@ def get_arg_parser() -> ArgumentParser:
         , nargs="+"
         , type=olympia.MazeGenAlgorithmKind
         , choices=list(olympia.MazeGenAlgorithmKind)
-        , default=list(olympia.MazeGenAlgorithmKind)
+        , default=olympia.DEFAULT_ALGORITHMS
         )
     parser.add_argument("-e", "--equality"
         , help="list of equality percentages"
@@ -112,6 +226,24 @@ def get_arg_parser() -> ArgumentParser:
         , action='store_true'
         , default=False
         )
+    parser.add_argument("-j", "--jobs"
+        , metavar="JOBS"
+        , type=int
+        , help="amount of instances generated in parallel"
+        , default=1
+        )
+    parser.add_argument("--engine"
+        , help="generate the files inside of the olympia process or by calling scripts/generate.sh"
+        , type=olympia.GenerationEngineKind
+        , choices=list(olympia.GenerationEngineKind)
+        , default=olympia.GenerationEngineKind.IN_PROCESS
+        )
+    parser.add_argument("--profile"
+        , help=f"stores cProfile statistics of each generation stage inside of OUTPUT_DIR/{olympia.PROFILE_FOLDER}"
+        , action='store_true'
+        , default=False
+        )
+    olympia.add_generation_options(parser)
     return parser
 
 if __name__ == "__main__":
@@ -130,8 +262,12 @@ if __name__ == "__main__":
     cycles = args.cycle
     methods = args.method
     disable_check = args.disable_reachability_check
+    engine = args.engine
+    jobs = args.jobs
+    profile = args.profile
+    options = olympia.GenerationOptions.from_args(args)
 
     success = generate(seed, dimensions, instances, output,
-        algorithms, equalities, cycles, methods, disable_check)
+        algorithms, equalities, cycles, methods, disable_check, engine, jobs, profile, options)
 
     exit(0 if success else 1)
\ No newline at end of file
@@ -1,35 +1,188 @@
 from pathlib import Path
+from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+import re
+import shutil
 
 import solcx
-from solcx.exceptions import SolcError
+from solcx.exceptions import SolcError, SolcNotInstalled
 
-# install the 0.8.26 version of solidity
+# the 0.8.26 version of solidity is required, a specific binary can be provided
+# using the environment variable, otherwise the local solcx installation or the
+# solc binary on the PATH is used.
 __SOLC_VERSION = "0.8.26"
-__SOLC_VERSION_SINGLETON = None
-def get_solc_version():
-    global __SOLC_VERSION_SINGLETON
-    if __SOLC_VERSION_SINGLETON == None:
-        __SOLC_VERSION_SINGLETON = solcx.install_solc(version=__SOLC_VERSION)
-    return __SOLC_VERSION_SINGLETON
+SOLC_BINARY_ENV = "OLYMPIA_SOLC_BINARY"
 
-def compile_solidity_source(source: str) -> tuple[list[dict], str]:
+def resolve_solc_binary() -> Path:
+    """
+    Resolves the solc binary from the local machine without installing anything, i.e.
+    this function never accesses the network. If no binary with the required version
+    can be found, an exception containing the installation instructions is raised.
+    """
+    candidates = []
+    if os.environ.get(SOLC_BINARY_ENV):
+        candidates.append(Path(os.environ[SOLC_BINARY_ENV]))
+    if __SOLC_VERSION in map(str, solcx.get_installed_solc_versions()):
+        candidates.append(solcx.get_executable(__SOLC_VERSION))
+    if shutil.which("solc"):
+        candidates.append(Path(shutil.which("solc")))
+
+    for candidate in candidates:
+        if candidate.is_file() and str(solcx.wrapper.get_solc_version(candidate)) == __SOLC_VERSION:
+            return candidate
+
+    raise SolcNotInstalled(
+        f"solc {__SOLC_VERSION} is not installed, either install it with "
+        f"`python -c \"import solcx; solcx.install_solc('{__SOLC_VERSION}')\"` "
+        f"or set {SOLC_BINARY_ENV} to the path of a solc {__SOLC_VERSION} binary")
+
+__SOLC_BINARY_SINGLETON = None
+def get_solc_binary() -> Path:
+    global __SOLC_BINARY_SINGLETON
+    if __SOLC_BINARY_SINGLETON == None:
+        __SOLC_BINARY_SINGLETON = resolve_solc_binary()
+    return __SOLC_BINARY_SINGLETON
+
+def get_solc_version() -> str:
+    # the version is validated while resolving the binary
+    get_solc_binary()
+    return __SOLC_VERSION
+
+# canonical settings of the compiler, the options of the single compilation and the standard JSON
+# settings of the batch compilation are derived from them. Only these settings are part of the
+# compilation cache key, such that both compilation paths share their cache entries.
+COMPILER_SETTINGS = dict(via_ir=True, optimize_yul=True, optimize=True)
+
+# options passed to the compiler for single sources
+COMPILER_OPTIONS = dict(output_values=['abi', 'bin'], **COMPILER_SETTINGS)
+
+# the compilation cache can be configured using environment variables
+CACHE_DIR_ENV = "OLYMPIA_COMPILATION_CACHE"
+CACHE_SIZE_ENV = "OLYMPIA_COMPILATION_CACHE_MB"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "olympia" / "solc"
+DEFAULT_CACHE_SIZE_MB = 256
+
+class CompilationCache():
+    """
+    On-disk cache of compiled contracts. Every entry is a JSON file containing the
+    ABI, binary and dependencies (see 'CompilationResult'), named by the hash of the source, solc version and compiler options.
+    The cache is bounded by 'max_size' bytes, if it grows larger the least recently
+    used entries (by modification time, which is refreshed on every hit) are removed.
+    """
+
+    def __init__(self, directory: Path, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(source: str, solc_version: str, options: dict) -> str:
+        content = json.dumps([source, solc_version, options], sort_keys=True)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get(self, key: str) -> tuple[list[dict], str, list[str]] | None:
+        entry = self.directory / f"{key}.json"
+        try:
+            with open(entry, "r") as fp:
+                cached = json.load(fp)
+            # entries of former versions without dependencies are compiled again
+            cached = cached["abi"], cached["bin"], cached["dependencies"]
+            os.utime(entry) # mark as recently used
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return cached
+
+    def put(self, key: str, abi: list[dict], bytecode: str, dependencies: list[str]):
+        # write to a temporary file first such that parallel readers never see partial entries
+        entry = self.directory / f"{key}.json"
+        temporary = self.directory / f"{key}.{os.getpid()}.tmp"
+        with open(temporary, "w") as fp:
+            json.dump({"abi": abi, "bin": bytecode, "dependencies": dependencies}, fp)
+        os.replace(temporary, entry)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+        # remove the least recently used entries first
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass # already evicted by another process
+            total_size -= size
+
+    @property
+    def stats(self) -> str:
+        return f"hits: {self.hits}, misses: {self.misses}"
+
+__COMPILATION_CACHE_SINGLETON = None
+def get_compilation_cache() -> CompilationCache:
+    global __COMPILATION_CACHE_SINGLETON
+    if __COMPILATION_CACHE_SINGLETON == None:
+        directory = Path(os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR))
+        max_size = int(os.environ.get(CACHE_SIZE_ENV, DEFAULT_CACHE_SIZE_MB)) * 1024 * 1024
+        __COMPILATION_CACHE_SINGLETON = CompilationCache(directory, max_size)
+    return __COMPILATION_CACHE_SINGLETON
+
+def order_contracts(source: str, contracts: dict[str, dict]) -> list[dict]:
+    """
+    Returns the compiled contracts in the order of their declaration in the source,
+    since the compiler orders its output by the names of the contracts instead.
+    """
+    def declaration(name: str) -> int:
+        # the single compilation prefixes the names with the source name
+        match = re.search(rf"\bcontract\s+{re.escape(name.split(':')[-1])}\b", source)
+        return match.start() if match else -1
+    return [ contracts[name] for name in sorted(contracts, key=declaration) ]
+
+def compile_solidity_source(source: str, use_cache: bool = True) -> tuple[list[dict], str]:
     """
     This function uses the solcx compiler to compile the given solidity source.
     The compiler is configured to target the ABI and binary.
-    Finally the ABI and Binary objects are returned in form of a tuple.
+    Finally the ABI and Binary objects of the last contract of the source are
+    returned in form of a tuple, the contracts declared before it are its
+    dependencies (see 'CompilationResult') and only compiled by this function.
+    If 'use_cache' is set, previously compiled sources are loaded from the
+    compilation cache instead (see 'CompilationCache').
     """
 
+    solc_version = get_solc_version()
+    if use_cache:
+        cache = get_compilation_cache()
+        key = CompilationCache.key(source, solc_version, COMPILER_SETTINGS)
+        cached = cache.get(key)
+        if cached:
+            abi, bytecode, _ = cached
+            return abi, bytecode
+
     # compile the sources and specify that we need the abi and binary
-    compiled_solidity = solcx.compile_source(source, output_values=['abi', 'bin'], solc_version=get_solc_version(), via_ir=True, optimize_yul=True, optimize=True)
+    compiled_solidity = solcx.compile_source(source, solc_binary=get_solc_binary(), **COMPILER_OPTIONS)
 
     # retrieve and return the abi and binary of the solidity contract 
-    contract_id, contract_interface = compiled_solidity.popitem()
+    *dependencies, contract_interface = order_contracts(source, compiled_solidity)
     bytecode = contract_interface['bin']
     abi = contract_interface['abi']
 
+    if use_cache:
+        cache.put(key, abi, bytecode, [ dependency['bin'] for dependency in dependencies ])
+
     return abi, bytecode
 
-def compile_solidity_file(file: Path) -> tuple[list[dict], str]:
+def compile_solidity_file(file: Path, use_cache: bool = True) -> tuple[list[dict], str]:
     """
     The function takes a solidity source file and returns the compiled
     ABI and binary as a tuple. It is a small helper function to deal with
@@ -41,7 +194,132 @@ def compile_solidity_file(file: Path) -> tuple[list[dict], str]:
     with open(file, "r") as fp:
         content = fp.read()
     assert content, f"unable to read content of file {file}"
-    return compile_solidity_source(content)
+    return compile_solidity_source(content, use_cache)
+
+# standard JSON settings of the batch compilation, derived from the COMPILER_SETTINGS
+STANDARD_JSON_SETTINGS = \
+    { "optimizer": { "enabled": COMPILER_SETTINGS["optimize"], "details": { "yul": COMPILER_SETTINGS["optimize_yul"] } }
+    , "viaIR": COMPILER_SETTINGS["via_ir"]
+    , "outputSelection": { "*": { "*": [ "abi", "evm.bytecode.object" ] } }
+    }
+DEFAULT_BATCH_SIZE = 64
+
+@dataclass
+class CompilationResult():
+    """
+    The compiled last contract of a source. The creation code of the contracts declared before
+    it are its 'dependencies' in the order of the source, which have to be deployed on their own
+    (e.g. the shards of a sharded maze, whose addresses are passed to the constructor).
+    """
+    abi          : list[dict] | None = None
+    bytecode     : str | None = None
+    errors       : list[str] = field(default_factory=list)
+    dependencies : list[str] = field(default_factory=list)
+
+    @property
+    def success(self) -> bool:
+        return self.bytecode is not None
+
+def compile_standard_json_batch(sources: dict[str, str]) -> dict[str, CompilationResult]:
+    """
+    Compiles all sources with a single solc '--standard-json' invocation. Since solc does
+    not produce any bytecode if one of the sources contains an error, sources with errors
+    are removed and the remaining sources are compiled again. Errors without a source location
+    cannot be attributed to a source, in this case the remaining sources are compiled one by one.
+    """
+    results = dict()
+    pending = dict(sources)
+    while pending:
+        input_data = \
+            { "language": "Solidity"
+            , "sources": { name: { "content": content } for name, content in pending.items() }
+            , "settings": STANDARD_JSON_SETTINGS
+            }
+        try:
+            output = solcx.compile_standard(input_data, solc_binary=get_solc_binary())
+        except SolcError as e:
+            failed = set()
+            unattributed = []
+            for error in e.error_dict or []:
+                if error["severity"] != "error":
+                    continue
+                location = error.get("sourceLocation", {}).get("file")
+                if location in pending:
+                    results.setdefault(location, CompilationResult()).errors.append(error["formattedMessage"])
+                    failed.add(location)
+                else: # e.g. a stack too deep error of the IR pipeline or an internal compiler error
+                    unattributed.append(error["formattedMessage"])
+            for name in failed:
+                del pending[name]
+            if not failed and not unattributed: # solc failed without reporting any error
+                unattributed.append(str(e))
+            if unattributed and pending:
+                if len(pending) == 1:
+                    name, = pending
+                    results.setdefault(name, CompilationResult()).errors.extend(unattributed)
+                else:
+                    # the errors cannot be attributed to a source of the batch, hence every remaining
+                    # source is compiled on its own such that only the failing ones are reported
+                    for name, content in pending.items():
+                        results.update(compile_standard_json_batch({ name: content }))
+                break
+            continue
+
+        for name in pending:
+            # similar to the single compilation, the last contract of a source is used
+            *dependencies, contract = order_contracts(pending[name], output["contracts"][name])
+            results[name] = CompilationResult(contract["abi"], contract["evm"]["bytecode"]["object"],
+                dependencies=[ dependency["evm"]["bytecode"]["object"] for dependency in dependencies ])
+        break
+    return results
+
+def compile_solidity_sources(sources: dict[str, str], use_cache: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE) -> dict[str, CompilationResult]:
+    """
+    Compiles many solidity sources at once. The sources are passed as a dictionary mapping
+    a unique name to the source code and are compiled in batches of 'batch_size' sources per
+    solc invocation. In contrast to 'compile_solidity_source', compilation errors do not
+    raise an exception but are returned as part of the per-source result.
+    """
+
+    results = dict()
+    uncached = dict()
+    if use_cache:
+        cache = get_compilation_cache()
+        solc_version = get_solc_version()
+    for name, source in sources.items():
+        cached = cache.get(CompilationCache.key(source, solc_version, COMPILER_SETTINGS)) if use_cache else None
+        if cached:
+            abi, bytecode, dependencies = cached
+            results[name] = CompilationResult(abi, bytecode, dependencies=dependencies)
+        else:
+            uncached[name] = source
+
+    names = list(uncached)
+    for start in range(0, len(names), batch_size):
+        batch = { name: uncached[name] for name in names[start:start+batch_size] }
+        for name, result in compile_standard_json_batch(batch).items():
+            if use_cache and result.success:
+                key = CompilationCache.key(batch[name], solc_version, COMPILER_SETTINGS)
+                cache.put(key, result.abi, result.bytecode, result.dependencies)
+            results[name] = result
+
+    # keep the order of the provided sources
+    return { name: results[name] for name in sources }
+
+def compile_solidity_files(files: list[Path], use_cache: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE) -> dict[Path, CompilationResult]:
+    """
+    File handling helper for 'compile_solidity_sources'. The files are compiled
+    in batches and the results are returned for each of the provided files.
+    """
+    sources = dict()
+    for file in files:
+        assert file, f"unable to locate or open solidity file '{file}'"
+        with open(file, "r") as fp:
+            sources[file.as_posix()] = fp.read()
+    results = compile_solidity_sources(sources, use_cache, batch_size)
+    return { file: results[file.as_posix()] for file in files }
 
 def is_compilable_solidity_file(file: Path):
     """
@@ -6,5 +6,8 @@ GREEN = "\033[92m"
 YELLOW = "\033[33m"
 RESET = "\033[0m"
 
+# only the olympia logger logs on debug level, the root logger keeps its default level such that the
+# libraries imported by the in-process generation (e.g. matplotlib and PIL) only log their warnings
 logger = logging.getLogger("olympia")
-logging.basicConfig(format='[%(asctime)s] %(levelname)s: %(message)s', level=logging.DEBUG)
\ No newline at end of file
+logger.setLevel(logging.DEBUG)
+logging.basicConfig(format='[%(asctime)s] %(levelname)s: %(message)s')
\ No newline at end of file
@@ -0,0 +1,91 @@
+from contextlib import contextmanager
+
+from eth.abc import ComputationAPI
+from eth.vm.message import Message
+from eth.constants import CREATE_CONTRACT_ADDRESS
+from eth._utils.address import generate_contract_address
+from eth_tester.backends.pyevm.main import setup_tester_chain
+
+# most messages require gas, since gas does not matter
+# to us we can always use a fixed large amount.
+DEFAULT_MESSAGE_GAS = 300000000
+
+# the dependencies of a contract are deployed at consecutive addresses from this one on, which
+# are the addresses of the shards of a sharded maze (see maze-gen/array_to_code.py SHARD_ADDRESS_BASE)
+DEPENDENCY_ADDRESS_BASE = 0x5a000000
+
+class EVMExecutor():
+    """
+    Minimal execution environment that drives py-evm directly. In contrast to a web3
+    provider no transactions are signed, mined or looked up, instead the contract creation
+    and calls are applied as plain messages to the state of a single long-lived chain.
+    Changes of a test can be discarded using the 'isolated' context manager.
+    """
+
+    def __init__(self):
+        account_keys, chain = setup_tester_chain(num_accounts=1)
+        self.sender = account_keys[0].public_key.to_canonical_address()
+        self.state = chain.get_vm().state
+        self.contract_address = generate_contract_address(self.sender, 0)
+
+    def transaction_context(self):
+        return self.state.get_transaction_context_class()(gas_price=0, origin=self.sender)
+
+    @contextmanager
+    def isolated(self):
+        """
+        Takes a snapshot of the state and reverts all changes done inside of the context.
+        """
+        snapshot = self.state.snapshot()
+        try:
+            yield self
+        finally:
+            self.state.revert(snapshot)
+
+    def deploy(self, bytecode: bytes, address: bytes | None = None) -> ComputationAPI:
+        """
+        Runs the provided creation bytecode and stores the contract at 'address', which
+        defaults to 'contract_address', the contract of all calls.
+        """
+        message = Message(
+            gas=DEFAULT_MESSAGE_GAS,
+            to=CREATE_CONTRACT_ADDRESS,
+            create_address=address or self.contract_address,
+            sender=self.sender,
+            value=0,
+            data=b"",
+            code=bytecode,
+        )
+        computation_class = self.state.computation_class
+        return computation_class.apply_create_message(self.state, message, self.transaction_context())
+
+    def call(self, data: bytes) -> ComputationAPI:
+        """
+        Calls the deployed contract with the provided calldata.
+        """
+        message = Message(
+            gas=DEFAULT_MESSAGE_GAS,
+            to=self.contract_address,
+            sender=self.sender,
+            value=0,
+            data=data,
+            code=self.state.get_code(self.contract_address),
+        )
+        computation_class = self.state.computation_class
+        return computation_class.apply_message(self.state, message, self.transaction_context())
+
+    def dependency_address(self, index: int) -> bytes:
+        """
+        Returns the address of the dependency 'index' of the contract (see 'DEPENDENCY_ADDRESS_BASE').
+        """
+        return (DEPENDENCY_ADDRESS_BASE + index).to_bytes(20, "big")
+
+    def get_storage(self, slot: int) -> int:
+        return self.state.get_storage(self.contract_address, slot)
+
+__EVM_EXECUTOR_SINGLETON = None
+def get_evm_executor() -> EVMExecutor:
+    global __EVM_EXECUTOR_SINGLETON
+    if __EVM_EXECUTOR_SINGLETON == None:
+        __EVM_EXECUTOR_SINGLETON = EVMExecutor()
+    return __EVM_EXECUTOR_SINGLETON
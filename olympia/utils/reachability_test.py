@@ -1,6 +1,6 @@
 #!/bin/python
 
-from typing import Any
+from typing import Any, TYPE_CHECKING
 
 import eth
 
@@ -11,21 +11,35 @@ import eth
 eth.vm.forks.spurious_dragon.computation.EIP170_CODE_SIZE_LIMIT = 100000000
 eth.vm.forks.shanghai.computation.MAX_INITCODE_SIZE = 100000000
 
-from web3 import Web3, EthereumTesterProvider
-from web3.contract.contract import Contract
+from eth_abi import encode as abi_encode
+from eth_utils import decode_hex, function_signature_to_4byte_selector
 
-from solcx.exceptions import SolcError
 from pathlib import Path
+from enum import StrEnum
 import sys
 
-from .compiler_helper import compile_solidity_file
+from .compiler_helper import compile_solidity_files, get_compilation_cache
 from .custom_logging import logger
+from .evm_executor import get_evm_executor
+
+# web3 is only imported if the web3 backend is used
+if TYPE_CHECKING:
+    from web3 import Web3
+    from web3.contract.contract import Contract
 
 # most transactions require gas, since gas does not matter
 # to us we can always use a fixed large amount.
 DEFAULT_DEPLOY_GAS = 300000000
 
-def deploy_contract(w3: Web3, abi: list, bytecode: str) -> Contract:
+# function selectors of the generated contracts
+STEP_SELECTOR = function_signature_to_4byte_selector("step(int8[])")
+BUG_SELECTOR = function_signature_to_4byte_selector("bug()")
+
+class ExecutionBackendKind(StrEnum):
+    PY_EVM = "py-evm"
+    WEB3   = "web3"
+
+def deploy_contract(w3: "Web3", abi: list, bytecode: str) -> "Contract":
     """
     Deploys an ABI and binary on a given web3 context.
     The return value contains a deployed contract.
@@ -41,10 +55,11 @@ def deploy_contract(w3: Web3, abi: list, bytecode: str) -> Contract:
     contract_deployed = w3.eth.contract(address=deployed_address, abi=abi)
     return contract_deployed
 
-def setup_web3() -> Web3:
+def setup_web3() -> "Web3":
     """
     Returns a default Web3 context with a mocked / test blockchain.
     """
+    from web3 import Web3, EthereumTesterProvider
 
     # instantiate the test provider
     w3 = Web3(EthereumTesterProvider())
@@ -77,7 +92,132 @@ def parse_solution_file(file: Path) -> list[Any]:
     assert solution, f"unable to parse a solution list from {file}"
     return solution
 
-def run_test(contract_file: Path, solution_file: Path) -> bool:
+def run_test(contract_file: Path, solution_file: Path,
+        backend: ExecutionBackendKind = ExecutionBackendKind.PY_EVM) -> bool:
+
+    # a single instance is compiled as a batch as well to retrieve the dependencies of the contract
+    return run_tests([(contract_file, solution_file)], backend)[0]
+
+def run_tests(instances: list[tuple[Path, Path]],
+        backend: ExecutionBackendKind = ExecutionBackendKind.PY_EVM) -> list[bool]:
+    """
+    Runs the reachability test for a list of contract and solution file pairs. In contrast
+    to calling 'run_test' for each pair, all contracts are compiled in batches first.
+    """
+
+    compilation_results = compile_solidity_files([ contract_file for contract_file, _ in instances ])
+    logger.debug(f"-> compilation cache {get_compilation_cache().stats}")
+
+    results = []
+    for contract_file, solution_file in instances:
+        compilation_result = compilation_results[contract_file]
+        if not compilation_result.success:
+            for error in compilation_result.errors:
+                logger.error(error)
+            results.append(False)
+            continue
+        logger.debug(f"-> successful compilation of {contract_file.as_posix()}")
+        results.append(run_compiled_test(compilation_result.abi, compilation_result.bytecode,
+            solution_file, backend, compilation_result.dependencies))
+    return results
+
+def get_benchmark_instances(benchmark_dir: Path) -> list[tuple[Path, Path]]:
+    """
+    Reads the programs.list of a benchmark folder and returns the paths of
+    the solidity contract and transaction solution file of every instance.
+    """
+
+    instances = []
+    with open(benchmark_dir / "programs.list", "r") as fp:
+        for line in fp.readlines():
+            if not line.strip():
+                continue
+            alg, w, h, r, n, cyc, m = line.strip().split(",")
+            base_name = f"{alg}_{w}x{h}_{r}_{n}_{cyc}_{m}"
+            contract_file = benchmark_dir / "src" / f"{base_name}.sol"
+            solution_file = benchmark_dir / "sol_tx" / f"{base_name}_transactions.txt"
+            instances.append((contract_file, solution_file))
+    return instances
+
+def run_folder_test(benchmark_dir: Path,
+        backend: ExecutionBackendKind = ExecutionBackendKind.PY_EVM) -> dict[Path, bool]:
+    """
+    Runs the reachability test for all instances of a generated benchmark folder and
+    returns the result for each of the solidity contracts.
+    """
+
+    instances = get_benchmark_instances(benchmark_dir)
+    results = run_tests(instances, backend)
+    return { contract_file: result for (contract_file, _), result in zip(instances, results) }
+
+def run_compiled_test(abi: list, bytecode: str, solution_file: Path,
+        backend: ExecutionBackendKind = ExecutionBackendKind.PY_EVM, dependencies: list[str] = []) -> bool:
+    """
+    Deploys the compiled contract and checks if the bug is reachable by calling
+    the 'step' function with the values of the solution file. The 'dependencies'
+    of the contract (see 'CompilationResult') are deployed first at their fixed
+    addresses, which is only supported by the py-evm backend.
+    """
+    match backend:
+        case ExecutionBackendKind.PY_EVM:
+            return run_compiled_test_py_evm(bytecode, solution_file, dependencies)
+        case ExecutionBackendKind.WEB3:
+            return run_compiled_test_web3(abi, bytecode, solution_file, dependencies)
+
+def decode_next_cell(slot_0: int) -> int:
+    # 'next_cell' is an 8 byte entry on the first slot (slot 0). Since it is packed together with
+    # the 'bug' and 'stop' boolean we have to shift it out of the 32 byte slot.
+    # SLOT_0 := [ unused (22 bytes) | next_cell (8 bytes) | stop (1 byte) | bug (1 byte) ]
+    next_cell = (slot_0 >> 16) & 0xFFFFFFFFFFFFFFFF
+    # finally we sign extend the 64 bit value
+    return next_cell - (1 << 64) if next_cell >> 63 else next_cell
+
+def run_compiled_test_py_evm(bytecode: str, solution_file: Path, dependencies: list[str] = []) -> bool:
+    """
+    Reachability test on the long-lived py-evm executor of this process. The steps are
+    applied as plain message calls and all changes are reverted after the test.
+    """
+
+    executor = get_evm_executor()
+
+    # get the solution integers
+    solution = parse_solution_file(solution_file)
+    logger.debug(f"-> successful parsed solution {solution_file}")
+
+    with executor.isolated():
+        # deploy the dependencies and the contract on the long-lived chain
+        for index, dependency in enumerate(dependencies):
+            computation = executor.deploy(decode_hex(dependency), executor.dependency_address(index))
+            assert not computation.is_error, f"deployment of dependency failed: {computation.error}"
+        computation = executor.deploy(decode_hex(bytecode))
+        # TODO: FIXME: throw this error instead of triggering an assertion
+        assert not computation.is_error, f"deployment failed: {computation.error}"
+        logger.debug(f"-> successful deployment of contract")
+
+        logger.debug("------------- TEST START -------------")
+
+        # get the deployed contract and call the bug function
+        call_result = int.from_bytes(executor.call(BUG_SELECTOR).output, 'big') != 0
+        logger.debug(f"Start test with initial 'bug' flag: {call_result}")
+        assert call_result==False, "unexpected initial 'bug' flag state!"
+
+        # do steps
+        for step_val in solution:
+            computation = executor.call(STEP_SELECTOR + abi_encode(["int8[]"], [step_val]))
+            next_cell = decode_next_cell(executor.get_storage(0))
+            status = 0 if computation.is_error else 1
+            logger.debug(f"  - call step({step_val}) ==> status: {status} | next_cell: {next_cell}")
+            # after every call we also check if the message was successful, and if not, we stop testing
+            if computation.is_error:
+                logger.error("     ==> transaction failed! Abort testing ...")
+                break # abort
+
+        # finally check if bug was found
+        call_result = int.from_bytes(executor.call(BUG_SELECTOR).output, 'big') != 0
+        logger.debug(f"==> final 'bug' flag value: {call_result}")
+    return call_result
+
+def run_compiled_test_web3(abi: list, bytecode: str, solution_file: Path, dependencies: list[str] = []) -> bool:
 
     # get a w3 context to deploy and test contracts
     w3 = setup_web3()
@@ -87,14 +227,8 @@ def run_test(contract_file: Path, solution_file: Path) -> bool:
     solution = parse_solution_file(solution_file)
     logger.debug(f"-> successful parsed solution {solution_file}")
 
-    # compile source code
-    try:
-        abi, bytecode = compile_solidity_file(contract_file)
-        logger.debug(f"-> successful compilation of {contract_file.as_posix()}")
-    except SolcError as e:
-        # something went wrong during compilation
-        logger.error(e)
-        return False
+    # the test net cannot deploy the dependencies at their fixed addresses
+    assert not dependencies, "the web3 backend does not support contracts with dependencies, use the py-evm backend"
 
     # generate and deploy the contract on the test net
     contract_deployed = deploy_contract(w3, abi, bytecode)
@@ -0,0 +1,98 @@
+import sys
+import time
+from pathlib import Path
+from argparse import ArgumentParser
+
+sys.path.append(str(Path(__file__).parent.parent / "olympia"))
+sys.path.append(str(Path(__file__).parent.parent / "maze-gen"))
+
+from smt2_parser import parse_formula, conjunction_to_clauses, convert, SharedTerms, TEMPORARY_PATTERN
+from CVE_gen import inline_temporaries
+from utils.custom_logging import logger
+
+DEFAULT_CVE_FOLDER = Path(__file__).parent.parent / "CVEs"
+
+# ====================================================
+# Conversion Benchmark
+# ====================================================
+
+def convert_tree(clauses) -> tuple[list[str], list]:
+    """Converts every clause on its own, i.e. shared subterms are converted at every use."""
+    return [ convert(clause)[0] for clause in clauses ], []
+
+def convert_shared(clauses) -> tuple[list[str], list]:
+    """Converts the clauses together, i.e. shared subterms are converted once into temporaries."""
+    shared = SharedTerms(clauses)
+    conditions = [ convert(clause, shared)[0] for clause in clauses ]
+    return conditions, [ [ solidity_type, name, expression ] for name, (solidity_type, expression) in shared.temporaries.items() ]
+
+def time_conversion(function, clauses, repetitions: int) -> tuple[float, list[str], list]:
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        conditions, temporaries = function(clauses)
+    return (time.perf_counter() - start) / repetitions, conditions, temporaries
+
+def emitted_size(conditions: list[str], temporaries: list) -> int:
+    # the conditions kept by the parser together with the declarations of the temporaries
+    return sum(len(condition) for condition in conditions if "model_version" not in condition) \
+        + sum(len(solidity_type) + len(name) + len(expression) + 6 for solidity_type, name, expression in temporaries)
+
+def benchmark(folder: Path, repetitions: int) -> bool:
+    """
+    Converts the clauses of every enabled SMT file of the folder as tree and with shared
+    temporaries, checks that substituting the temporaries results in the same conditions and
+    reports the conversion times and the size of the emitted conditions.
+    """
+    smt_files = sorted(folder.glob("*.smt2"))
+    if not smt_files:
+        logger.error(f"no SMT files in folder {folder}")
+        return False
+
+    success = True
+    print(f"{'file':<24} {'clauses':>8} {'temporaries':>11} {'tree':>10} {'shared':>10} {'tree size':>10} {'shared size':>11}")
+    for smt_file in smt_files:
+        clauses = list(conjunction_to_clauses(parse_formula(str(smt_file))))
+        tree_time, expected, _ = time_conversion(convert_tree, clauses, repetitions)
+        shared_time, conditions, temporaries = time_conversion(convert_shared, clauses, repetitions)
+
+        # clauses that are replaced by a temporary as a whole are parenthesized by the parser only
+        substituted = inline_temporaries([ f"({condition})" if TEMPORARY_PATTERN.fullmatch(condition) else condition
+            for condition in conditions ], temporaries)
+        if [ condition for condition in substituted if "model_version" not in condition ] \
+            != [ condition for condition in expected if "model_version" not in condition ]:
+            print(f"{smt_file.name}: conversions differ")
+            success = False
+
+        print(f"{smt_file.name:<24} {len(clauses):>8} {len(temporaries):>11} "
+            f"{tree_time * 1000:>8.2f}ms {shared_time * 1000:>8.2f}ms "
+            f"{emitted_size(expected, []):>9}B {emitted_size(conditions, temporaries):>10}B")
+    return success
+
+# ====================================================
+# Implementation of Command line Client
+# ====================================================
+
+def get_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="Olympia Conversion Benchmark",
+        description="Compares the conversion of the CVE formulas as tree and with temporaries for their shared subterms")
+
+    parser.add_argument("-c", "--cve-folder"
+        , metavar="CVE_FOLDER"
+        , type=Path
+        , help="folder of the SMT files"
+        , default=DEFAULT_CVE_FOLDER
+        )
+    parser.add_argument("-r", "--repetitions"
+        , metavar="REPETITIONS"
+        , type=int
+        , help="amount of conversions per file and implementation"
+        , default=10
+        )
+    return parser
+
+if __name__ == "__main__":
+    parser = get_arg_parser()
+    args = parser.parse_args()
+    success = benchmark(args.cve_folder.resolve(), args.repetitions)
+    exit(0 if success else 1)
@@ -0,0 +1,107 @@
+import sys
+from itertools import product
+from ast import literal_eval
+from pathlib import Path
+from argparse import ArgumentParser
+
+sys.path.append(str(Path(__file__).parent.parent / "olympia"))
+sys.path.append(str(Path(__file__).parent.parent / "maze-gen"))
+
+import array_to_code
+from benchmark_renderer import prepare
+from eth_utils import decode_hex
+from utils.reachability_test import STEP_SELECTOR, BUG_SELECTOR, abi_encode
+from utils.compiler_helper import compile_solidity_sources
+from utils.evm_executor import get_evm_executor
+from utils.custom_logging import logger
+
+DEFAULT_DIMENSIONS = [5, 10, 25, 50]
+
+# ====================================================
+# Dispatch Benchmark
+# ====================================================
+
+def replay(bytecode: str, transactions: list[str]) -> tuple[list[int], bool]:
+    """
+    Deploys the contract on the py-evm executor, replays the solution transactions and
+    returns the gas used by each step together with the final 'bug' flag.
+    """
+    executor = get_evm_executor()
+    with executor.isolated():
+        computation = executor.deploy(decode_hex(bytecode))
+        assert not computation.is_error, f"deployment failed: {computation.error}"
+        gas = []
+        for values in transactions:
+            computation = executor.call(STEP_SELECTOR + abi_encode(["int8[]"], [literal_eval(values)]))
+            if computation.is_error:
+                break
+            gas.append(computation.get_gas_used())
+        bug = int.from_bytes(executor.call(BUG_SELECTOR).output, 'big') != 0
+    return gas, bug
+
+def benchmark(dimensions: list[int], generator_file: str, seed: int) -> bool:
+    """
+    Renders the contract of a maze per dimension with every emission, dispatch mode and input
+    location, compiles and replays the solution on each of them and reports the mean gas per step and
+    the size of the deployed bytecode. Returns False if a contract does not reach the bug.
+    """
+    sources, transactions = dict(), dict()
+    for dimension in dimensions:
+        graph, logic_sol, guard, solution_values = prepare(dimension, generator_file, seed)
+        transactions[dimension] = solution_values
+        for variant in product(array_to_code.EMISSION_MODES, array_to_code.DISPATCH_MODES, array_to_code.INPUT_LOCATIONS):
+            emission, dispatch, location = variant
+            sources[(dimension, *variant)] = array_to_code.render_contract(graph, dimension, dimension,
+                logic_sol, guard, dispatch, location, emission) + array_to_code.SOLIDITY_END
+        logger.info(f"Rendered dimension {dimension}x{dimension}")
+
+    compiled = compile_solidity_sources({ "_".join(map(str, key)) + ".sol": source for key, source in sources.items() })
+
+    print(f"{'dimension':>10} {'emission':>10} {'dispatch':>10} {'input':>10} {'gas/step':>12} {'bytecode':>12}")
+    success = True
+    for (dimension, emission, dispatch, location) in sources:
+        result = compiled[f"{dimension}_{emission}_{dispatch}_{location}.sol"]
+        if not result.success:
+            logger.error("\n".join(result.errors))
+            success = False
+            continue
+        gas, bug = replay(result.bytecode, transactions[dimension])
+        success &= bug
+        print(f"{dimension:>10} {emission:>10} {dispatch:>10} {location:>10} {sum(gas) / max(len(gas), 1):>12.0f} "
+            f"{len(result.bytecode) // 2:>10}B" + ("" if bug else "  BUG NOT REACHED"))
+    return success
+
+# ====================================================
+# Implementation of Command line Client
+# ====================================================
+
+def get_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="Olympia Dispatch Benchmark",
+        description="Compares the gas per step and the bytecode size of the emissions, step dispatch modes and input locations")
+
+    parser.add_argument("-d", "--dimensions"
+        , metavar="DIMENSION"
+        , type=int
+        , nargs="+"
+        , help="maze dimensions"
+        , default=DEFAULT_DIMENSIONS
+        )
+    parser.add_argument("-g", "--generator"
+        , metavar="GENERATOR"
+        , help="generator file of the guards (e.g. default_gen or equality50_gen)"
+        , default="equality50_gen"
+        )
+    parser.add_argument("-s", "--seed"
+        , metavar="SEED"
+        , type=int
+        , help="seed of the mazes"
+        , default=1
+        )
+    return parser
+
+if __name__ == "__main__":
+    parser = get_arg_parser()
+    args = parser.parse_args()
+    success = benchmark(args.dimensions, args.generator, args.seed)
+    exit(0 if success else 1)
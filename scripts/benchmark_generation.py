@@ -0,0 +1,313 @@
+import os
+import sys
+import json
+import time
+import platform
+from pathlib import Path
+from random import Random
+from argparse import ArgumentParser
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).parent.parent / "olympia"))
+
+import olympia
+from utils.custom_logging import logger
+
+DEFAULT_DIMENSIONS = [5, 10, 20, 30]
+DEFAULT_CYCLES = [0, 50, 100]
+DEFAULT_EQUALITY = 50
+
+# a metric is a regression if it grows by more than the threshold (in percent),
+# time differences below the minimal delta (in seconds) are considered as noise
+DEFAULT_THRESHOLD = 10
+MIN_TIME_DELTA = 0.005
+
+# ====================================================
+# Generation Benchmark
+# ====================================================
+
+def setting_key(result: dict) -> str:
+    return f"{result['method']}/{result['algorithm']}/{result['dimension']}x{result['dimension']}/{result['cycles']}%"
+
+def mean(values: list[float]) -> float | None:
+    return sum(values) / len(values) if values else None
+
+def benchmark_setting \
+    ( seeds: list[int]
+    , dimension: int
+    , algorithm: olympia.MazeGenAlgorithmKind
+    , method: olympia.MazeGenMethodKind
+    , cycles: int
+    , equality: int
+    , output_dir: Path
+    , compile: bool
+    , maze_exit: olympia.MazeExitKind
+    ) -> dict:
+    """
+    Generates one instance per seed with a fixed setting and summarizes the timing records
+    olympia writes for each instance. If 'compile' is set, the reachability check is enabled,
+    i.e. the compile and reachability stages are measured, and the bytecode size is reported.
+    """
+    failed = 0
+    for seed in seeds:
+        if not olympia.generate(seed, dimension, output_dir, [algorithm], [equality],
+                [cycles], [method], not compile, options=olympia.GenerationOptions(maze_exit)):
+            failed += 1
+
+    with open(output_dir / olympia.TIMINGS_FILE, "r") as fh:
+        records = [ json.loads(line) for line in fh if line.strip() ]
+    stage_names = list(dict.fromkeys(name for record in records for name in record["stages"]))
+    counter_names = list(dict.fromkeys(name for record in records for name in record.get("counters", {})))
+    totals = [ record["total"] for record in records ]
+
+    sources = [ file for file in sorted((output_dir / "src").glob("*.sol"))
+        if not file.name.endswith(".foundry.sol") ]
+    bytecode_size = None
+    if compile:
+        from utils.compiler_helper import compile_solidity_files
+        results = compile_solidity_files(sources)
+        bytecode_size = mean([ len(result.bytecode) // 2 for result in results.values() if result.success ])
+
+    return \
+        { "dimension"            : dimension
+        , "algorithm"            : algorithm.value
+        , "method"               : method.value
+        , "cycles"               : cycles
+        , "instances"            : len(records)
+        , "failed"               : failed
+        , "total"                : mean(totals)
+        , "instances_per_second" : len(totals) / sum(totals)
+        , "stages"               : { name: mean([ record["stages"].get(name, 0.0) for record in records ])
+                                     for name in stage_names }
+        , "counters"             : { name: mean([ record["counters"].get(name, 0) for record in records ])
+                                     for name in counter_names }
+        , "source_size"          : mean([ file.stat().st_size for file in sources ])
+        , "bytecode_size"        : bytecode_size
+        , "process_peak_rss_kb"  : max(record["process_peak_rss_kb"] for record in records)
+        }
+
+def run \
+    ( seed: int
+    , dimensions: list[int]
+    , algorithms: list[olympia.MazeGenAlgorithmKind]
+    , methods: list[olympia.MazeGenMethodKind]
+    , cycles: list[int]
+    , equality: int
+    , instances: int
+    , compile: bool
+    , maze_exit: olympia.MazeExitKind
+    ) -> dict:
+    """
+    Sweeps all combinations of the provided dimensions, algorithms, methods and cycle
+    percentages. Every setting uses the same instance seeds, so two runs with the same
+    arguments generate the same programs and their results can be compared.
+    """
+    rng = Random(seed)
+    seeds = [ rng.randint(100000, 999999) for _ in range(instances) ]
+    settings = [ (dimension, algorithm, method, cycle) for method in methods
+        for algorithm in algorithms for dimension in dimensions for cycle in cycles ]
+
+    results = []
+    with TemporaryDirectory() as tmp_dir:
+        # compilations must not be served from the cache of previous runs
+        os.environ["OLYMPIA_COMPILATION_CACHE"] = str(Path(tmp_dir) / "cache")
+
+        # the first generation of a process pays for the imports and is not measured
+        olympia.generate(seed, 5, Path(tmp_dir) / "warmup", list(olympia.MazeGenAlgorithmKind),
+            [equality], cycles, methods, True, options=olympia.GenerationOptions(maze_exit))
+
+        for index, (dimension, algorithm, method, cycle) in enumerate(settings):
+            output_dir = Path(tmp_dir) / str(index)
+            result = benchmark_setting(seeds, dimension, algorithm, method, cycle, equality,
+                output_dir, compile, maze_exit)
+            logger.info(f"Benchmarked: {index+1}/{len(settings)} {setting_key(result)}")
+            results.append(result)
+
+    return \
+        { "python"    : platform.python_version()
+        , "machine"   : platform.machine()
+        , "seed"      : seed
+        , "instances" : instances
+        , "equality"  : equality
+        , "maze_exit" : maze_exit.value
+        , "results"   : results
+        }
+
+def format_size(size: float | None) -> str:
+    return "-" if size is None else f"{size / 1024:.1f}K"
+
+def print_table(results: list[dict]):
+    stage_names = list(dict.fromkeys(name for result in results for name in result["stages"]))
+    counter_names = list(dict.fromkeys(name for result in results for name in result["counters"]))
+    key_width = max(len(setting_key(result)) for result in results)
+    columns = ["inst/s", "total"] + stage_names + counter_names + ["source", "bytecode"]
+    widths = [ max(9, len(column)) for column in columns ]
+
+    print(" ".join([ "setting".ljust(key_width) ] + [ column.rjust(width)
+        for column, width in zip(columns, widths) ]))
+    for result in results:
+        cells = [ f"{result['instances_per_second']:.2f}", f"{result['total'] * 1000:.1f}ms" ]
+        cells += [ f"{result['stages'][name] * 1000:.1f}ms" if name in result["stages"] else "-"
+            for name in stage_names ]
+        cells += [ f"{result['counters'][name]:.1f}" if name in result["counters"] else "-"
+            for name in counter_names ]
+        cells += [ format_size(result["source_size"]), format_size(result["bytecode_size"]) ]
+        print(" ".join([ setting_key(result).ljust(key_width) ] + [ cell.rjust(width)
+            for cell, width in zip(cells, widths) ]))
+
+# ====================================================
+# Regression Check
+# ====================================================
+
+def compared_metrics(result: dict) -> dict[str, float | None]:
+    metrics = { "total": result["total"] }
+    metrics.update({ f"stage:{name}": value for name, value in result["stages"].items() })
+    metrics["source_size"] = result["source_size"]
+    metrics["bytecode_size"] = result["bytecode_size"]
+    return metrics
+
+def compare(baseline_file: Path, current_file: Path, threshold: int) -> bool:
+    """
+    Compares the results of two benchmark runs setting by setting. Every timing or size
+    metric that grew by more than 'threshold' percent is reported as regression.
+    Returns True if no regression was found.
+    """
+    with open(baseline_file, "r") as fh:
+        baseline = { setting_key(result): result for result in json.load(fh)["results"] }
+    with open(current_file, "r") as fh:
+        current = { setting_key(result): result for result in json.load(fh)["results"] }
+
+    regressions = 0
+    for key in [ key for key in current if key in baseline ]:
+        old_metrics = compared_metrics(baseline[key])
+        new_metrics = compared_metrics(current[key])
+        for metric, new in new_metrics.items():
+            old = old_metrics.get(metric)
+            if old is None or new is None or old == 0:
+                continue
+            change = (new - old) / old * 100
+            is_time = metric == "total" or metric.startswith("stage:")
+            if change > threshold and (not is_time or new - old > MIN_TIME_DELTA):
+                logger.error(f"regression {key} {metric}: {old:.4g} -> {new:.4g} ({change:+.1f}%)")
+                regressions += 1
+
+        old_total, new_total = baseline[key]["total"], current[key]["total"]
+        print(f"{key}: {old_total * 1000:.1f}ms -> {new_total * 1000:.1f}ms ({old_total / new_total:.2f}x)")
+
+    for key in [ key for key in baseline if key not in current ]:
+        logger.warning(f"setting {key} missing in {current_file}")
+
+    print(f"{regressions} regression(s) above {threshold}%")
+    return regressions == 0
+
+# ====================================================
+# Implementation of Command line Client
+# ====================================================
+
+def get_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="Olympia Generation Benchmark",
+        description="Measures the generation across maze dimensions, algorithms, generation \
+                     methods and cycle percentages or compares two benchmark results")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmark suite")
+    run_parser.add_argument("-d", "--dimension"
+        , metavar="DIMENSION"
+        , help="list of maze dimensions (must be >=5)"
+        , nargs="+"
+        , type=olympia.dimension_value
+        , default=DEFAULT_DIMENSIONS
+        )
+    run_parser.add_argument("-a", "--algorithm"
+        , help="list of maze generation algorithms"
+        , nargs="+"
+        , type=olympia.MazeGenAlgorithmKind
+        , choices=list(olympia.MazeGenAlgorithmKind)
+        , default=list(olympia.MazeGenAlgorithmKind)
+        )
+    run_parser.add_argument("-m", "--method"
+        , help="list of generation methods"
+        , nargs="+"
+        , type=olympia.MazeGenMethodKind
+        , choices=list(olympia.MazeGenMethodKind)
+        , default=list(olympia.MazeGenMethodKind)
+        )
+    run_parser.add_argument("-c", "--cycle"
+        , metavar="PERCENT"
+        , help="list of cycle percentages"
+        , nargs="+"
+        , type=olympia.argparse_percent
+        , default=DEFAULT_CYCLES
+        )
+    run_parser.add_argument("-e", "--equality"
+        , metavar="PERCENT"
+        , help="equality percentage of the equality method"
+        , type=olympia.argparse_percent
+        , default=DEFAULT_EQUALITY
+        )
+    run_parser.add_argument("-i", "--instances"
+        , metavar="INSTANCES"
+        , type=int
+        , help="amount of instances generated for each setting"
+        , default=3
+        )
+    run_parser.add_argument("-s", "--seed"
+        , metavar="SEED"
+        , type=int
+        , help="an integer seed used to draw the instance seeds"
+        , default=0
+        )
+    run_parser.add_argument("-o", "--output"
+        , metavar="RESULT_FILE"
+        , type=Path
+        , help="path to the JSON result file"
+        )
+    run_parser.add_argument("--maze-exit"
+        , help="maze exit selection used for all instances"
+        , type=olympia.MazeExitKind
+        , choices=list(olympia.MazeExitKind)
+        , default=olympia.MazeExitKind.DEFAULT
+        )
+    run_parser.add_argument("--compile"
+        , help="enables the reachability check and reports the compiled bytecode size (requires solc)"
+        , action='store_true'
+        , default=False
+        )
+
+    compare_parser = subparsers.add_parser("compare", help="compare two benchmark results")
+    compare_parser.add_argument("baseline"
+        , metavar="BASELINE_FILE"
+        , type=Path
+        , help="JSON result file of the baseline"
+        )
+    compare_parser.add_argument("current"
+        , metavar="RESULT_FILE"
+        , type=Path
+        , help="JSON result file compared against the baseline"
+        )
+    compare_parser.add_argument("-t", "--threshold"
+        , metavar="PERCENT"
+        , type=int
+        , help="relative growth of a metric that is reported as regression"
+        , default=DEFAULT_THRESHOLD
+        )
+    return parser
+
+if __name__ == "__main__":
+    parser = get_arg_parser()
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        success = compare(args.baseline, args.current, args.threshold)
+        exit(0 if success else 1)
+
+    start = time.perf_counter()
+    report = run(args.seed, args.dimension, args.algorithm, args.method, args.cycle,
+        args.equality, args.instances, args.compile, args.maze_exit)
+    print_table(report["results"])
+    print(f"benchmark finished in {time.perf_counter() - start:.1f}s")
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+        logger.info(f"results written to {args.output}")
@@ -0,0 +1,118 @@
+import sys
+import time
+from pathlib import Path
+from argparse import ArgumentParser
+
+sys.path.append(str(Path(__file__).parent.parent / "olympia"))
+sys.path.append(str(Path(__file__).parent.parent / "maze-gen"))
+
+from smt2_parser import parse, used_temporaries, independent_formulas
+from utils.custom_logging import logger
+
+DEFAULT_CVE_FOLDER = Path(__file__).parent.parent / "CVEs"
+
+# ====================================================
+# Grouping Benchmark
+# ====================================================
+
+def extract_vars(cond, variables) -> set:
+    """The former extraction of the variables of a condition, which searches its text for every variable."""
+    return { var for var in variables if var + " " in cond or var + ")" in cond }
+
+def condition_vars(cond, variables, temporaries) -> set:
+    """Returns the variables read by the condition, directly or through its temporaries."""
+    return extract_vars(cond, variables).union(*(extract_vars(temporaries[name][1], variables)
+        for name in used_temporaries(cond, temporaries)))
+
+def pairwise_formulas(conds, variables, temporaries) -> list[set]:
+    """
+    The former grouping of the parser, which compares the variables of all pairs of conditions
+    and collects the connected conditions by a search over the resulting graph. The variables
+    are extracted from the text of the conditions (see "extract_vars").
+    """
+    edges = { cond: [ other for other in conds
+        if condition_vars(cond, variables, temporaries) & condition_vars(other, variables, temporaries) ] for cond in conds }
+    visited, groups = set(), list()
+    for cond in conds:
+        if cond in visited or not edges[cond]:
+            continue
+        group, stack = set(), [cond]
+        visited.add(cond)
+        while stack:
+            node = stack.pop()
+            group.add(node)
+            for neighbour in edges[node]:
+                if neighbour not in visited:
+                    visited.add(neighbour)
+                    stack.append(neighbour)
+        groups.append(group)
+    return groups
+
+def time_grouping(function, args, repetitions: int) -> tuple[float, list]:
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        result = function(*args)
+    return (time.perf_counter() - start) / repetitions, result
+
+def benchmark(folder: Path, repetitions: int) -> bool:
+    """
+    Groups the conditions of every enabled SMT file of the folder with the pairwise comparison
+    and the union-find of the parser, checks that both find the same groups and reports the times.
+    The union-find groups by the indices of the conversion, the pairwise comparison by the text of
+    the conditions, hence the check also compares both variable extractions.
+    """
+    smt_files = sorted(folder.glob("*.smt2"))
+    if not smt_files:
+        logger.error(f"no SMT files in folder {folder}")
+        return False
+
+    success = True
+    print(f"{'file':<24} {'conditions':>10} {'variables':>10} {'groups':>8} {'pairwise':>10} {'union-find':>10} {'speedup':>8}")
+    for smt_file in smt_files:
+        # parsed without the CVE cache, which does not store the indices of the conditions
+        conds, variables, _, temporaries, temporary_indices = parse(str(smt_file))
+        pairwise_time, expected = time_grouping(pairwise_formulas, (list(conds), variables, temporaries), repetitions)
+        union_find_time, (groups, vars_by_groups, _) = time_grouping(independent_formulas,
+            (conds, temporaries, temporary_indices), repetitions)
+
+        same_groups = { frozenset(group) for group in groups } == { frozenset(group) for group in expected } \
+            and len(groups) == len(expected)
+        same_vars = all(vars == sorted(set().union(*(condition_vars(cond, variables, temporaries) for cond in group)))
+            for group, vars in zip(groups, vars_by_groups))
+        if not (same_groups and same_vars):
+            print(f"{smt_file.name}: groupings differ")
+            success = False
+
+        print(f"{smt_file.name:<24} {len(conds):>10} {len(variables):>10} {len(groups):>8} "
+            f"{pairwise_time * 1000:>8.2f}ms {union_find_time * 1000:>8.2f}ms "
+            f"{pairwise_time / max(union_find_time, 1e-9):>7.1f}x")
+    return success
+
+# ====================================================
+# Implementation of Command line Client
+# ====================================================
+
+def get_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="Olympia Grouping Benchmark",
+        description="Compares the pairwise and the union-find grouping of the conditions of the CVE files")
+
+    parser.add_argument("-c", "--cve-folder"
+        , metavar="CVE_FOLDER"
+        , type=Path
+        , help="folder of the SMT files"
+        , default=DEFAULT_CVE_FOLDER
+        )
+    parser.add_argument("-r", "--repetitions"
+        , metavar="REPETITIONS"
+        , type=int
+        , help="amount of groupings per file and implementation"
+        , default=10
+        )
+    return parser
+
+if __name__ == "__main__":
+    parser = get_arg_parser()
+    args = parser.parse_args()
+    success = benchmark(args.cve_folder.resolve(), args.repetitions)
+    exit(0 if success else 1)
@@ -0,0 +1,98 @@
+import sys
+import time
+from pathlib import Path
+from argparse import ArgumentParser
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).parent.parent / "maze-gen"))
+
+import array_gen
+import array_to_code
+
+DEFAULT_DIMENSIONS = [10, 25, 50, 100]
+
+# ====================================================
+# Renderer Benchmark
+# ====================================================
+
+def prepare(dimension: int, generator_file: str, seed: int):
+    """
+    Generates a maze and the guards of its contract, i.e. everything the renderer needs.
+    """
+    maze = array_gen.generate_maze("ArrayBacktracking", dimension, dimension, str(seed), "targeted")
+    sln = array_gen.solution_cells(maze, dimension)
+    maze_exit = array_to_code.get_exit(sln)
+    maze_funcs = array_to_code.get_functions(dimension, dimension, maze_exit)
+    graph = array_to_code.generate_graph(dimension, dimension, maze_exit, maze_funcs, maze.grid)
+    array_to_code.remove_cycle(graph, 50, seed)
+
+    generator_module, equality, _ = array_to_code.get_generator(generator_file)
+    generator = generator_module.Generator(dimension * dimension, graph.graph, sln, equality, "")
+    logic_sol = generator.get_logic_sol()
+    guard = generator.get_guard()
+    return graph, logic_sol, guard, generator.get_solution_values()
+
+def benchmark(dimension: int, generator_file: str, seed: int, repeats: int) -> tuple[float, float]:
+    """
+    Returns the best time of rendering the contract in memory and of writing the solidity
+    program, its foundry version and the transactions file.
+    """
+    graph, logic_sol, guard, transactions = prepare(dimension, generator_file, seed)
+    render_times, write_times = [], []
+    with TemporaryDirectory() as tmp_dir:
+        files = [ Path(tmp_dir) / name for name in ["maze.sol", "maze.foundry.sol", "maze_transactions.txt"] ]
+        for _ in range(repeats):
+            start = time.perf_counter()
+            array_to_code.render_contract(graph, dimension, dimension, logic_sol, guard)
+            render_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            array_to_code.write_program_solidity(*files, graph, dimension, dimension,
+                logic_sol, guard, transactions)
+            write_times.append(time.perf_counter() - start)
+    return min(render_times), min(write_times)
+
+# ====================================================
+# Implementation of Command line Client
+# ====================================================
+
+def get_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="Olympia Renderer Benchmark",
+        description="Measures the time per maze cell of rendering the solidity contracts")
+
+    parser.add_argument("-d", "--dimensions"
+        , metavar="DIMENSION"
+        , type=int
+        , nargs="+"
+        , help="maze dimensions"
+        , default=DEFAULT_DIMENSIONS
+        )
+    parser.add_argument("-g", "--generator"
+        , metavar="GENERATOR"
+        , help="generator file of the guards (e.g. default_gen or equality50_gen)"
+        , default="equality50_gen"
+        )
+    parser.add_argument("-r", "--repeats"
+        , metavar="REPEATS"
+        , type=int
+        , help="amount of renderings per dimension, the best time is reported"
+        , default=10
+        )
+    parser.add_argument("-s", "--seed"
+        , metavar="SEED"
+        , type=int
+        , help="seed of the mazes"
+        , default=1
+        )
+    return parser
+
+if __name__ == "__main__":
+    parser = get_arg_parser()
+    args = parser.parse_args()
+    print(f"{'dimension':>10} {'render':>10} {'per cell':>10} {'write':>10} {'per cell':>10}")
+    for dimension in args.dimensions:
+        render_time, write_time = benchmark(dimension, args.generator, args.seed, args.repeats)
+        cells = dimension * dimension
+        print(f"{dimension:>10} {render_time * 1000:>8.2f}ms {render_time / cells * 1e6:>8.2f}us "
+            f"{write_time * 1000:>8.2f}ms {write_time / cells * 1e6:>8.2f}us")
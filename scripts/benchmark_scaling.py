@@ -0,0 +1,151 @@
+import sys
+import json
+import subprocess
+from math import log
+from pathlib import Path
+from argparse import ArgumentParser
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).parent.parent / "olympia"))
+
+import olympia
+from utils.custom_logging import logger
+
+OLYMPIA_PY = Path(__file__).parent.parent / "olympia" / "olympia.py"
+
+DEFAULT_DIMENSIONS = [50, 100, 200]
+DEFAULT_MAX_EXPONENT = 1.3
+
+# stages faster than this (in seconds) are too noisy to estimate their growth
+MIN_STAGE_TIME = 0.02
+
+# ====================================================
+# Scaling Benchmark
+# ====================================================
+
+def measure \
+    ( seed: int
+    , dimension: int
+    , algorithm: olympia.MazeGenAlgorithmKind
+    , method: olympia.MazeGenMethodKind
+    , output_dir: Path
+    ) -> dict:
+    """
+    Generates a single instance inside of a fresh olympia process, such that the peak
+    resident set size of the process only belongs to this instance, and returns its
+    timing record. Large mazes use the targeted exit, since regenerating them until
+    the default exit has the target solution length needs too many attempts.
+    """
+    command = \
+        [ sys.executable, str(OLYMPIA_PY)
+        , "-s", str(seed)
+        , "-d", str(dimension)
+        , "-o", str(output_dir)
+        , "-a", algorithm.value
+        , "-m", method.value
+        , "--maze-exit", olympia.MazeExitKind.TARGETED.value
+        , "--disable-reachability-check"
+        , "--disable-text-export"
+        ]
+    process = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        logger.error(process.stderr.decode(errors="replace"))
+        raise RuntimeError(f"generation of dimension {dimension} failed")
+    with open(output_dir / olympia.TIMINGS_FILE, "r") as fh:
+        return json.loads(fh.readlines()[-1])
+
+def growth_exponent(small: float, large: float, small_cells: int, large_cells: int) -> float:
+    """Returns k such that the value grows like cells^k between both measurements."""
+    return log(large / small) / log(large_cells / small_cells)
+
+def run \
+    ( seed: int
+    , dimensions: list[int]
+    , algorithm: olympia.MazeGenAlgorithmKind
+    , method: olympia.MazeGenMethodKind
+    , max_exponent: float
+    ) -> bool:
+    """
+    Generates an instance for each dimension and reports the time of each stage and the
+    peak memory per maze cell. The growth of each stage between the two largest dimensions
+    is reported as exponent of the cell count, i.e. 1.0 is linear growth. Returns False if
+    a stage grows faster than 'max_exponent'.
+    """
+    records = []
+    with TemporaryDirectory() as tmp_dir:
+        for dimension in dimensions:
+            records.append(measure(seed, dimension, algorithm, method, Path(tmp_dir) / str(dimension)))
+            logger.info(f"Measured dimension {dimension}x{dimension}")
+
+    cells = [ dimension * dimension for dimension in dimensions ]
+    stage_names = list(dict.fromkeys(name for record in records for name in record["stages"]))
+    print(f"{'stage':<18}" + "".join(f"{f'{d}x{d}':>12}" for d in dimensions) + f"{'exponent':>10}")
+
+    success = True
+    for name in ["total"] + stage_names:
+        values = [ record["total"] if name == "total" else record["stages"].get(name, 0.0)
+            for record in records ]
+        row = f"{name:<18}" + "".join(f"{value * 1000:>10.1f}ms" for value in values)
+        if min(values[-2:]) >= MIN_STAGE_TIME:
+            exponent = growth_exponent(values[-2], values[-1], cells[-2], cells[-1])
+            row += f"{exponent:>10.2f}"
+            if exponent > max_exponent and name != "total":
+                row += "  SUPERLINEAR"
+                success = False
+        print(row)
+
+    # every instance is generated in a fresh process, hence the process peak is the peak of the instance
+    peaks = [ record["process_peak_rss_kb"] for record in records ]
+    print(f"{'peak_rss':<18}" + "".join(f"{peak / 1024:>10.1f}MB" for peak in peaks))
+    # the memory of the interpreter and its imports is paid by every dimension
+    growth = [ (peak - peaks[0]) / (cell - cells[0]) for peak, cell in zip(peaks[1:], cells[1:]) ]
+    print(f"{'rss_per_cell':<18}{'-':>12}" + "".join(f"{kb:>10.2f}KB" for kb in growth))
+    return success
+
+# ====================================================
+# Implementation of Command line Client
+# ====================================================
+
+def get_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="Olympia Scaling Benchmark",
+        description="Checks that the generation time of each stage grows near-linearly with the maze cells")
+
+    parser.add_argument("-d", "--dimensions"
+        , metavar="DIMENSION"
+        , type=int
+        , nargs="+"
+        , help="maze dimensions in increasing order"
+        , default=DEFAULT_DIMENSIONS
+        )
+    parser.add_argument("-a", "--algorithm"
+        , type=olympia.MazeGenAlgorithmKind
+        , choices=list(olympia.MazeGenAlgorithmKind)
+        , help="maze generation algorithm"
+        , default=olympia.MazeGenAlgorithmKind.ARRAY_BACKTRACKING
+        )
+    parser.add_argument("-m", "--method"
+        , type=olympia.MazeGenMethodKind
+        , choices=list(olympia.MazeGenMethodKind)
+        , help="contract generation method"
+        , default=olympia.MazeGenMethodKind.CVE
+        )
+    parser.add_argument("-s", "--seed"
+        , metavar="SEED"
+        , type=int
+        , help="seed of the generated instances"
+        , default=1
+        )
+    parser.add_argument("--max-exponent"
+        , metavar="EXPONENT"
+        , type=float
+        , help="largest accepted growth exponent of a stage"
+        , default=DEFAULT_MAX_EXPONENT
+        )
+    return parser
+
+if __name__ == "__main__":
+    parser = get_arg_parser()
+    args = parser.parse_args()
+    success = run(args.seed, args.dimensions, args.algorithm, args.method, args.max_exponent)
+    exit(0 if success else 1)
@@ -0,0 +1,102 @@
+import sys
+import time
+from pathlib import Path
+from argparse import ArgumentParser
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "maze-gen"))
+
+from mazelib import Maze
+from mazelib.solve.ShortestPath import ShortestPath
+from array_gen import generate_maze
+from bfs_solver import BFSShortestPath
+
+DEFAULT_DIMENSIONS = [10, 25, 50, 75, 100]
+ALGORITHMS = ["Backtracking", "Kruskal", "Prims", "Wilsons", "Sidewinder"]
+
+# ====================================================
+# Solver Benchmark
+# ====================================================
+
+def time_solver(maze: Maze, solver, random_state: tuple) -> tuple[float, list, tuple]:
+    """
+    Solves the maze starting from the provided numpy random state and returns the time,
+    the solutions and the random state after solving.
+    """
+    np.random.set_state(random_state)
+    maze.solver = solver
+    start = time.perf_counter()
+    maze.solve()
+    duration = time.perf_counter() - start
+    return duration, maze.solutions, np.random.get_state()
+
+def same_random_state(left: tuple, right: tuple) -> bool:
+    return all(np.array_equal(x, y) for x, y in zip(left, right))
+
+def benchmark(dimensions: list[int], mazes: int, seed: int) -> bool:
+    """
+    Solves the same mazes with mazelib's ShortestPath and the BFS solver, checks that both
+    find the same solution and leave the same random state and reports the solving times.
+    """
+    success = True
+    print(f"{'algorithm':<12} {'dimension':>9} {'ShortestPath':>12} {'BFS':>10} {'speedup':>8}")
+    for algorithm in ALGORITHMS:
+        for dimension in dimensions:
+            shortest_path_time = bfs_time = 0.0
+            for index in range(mazes):
+                # an unsolved maze with the default entrances
+                maze = generate_maze(algorithm, dimension, dimension, seed + index, "targeted")
+                maze.end = (dimension*2, dimension*2 - 1)
+                maze.grid[dimension*2][dimension*2 - 1] = 0
+                random_state = np.random.get_state()
+
+                duration, expected, expected_state = time_solver(maze, ShortestPath(), random_state)
+                shortest_path_time += duration
+                duration, solutions, state = time_solver(maze, BFSShortestPath(), random_state)
+                bfs_time += duration
+
+                if solutions != expected or not same_random_state(state, expected_state):
+                    print(f"{algorithm} {dimension}x{dimension} seed {seed + index}: solvers differ")
+                    success = False
+
+            print(f"{algorithm:<12} {dimension:>9} {shortest_path_time / mazes:>11.4f}s "
+                f"{bfs_time / mazes:>9.4f}s {shortest_path_time / bfs_time:>7.1f}x")
+    return success
+
+# ====================================================
+# Implementation of Command line Client
+# ====================================================
+
+def get_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="Olympia Solver Benchmark",
+        description="Compares mazelib's ShortestPath solver with the BFS solver used \
+                     by array_gen.py on mazes of all generation algorithms")
+
+    parser.add_argument("-d", "--dimension"
+        , metavar="DIMENSION"
+        , help="list of maze dimensions"
+        , nargs="+"
+        , type=int
+        , default=DEFAULT_DIMENSIONS
+        )
+    parser.add_argument("-n", "--mazes"
+        , metavar="MAZES"
+        , type=int
+        , help="amount of mazes solved per algorithm and dimension"
+        , default=3
+        )
+    parser.add_argument("-s", "--seed"
+        , metavar="SEED"
+        , type=int
+        , help="seed of the first maze"
+        , default=1
+        )
+    return parser
+
+if __name__ == "__main__":
+    parser = get_arg_parser()
+    args = parser.parse_args()
+    success = benchmark(args.dimension, args.mazes, args.seed)
+    exit(0 if success else 1)
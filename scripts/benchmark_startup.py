@@ -0,0 +1,86 @@
+import sys
+import json
+import time
+import subprocess
+from pathlib import Path
+from argparse import ArgumentParser
+from tempfile import TemporaryDirectory
+
+OLYMPIA_DIR = Path(__file__).parent.parent / "olympia"
+OLYMPIA_PY = OLYMPIA_DIR / "olympia.py"
+
+# modules that should only be imported if the reachability check is enabled
+HEAVY_MODULES = ["web3", "eth", "eth_tester", "solcx"]
+
+# generates a single instance without reachability check and prints the loaded heavy modules
+GENERATION_SNIPPET = """
+import sys, json
+from pathlib import Path
+sys.path.append({olympia_dir!r})
+import olympia
+success = olympia.generate(1, {dimension}, Path({output_dir!r}), list(olympia.MazeGenAlgorithmKind),
+    olympia.EQUALITY_METHOD_PERCENTAGE, olympia.CYCLE_PERCENTAGE, [olympia.MazeGenMethodKind.DEFAULT], True)
+assert success, "generation failed"
+print(json.dumps([ module for module in {heavy_modules!r} if module in sys.modules ]))
+"""
+
+# ====================================================
+# Startup Benchmark
+# ====================================================
+
+def time_command(command: list[str], repeats: int) -> tuple[float, str]:
+    """
+    Runs the command 'repeats' times and returns the best wall-clock time
+    together with the STDOUT of the last run.
+    """
+    best = float("inf")
+    stdout = ""
+    for _ in range(repeats):
+        start = time.perf_counter()
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True)
+        best = min(best, time.perf_counter() - start)
+        stdout = process.stdout
+    return best, stdout
+
+def benchmark(repeats: int, dimension: int) -> bool:
+    help_time, _ = time_command([sys.executable, str(OLYMPIA_PY), "-h"], repeats)
+    print(f"olympia.py -h:                {help_time:.3f}s")
+
+    with TemporaryDirectory() as tmp_dir:
+        snippet = GENERATION_SNIPPET.format(olympia_dir=str(OLYMPIA_DIR), dimension=dimension,
+            output_dir=tmp_dir, heavy_modules=HEAVY_MODULES)
+        generation_time, stdout = time_command([sys.executable, "-c", snippet], repeats)
+    loaded_modules = json.loads(stdout.strip().splitlines()[-1])
+    print(f"no-check generation ({dimension}x{dimension}): {generation_time:.3f}s")
+    print(f"heavy modules imported:       {', '.join(loaded_modules) if loaded_modules else 'none'}")
+    return not loaded_modules
+
+# ====================================================
+# Implementation of Command line Client
+# ====================================================
+
+def get_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="Olympia Startup Benchmark",
+        description="Measures the startup time of olympia and checks that a generation \
+                     without reachability check does not import the EVM and compiler modules")
+
+    parser.add_argument("-r", "--repeats"
+        , metavar="REPEATS"
+        , type=int
+        , help="amount of runs per measurement, the best time is reported"
+        , default=5
+        )
+    parser.add_argument("-d", "--dimension"
+        , metavar="DIMENSION"
+        , type=int
+        , help="maze dimension of the generated instance"
+        , default=5
+        )
+    return parser
+
+if __name__ == "__main__":
+    parser = get_arg_parser()
+    args = parser.parse_args()
+    success = benchmark(args.repeats, args.dimension)
+    exit(0 if success else 1)
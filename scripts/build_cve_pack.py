@@ -0,0 +1,82 @@
+import sys
+import time
+from pathlib import Path
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(str(Path(__file__).parent.parent / "olympia"))
+sys.path.append(str(Path(__file__).parent.parent / "maze-gen"))
+
+import cve_cache
+from utils.custom_logging import logger
+
+DEFAULT_CVE_FOLDER = Path(__file__).parent.parent / "CVEs"
+
+# ====================================================
+# CVE Pack Builder
+# ====================================================
+
+def process(smt_file: Path) -> tuple[dict, float]:
+    """Parses a single SMT file and returns its pack entry and the time spent parsing it."""
+    start = time.perf_counter()
+    # the pack of the folder is rebuilt, hence it is not used to load the entry
+    constraints, vars_all, assignments, groups, vars, temporaries = cve_cache.parse_cached(smt_file)
+    entry = cve_cache.encode_entry(constraints, vars_all, assignments, groups, vars, temporaries)
+    entry["key"] = cve_cache.cache_key(smt_file)
+    entry.update(cve_cache.pack_statistics(constraints, groups, temporaries))
+    return entry, time.perf_counter() - start
+
+def build(folder: Path, jobs: int) -> bool:
+    """
+    Processes all enabled SMT files of the folder in parallel and writes their entries into
+    the CVE pack of the folder. The generation samples the CVE files from the pack index and
+    loads the parsed formulas from the pack instead of parsing them again.
+    """
+    # the same listing as the sampling of the generation, its order is kept inside of the pack
+    smt_files = list(folder.glob("*.smt2"))
+    if not smt_files:
+        logger.error(f"no SMT files in folder {folder}")
+        return False
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(process, smt_files))
+
+    print(f"{'file':<24} {'conditions':>10} {'groups':>8} {'code size':>10} {'parse':>10}")
+    entries = dict()
+    for smt_file, (entry, duration) in zip(smt_files, results):
+        entries[smt_file.name] = entry
+        print(f"{smt_file.name:<24} {entry['condition_count']:>10} {entry['group_count']:>8} "
+            f"{entry['code_size']:>9}B {duration * 1000:>8.1f}ms")
+
+    cve_cache.write_pack(folder, smt_files, entries)
+    logger.info(f"Wrote {len(entries)} entries to {folder / cve_cache.PACK_FILE}")
+    return True
+
+# ====================================================
+# Implementation of Command line Client
+# ====================================================
+
+def get_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="Olympia CVE Pack Builder",
+        description="Parses all enabled CVE files once and stores them as CVE pack inside of their folder")
+
+    parser.add_argument("-c", "--cve-folder"
+        , metavar="CVE_FOLDER"
+        , type=Path
+        , help="folder of the SMT files"
+        , default=DEFAULT_CVE_FOLDER
+        )
+    parser.add_argument("-j", "--jobs"
+        , metavar="JOBS"
+        , type=int
+        , help="amount of files parsed in parallel"
+        , default=None
+        )
+    return parser
+
+if __name__ == "__main__":
+    parser = get_arg_parser()
+    args = parser.parse_args()
+    success = build(args.cve_folder.resolve(), args.jobs)
+    exit(0 if success else 1)
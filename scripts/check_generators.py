@@ -0,0 +1,139 @@
+import sys
+import time
+from math import sqrt, log
+from pathlib import Path
+from argparse import ArgumentParser
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent / "maze-gen"))
+
+from mazelib.generate.BacktrackingGenerator import BacktrackingGenerator
+from mazelib.generate.Kruskal import Kruskal
+from mazelib.generate.Prims import Prims
+from mazelib.generate.Wilsons import Wilsons
+from mazelib.generate.Sidewinder import Sidewinder
+from array_gen import cell_distances
+from array_generators import ArrayBacktracking, ArrayKruskal, ArrayPrims, ArrayWilsons, ArraySidewinder
+
+GENERATOR_PAIRS = \
+    [ ("Backtracking", BacktrackingGenerator, ArrayBacktracking)
+    , ("Kruskal", Kruskal, ArrayKruskal)
+    , ("Prims", Prims, ArrayPrims)
+    , ("Wilsons", Wilsons, ArrayWilsons)
+    , ("Sidewinder", Sidewinder, ArraySidewinder)
+    ]
+
+# ====================================================
+# Statistical Equivalence Check
+# ====================================================
+
+def maze_statistics(grid: np.ndarray) -> dict[str, int]:
+    """
+    Returns the solution length from the top left to the bottom right cell, in the
+    format of the maze solutions, and the amount of junctions and dead ends of a maze.
+    """
+    distances, _ = cell_distances(grid, (1, 1))
+    free = grid == 0
+    degrees = free[0:-2:2, 1:-1:2].astype(int) + free[2::2, 1:-1:2] + free[1:-1:2, 0:-2:2] + free[1:-1:2, 2::2]
+    return \
+        { "solution_length" : 2 * int(distances[-2, -2]) + 1
+        , "junctions"       : int((degrees >= 3).sum())
+        , "dead_ends"       : int((degrees == 1).sum())
+        }
+
+def sample(generator_class, dimension: int, mazes: int, seed: int) -> tuple[dict[str, list[int]], float]:
+    """
+    Generates the mazes with the provided generator and returns the statistics of all mazes
+    together with the average generation time.
+    """
+    samples = dict()
+    duration = 0.0
+    for index in range(mazes):
+        np.random.seed(seed + index)
+        generator = generator_class(dimension, dimension)
+        start = time.perf_counter()
+        grid = generator.generate()
+        duration += time.perf_counter() - start
+        for name, value in maze_statistics(grid).items():
+            samples.setdefault(name, []).append(value)
+    return samples, duration / mazes
+
+def ks_statistic(left: list[int], right: list[int]) -> float:
+    """
+    Two-sample Kolmogorov-Smirnov statistic, i.e. the largest distance between
+    the empirical distribution functions of both samples.
+    """
+    left, right = np.sort(left), np.sort(right)
+    values = np.concatenate([left, right])
+    left_cdf = np.searchsorted(left, values, side="right") / len(left)
+    right_cdf = np.searchsorted(right, values, side="right") / len(right)
+    return float(np.max(np.abs(left_cdf - right_cdf)))
+
+def ks_critical_value(n: int, m: int, alpha: float) -> float:
+    return sqrt(-log(alpha / 2) / 2) * sqrt((n + m) / (n * m))
+
+def check(dimension: int, mazes: int, seed: int, alpha: float) -> bool:
+    """
+    Compares the solution length, junction and dead end distributions of the mazes
+    generated by mazelib and the array based generators using a two-sample
+    Kolmogorov-Smirnov test with significance level 'alpha'.
+    """
+    success = True
+    critical_value = ks_critical_value(mazes, mazes, alpha)
+    print(f"{mazes} mazes of {dimension}x{dimension} per generator, critical value {critical_value:.3f}")
+    print(f"{'algorithm':<12} {'metric':<15} {'mazelib':>10} {'array':>10} {'KS':>6}")
+    for name, mazelib_class, array_class in GENERATOR_PAIRS:
+        # both generators use different seeds to get independent samples
+        mazelib_samples, mazelib_time = sample(mazelib_class, dimension, mazes, seed)
+        array_samples, array_time = sample(array_class, dimension, mazes, seed + mazes)
+        for metric in mazelib_samples:
+            statistic = ks_statistic(mazelib_samples[metric], array_samples[metric])
+            equivalent = statistic <= critical_value
+            success &= equivalent
+            print(f"{name:<12} {metric:<15} {np.mean(mazelib_samples[metric]):>10.2f} "
+                f"{np.mean(array_samples[metric]):>10.2f} {statistic:>6.3f} {'' if equivalent else 'DIFFERS'}")
+        print(f"{name:<12} {'time':<15} {mazelib_time * 1000:>8.2f}ms {array_time * 1000:>8.2f}ms")
+    return success
+
+# ====================================================
+# Implementation of Command line Client
+# ====================================================
+
+def get_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="Olympia Generator Check",
+        description="Checks that the array based maze generators produce mazes with the same \
+                     solution length and branching distributions as mazelib's generators")
+
+    parser.add_argument("-d", "--dimension"
+        , metavar="DIMENSION"
+        , type=int
+        , help="maze dimension"
+        , default=10
+        )
+    parser.add_argument("-n", "--mazes"
+        , metavar="MAZES"
+        , type=int
+        , help="amount of mazes generated per generator"
+        , default=300
+        )
+    parser.add_argument("-s", "--seed"
+        , metavar="SEED"
+        , type=int
+        , help="seed of the first maze"
+        , default=1
+        )
+    parser.add_argument("--alpha"
+        , metavar="ALPHA"
+        , type=float
+        , help="significance level of the Kolmogorov-Smirnov tests"
+        , default=0.001
+        )
+    return parser
+
+if __name__ == "__main__":
+    parser = get_arg_parser()
+    args = parser.parse_args()
+    success = check(args.dimension, args.mazes, args.seed, args.alpha)
+    exit(0 if success else 1)
@@ -0,0 +1,130 @@
+import sys
+import time
+import filecmp
+from pathlib import Path
+from random import Random
+from argparse import ArgumentParser
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).parent.parent / "olympia"))
+
+import olympia
+from utils.custom_logging import logger
+
+# ====================================================
+# Engine Comparison
+# ====================================================
+
+def generate_with_engine(seeds: list[int], dimension: int, output_dir: Path,
+        methods: list[olympia.MazeGenMethodKind], engine: olympia.GenerationEngineKind) -> list[float]:
+    """
+    Generates one instance per seed with the provided engine and returns
+    the wall-clock time of every single instance.
+    """
+    timings = []
+    for seed in seeds:
+        start = time.perf_counter()
+        success = olympia.generate(seed, dimension, output_dir, list(olympia.MazeGenAlgorithmKind),
+            olympia.EQUALITY_METHOD_PERCENTAGE, olympia.CYCLE_PERCENTAGE, methods, True, engine)
+        timings.append(time.perf_counter() - start)
+        assert success, f"generation with engine '{engine}' failed for seed {seed}"
+    return timings
+
+def differing_files(left_dir: Path, right_dir: Path) -> list[str]:
+    """
+    Returns all files that differ between the two output folders. The reproducible
+    generation script contains the output path, so it is compared without it. Timing
+    records and profiles are expected to differ and are skipped.
+    """
+    differences = []
+    for left_file in sorted(left_dir.rglob("*")):
+        if not left_file.is_file():
+            continue
+        relative = left_file.relative_to(left_dir)
+        if relative.parts[0] in [olympia.TIMINGS_FILE, olympia.PROFILE_FOLDER]:
+            continue
+        right_file = right_dir / relative
+        if not right_file.is_file():
+            differences.append(str(relative))
+        elif relative.name == "reproducible_generation.sh":
+            left = left_file.read_text().replace(str(left_dir), "<OUTPUT>")
+            right = right_file.read_text().replace(str(right_dir), "<OUTPUT>")
+            if left != right:
+                differences.append(str(relative))
+        elif not filecmp.cmp(left_file, right_file, shallow=False):
+            differences.append(str(relative))
+    return differences
+
+def compare(seed: int, dimension: int, instances: int, methods: list[olympia.MazeGenMethodKind]) -> bool:
+    rng = Random(seed)
+    seeds = [ rng.randint(100000, 999999) for _ in range(instances) ]
+
+    with TemporaryDirectory() as tmp_dir:
+        shell_dir = Path(tmp_dir) / "shell"
+        in_process_dir = Path(tmp_dir) / "in-process"
+        shell_timings = generate_with_engine(seeds, dimension, shell_dir, methods,
+            olympia.GenerationEngineKind.SHELL)
+        in_process_timings = generate_with_engine(seeds, dimension, in_process_dir, methods,
+            olympia.GenerationEngineKind.IN_PROCESS)
+        differences = differing_files(shell_dir, in_process_dir)
+
+    # the first in-process instance pays for the imports, which is reported separately
+    shell_avg = sum(shell_timings) / len(shell_timings)
+    in_process_avg = sum(in_process_timings) / len(in_process_timings)
+    warm = in_process_timings[1:] or in_process_timings
+    warm_avg = sum(warm) / len(warm)
+
+    print(f"instances:               {instances} (dimension {dimension})")
+    print(f"shell per instance:      {shell_avg:.3f}s")
+    print(f"in-process per instance: {in_process_avg:.3f}s (first: {in_process_timings[0]:.3f}s, warm: {warm_avg:.3f}s)")
+    print(f"speedup:                 {shell_avg / in_process_avg:.2f}x (warm: {shell_avg / warm_avg:.2f}x)")
+
+    if differences:
+        for difference in differences:
+            logger.error(f"output differs: {difference}")
+        return False
+    print("outputs are byte-identical")
+    return True
+
+# ====================================================
+# Implementation of Command line Client
+# ====================================================
+
+def get_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser(
+        prog="Olympia Engine Comparison",
+        description="Generates the same instances with the shell and in-process \
+                     engine, checks that the outputs are identical and reports the timings")
+
+    parser.add_argument("-d", "--dimension"
+        , metavar="DIMENSION"
+        , type=olympia.dimension_value
+        , help="maze dimensions (must be >=5)"
+        , default=10
+        )
+    parser.add_argument("-i", "--instances"
+        , metavar="INSTANCES"
+        , type=int
+        , help="amount of instances generated with each engine"
+        , default=10
+        )
+    parser.add_argument("-s", "--seed"
+        , metavar="SEED"
+        , type=int
+        , help="an integer seed used to draw the instance seeds"
+        , default=0
+        )
+    parser.add_argument("-m", "--method"
+        , help="list of generation methods"
+        , nargs="+"
+        , type=olympia.MazeGenMethodKind
+        , choices=list(olympia.MazeGenMethodKind)
+        , default=[olympia.MazeGenMethodKind.DEFAULT, olympia.MazeGenMethodKind.EQUALITY]
+        )
+    return parser
+
+if __name__ == "__main__":
+    parser = get_arg_parser()
+    args = parser.parse_args()
+    success = compare(args.seed, args.dimension, args.instances, args.method)
+    exit(0 if success else 1)
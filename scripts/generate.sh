@@ -4,7 +4,7 @@
 
 set -e;
 
-while getopts a:w:h:o:r:n:c:g:s:e:? option
+while getopts a:w:h:o:r:n:c:g:s:e:xd:l:f:k:? option
 do
     case "${option}"
     in
@@ -18,13 +18,18 @@ do
     g) GEN=${OPTARG};;
     s) SMT_PATH=${OPTARG};;
     e) EXIT=${OPTARG};;
+    x) TEXT_EXPORT="no-text-export";;
+    d) DISPATCH=${OPTARG};;
+    l) INPUT_LOCATION=${OPTARG};;
+    f) EMISSION=${OPTARG};;
+    k) SHARD_SIZE=${OPTARG};;
     ?)  echo "Muzzle program generation"
         echo ""
         echo "Usage ./generate.sh -a ALG -w WIDTH -h HEIGHT -o OUTDIR"
-        echo "                    [-r SEED] [-n NUM] [-c CYCLES] [-g GEN_METHOD] [-s SMT_FILE] [-e EXIT]"
+        echo "                    [-r SEED] [-n NUM] [-c CYCLES] [-g GEN_METHOD] [-s SMT_FILE] [-e EXIT] [-x] [-d DISPATCH] [-l LOCATION] [-f EMISSION] [-k SHARD_SIZE]"
         echo ""
         echo "Options:"
-        echo "  -a        Maze generation algorithm (supported: Backtracking, Kruskal, Prims, Wilsons, Sidewinder)"
+        echo "  -a        Maze generation algorithm (supported: Backtracking, Kruskal, Prims, Wilsons, Sidewinder, ArrayBacktracking, ArrayKruskal, ArrayPrims, ArrayWilsons, ArraySidewinder)"
         echo "  -w        Width of the maze (at least 4 if height is at least 5)"
         echo "  -h        Height of the maze (at least 4 if width is at least 5)"
         echo "  -o        Directory to write program file to"
@@ -33,7 +38,12 @@ do
         echo "  -c        Percentage of cycles to include in path through maze"
         echo "  -g        Generation method of branch constraints (prefix of generation python file in maze-gen)"
         echo "  -s        SMT file to use if generation method is CVE_gen"
-        echo "  -e        Location of the maze exit (supported: default, random)"
+        echo "  -e        Location of the maze exit (supported: default, random, targeted)"
+        echo "  -x        Skip the human-readable txt and sln exports of the maze"
+        echo "  -d        Dispatch of the step function to the current cell (supported: linear, binary)"
+        echo "  -l        Data location of the input of the cell functions (supported: memory, calldata)"
+        echo "  -f        Emission of the cells as own or shared functions (supported: cells, shared)"
+        echo "  -k        Maximal amount of cells per contract, 0 emits a single contract"
         echo "  -?        Print help"
         exit 1;;
     esac
@@ -97,6 +107,29 @@ if [ -z ${EXIT+x} ]; then
     EXIT="default"
 fi
 
+if [ -z ${TEXT_EXPORT+x} ]; then
+    TEXT_EXPORT="text-export"
+fi
+
+if [ -z ${DISPATCH+x} ]; then
+    DISPATCH="linear"
+fi
+
+if [ -z ${INPUT_LOCATION+x} ]; then
+    INPUT_LOCATION="memory"
+fi
+
+if [ -z ${EMISSION+x} ]; then
+    EMISSION="cells"
+fi
+
+if [ -z ${SHARD_SIZE+x} ]; then
+    SHARD_SIZE=0
+fi
+
+# options of the contract emission, which are passed to array_to_code.py as they are
+CONTRACT_OPTIONS="--dispatch=$DISPATCH --input-location=$INPUT_LOCATION --emission=$EMISSION --shard-size=$SHARD_SIZE"
+
 if [ -z ${GEN+x} ]; then
     echo "NOTE: The program generator was not specified. Default generator will be used. (A generator file name without the language specification)"
     GEN="default_gen"
@@ -111,36 +144,43 @@ echo "Pseudo-random seed: "$SEED
 echo "Remaining cycles: "$CYCLE"%"
 echo "Number of mazes: "$NUMB
 echo "Generator used: "$GEN
+echo "Step dispatch: "$DISPATCH
+echo "Input location: "$INPUT_LOCATION
+echo "Cell emission: "$EMISSION
+echo "Shard size: "$SHARD_SIZE
 echo "Output directory: "$OUTPUT_DIR
 echo "##############################################"
 
-mkdir -p $OUTPUT_DIR/src $OUTPUT_DIR/bin $OUTPUT_DIR/png $OUTPUT_DIR/txt $OUTPUT_DIR/sln $OUTPUT_DIR/sol_tx
+mkdir -p $OUTPUT_DIR/src $OUTPUT_DIR/bin $OUTPUT_DIR/png $OUTPUT_DIR/maze $OUTPUT_DIR/txt $OUTPUT_DIR/sln $OUTPUT_DIR/sol_tx
 MAZEGEN_DIR=$(readlink -f $(dirname "$0")/..)/maze-gen
 
 for (( INDEX=1; INDEX<=$NUMB; INDEX++ ))
 do
     NAME=$ALGORITHM"_"$WIDTH"x"$HEIGHT"_"$SEED"_"$INDEX
-    python3 $MAZEGEN_DIR/array_gen.py $ALGORITHM $WIDTH $HEIGHT $SEED $EXIT $INDEX
+    python3 $MAZEGEN_DIR/array_gen.py $ALGORITHM $WIDTH $HEIGHT $SEED $EXIT $INDEX $TEXT_EXPORT
     if [ $? -eq 1 ]; then
-        echo "Select one of the following algorithms: Backtracking, Kruskal, Prims, Wilsons, Sidewinder"
+        echo "Select one of the following algorithms: Backtracking, Kruskal, Prims, Wilsons, Sidewinder, ArrayBacktracking, ArrayKruskal, ArrayPrims, ArrayWilsons, ArraySidewinder"
         exit 1
     fi
     if [[ "$GEN" == *"CVE"* ]]; then
         echo this cve
         SMT_NAME=$(basename $SMT_PATH .smt2)
         NAME_P=$NAME"_"$CYCLE"percent_"$SMT_NAME"_gen"
-        python3 $MAZEGEN_DIR/array_to_code.py $NAME $WIDTH $HEIGHT $CYCLE $SEED $GEN $SMT_PATH
+        python3 $MAZEGEN_DIR/array_to_code.py $NAME $WIDTH $HEIGHT $CYCLE $SEED $GEN $SMT_PATH $CONTRACT_OPTIONS
     else
         NAME_P=$NAME"_"$CYCLE"percent_"$GEN
-        python3 $MAZEGEN_DIR/array_to_code.py $NAME $WIDTH $HEIGHT $CYCLE $SEED $GEN
+        python3 $MAZEGEN_DIR/array_to_code.py $NAME $WIDTH $HEIGHT $CYCLE $SEED $GEN $CONTRACT_OPTIONS
     fi
 
     mv $NAME_P".sol" $OUTPUT_DIR/src
     mv $NAME_P".foundry.sol" $OUTPUT_DIR/src
     mv $NAME_P"_transactions.txt" $OUTPUT_DIR/sol_tx
     mv $NAME".png" $OUTPUT_DIR/png
-    mv $NAME".txt" $OUTPUT_DIR/txt
-    mv $NAME"_solution.txt" $OUTPUT_DIR/sln
+    mv $NAME".npy" $OUTPUT_DIR/maze
+    if [ "$TEXT_EXPORT" == "text-export" ]; then
+        mv $NAME".txt" $OUTPUT_DIR/txt
+        mv $NAME"_solution.txt" $OUTPUT_DIR/sln
+    fi
 done
 
 echo "Done!"